@@ -0,0 +1,124 @@
+"""Background workers for WorldEdit.
+
+Slow file work (reading, decompressing, decoding) runs in a worker pool so the
+server tick is never blocked. Results are handed back to the main thread with
+the server scheduler, where it is safe to touch players and worlds.
+"""
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+
+class BackgroundExecutor:
+    """Thread pool (plus an optional process pool) with main-thread callbacks."""
+
+    def __init__(self, plugin, max_workers: int = 2, process_threshold: int = 0):
+        """Initialize executor.
+
+        Args:
+            plugin: Plugin instance used to schedule callbacks
+            max_workers: Number of worker threads
+            process_threshold: File size in bytes from which work may go to a
+                separate process (0 disables the process pool)
+        """
+        self.plugin = plugin
+        self.process_threshold = process_threshold
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="WorldEdit")
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._process_ok = True
+        self._closed = False
+
+    def use_process_for(self, size: int) -> bool:
+        """Check whether work on a file of this size should run in a process.
+
+        Args:
+            size: Input size in bytes
+
+        Returns:
+            True if the process pool is enabled and the size reaches the threshold
+        """
+        return 0 < self.process_threshold <= size and self._process_ok and self._can_spawn()
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        callback: Callable[[Any], None],
+        errback: Optional[Callable[[Exception], None]] = None,
+        use_process: bool = False
+    ) -> Optional[Future]:
+        """Run a function in the background and deliver its result on the main thread.
+
+        Args:
+            fn: Function to run; must be a module-level function if use_process is set
+            *args: Arguments for fn
+            callback: Called on the main thread with the result
+            errback: Called on the main thread with the exception if fn raised
+            use_process: Run in the process pool instead of a thread, when possible
+
+        Returns:
+            Future for the work, or None if the executor is shut down
+        """
+        if self._closed:
+            return None
+
+        use_process = use_process and self._process_ok and self._can_spawn()
+        pool = self._get_process_pool() if use_process else self._threads
+        future = pool.submit(fn, *args)
+
+        def on_done(done: Future):
+            # Runs in the worker; hop back to the server thread before touching game state
+            if self._closed or done.cancelled():
+                return
+            error = done.exception()
+            if use_process and isinstance(error, BrokenProcessPool):
+                # The child interpreter could not start; stay on threads from now on
+                print(f"[WorldEdit] Worker process failed, using threads instead: {error}")
+                self._process_ok = False
+                self.submit(fn, *args, callback=callback, errback=errback)
+                return
+            if error is None:
+                self._schedule(lambda: callback(done.result()))
+            elif errback is not None:
+                self._schedule(lambda: errback(error))
+            else:
+                print(f"[WorldEdit] Background task failed: {error}")
+
+        future.add_done_callback(on_done)
+        return future
+
+    def shutdown(self) -> None:
+        """Stop accepting work and cancel anything not yet started."""
+        self._closed = True
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+    def _schedule(self, fn: Callable[[], None]) -> None:
+        """Run fn on the main thread at the next tick."""
+        def run():
+            try:
+                fn()
+            except Exception as e:
+                print(f"[WorldEdit] Error in background callback: {e}")
+
+        try:
+            self.plugin.server.scheduler.run_task(self.plugin, run)
+        except Exception as e:
+            print(f"[WorldEdit] Could not schedule background callback: {e}")
+
+    def _get_process_pool(self) -> Executor:
+        if self._processes is None:
+            context = multiprocessing.get_context("spawn")
+            self._processes = ProcessPoolExecutor(max_workers=1, mp_context=context)
+        return self._processes
+
+    @staticmethod
+    def _can_spawn() -> bool:
+        """Child processes need a real Python interpreter, not the embedding server binary."""
+        return os.path.basename(sys.executable or "").lower().startswith("python")
@@ -0,0 +1,180 @@
+"""
+Block category registry for WorldEdit.
+Each block type is classified once (by name) and the result is memoized process-wide,
+so placement ordering and terrain checks are a table lookup instead of string scans.
+"""
+
+import itertools
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+CATEGORY_AIR = "air"
+CATEGORY_SOLID = "solid"
+CATEGORY_GRAVITY = "gravity"
+CATEGORY_ATTACHABLE = "attachable"
+CATEGORY_LIQUID = "liquid"
+
+_AIR = {"air", "cave_air", "void_air"}
+
+_LIQUIDS = {"water", "flowing_water", "lava", "flowing_lava", "bubble_column"}
+
+_GRAVITY = {
+    "sand", "red_sand", "gravel", "suspicious_sand", "suspicious_gravel", "anvil", "chipped_anvil",
+    "damaged_anvil", "dragon_egg", "scaffolding", "pointed_dripstone",
+}
+_GRAVITY_SUFFIXES = ("concrete_powder",)
+
+# Blocks that pop off or break without a supporting block
+_ATTACHABLE = {
+    "vine", "ladder", "lily_pad", "waterlily", "reeds", "sugar_cane", "cactus", "bamboo", "bamboo_sapling",
+    "wheat", "carrots", "potatoes", "beetroot", "beetroots", "sweet_berry_bush", "nether_wart", "cocoa",
+    "kelp", "seagrass", "sea_pickle", "tallgrass", "short_grass", "tall_grass", "fern", "large_fern",
+    "dead_bush", "deadbush", "double_plant", "bell", "lantern", "soul_lantern", "snow_layer", "frame", "glow_frame",
+    "big_dripleaf", "small_dripleaf_block", "cave_vines", "twisting_vines", "weeping_vines", "glow_lichen",
+    "hanging_roots", "crimson_roots", "warped_roots", "spore_blossom", "azalea", "flowering_azalea", "pink_petals", "melon_stem",
+    "pumpkin_stem", "torchflower_crop", "pitcher_crop", "mangrove_propagule",
+}
+_ATTACHABLE_PATTERNS = (
+    "flower", "sapling", "mushroom", "torch", "rail", "redstone_wire", "repeater", "comparator", "sign",
+    "door", "lever", "button", "pressure_plate", "tripwire_hook", "tripwire", "banner", "carpet",
+    "candle", "coral_fan", "fungus", "amethyst_bud", "amethyst_cluster",
+)
+_ATTACHABLE_SUFFIXES = ("bed", "_head", "skull")
+# Full blocks whose names happen to contain an attachable pattern
+_SOLID_SUFFIXES = (
+    "_block", "_stem", "_hyphae", "_planks", "_log", "_wood", "_leaves", "_leaves_flowered", "mangrove_roots",
+)
+
+_TILE_ENTITIES = {
+    "chest", "trapped_chest", "ender_chest", "barrel", "furnace", "lit_furnace", "blast_furnace",
+    "lit_blast_furnace", "smoker", "lit_smoker", "hopper", "dispenser", "dropper", "brewing_stand",
+    "beacon", "lectern", "jukebox", "noteblock", "note_block", "enchanting_table", "mob_spawner", "spawner",
+    "trial_spawner", "vault", "chiseled_bookshelf", "decorated_pot", "campfire", "soul_campfire", "beehive",
+    "bee_nest", "bell", "conduit", "end_gateway", "end_portal", "structure_block", "daylight_detector",
+    "daylight_detector_inverted", "cauldron", "piston", "sticky_piston", "crafter", "sculk_sensor",
+    "calibrated_sculk_sensor", "sculk_shrieker", "sculk_catalyst", "frame", "glow_frame", "flower_pot",
+    "command_block", "chain_command_block", "repeating_command_block", "powered_comparator",
+    "unpowered_comparator", "comparator", "jigsaw", "suspicious_sand", "suspicious_gravel", "moving_block",
+}
+_TILE_ENTITY_SUFFIXES = ("shulker_box", "sign", "banner", "bed", "skull", "_head")
+
+# Order in which categories are placed: supports first, then blocks that rest on or attach to them
+PLACEMENT_ORDER = (CATEGORY_SOLID, CATEGORY_GRAVITY, CATEGORY_ATTACHABLE, CATEGORY_LIQUID)
+
+
+def _base_name(block_name: str) -> str:
+    """Strip the namespace and any block states from a block name."""
+    name = str(block_name).partition("[")[0].strip()
+    return name.rpartition(":")[2]
+
+
+def _classify(name: str) -> Tuple[str, bool]:
+    """Classify a base block name without consulting the cache."""
+    tile_entity = name in _TILE_ENTITIES or name.endswith(_TILE_ENTITY_SUFFIXES)
+
+    if name in _AIR:
+        return CATEGORY_AIR, False
+    if name in _LIQUIDS:
+        return CATEGORY_LIQUID, False
+    if name in _GRAVITY or name.endswith(_GRAVITY_SUFFIXES):
+        return CATEGORY_GRAVITY, tile_entity
+    if name in _ATTACHABLE:
+        return CATEGORY_ATTACHABLE, tile_entity
+    if name.endswith(_SOLID_SUFFIXES):
+        return CATEGORY_SOLID, tile_entity
+    if name.endswith(_ATTACHABLE_SUFFIXES) or any(p in name for p in _ATTACHABLE_PATTERNS):
+        return CATEGORY_ATTACHABLE, tile_entity
+    return CATEGORY_SOLID, tile_entity
+
+
+class BlockCategories:
+    """Memoized block name to (category, has tile entity) table."""
+
+    MAX_CACHE_SIZE = 65536
+
+    def __init__(self):
+        """Initialize registry."""
+        self._cache: Dict[str, Tuple[str, bool]] = {}
+
+    def lookup(self, block_name: str) -> Tuple[str, bool]:
+        """Get the category and tile-entity flag of a block.
+
+        Args:
+            block_name: Block name, with or without namespace and states
+
+        Returns:
+            Tuple of (category, has_tile_entity)
+        """
+        result = self._cache.get(block_name)
+        if result is None:
+            if len(self._cache) >= self.MAX_CACHE_SIZE:
+                self._cache.clear()
+            result = self._cache[block_name] = _classify(_base_name(block_name))
+        return result
+
+    def category(self, block_name: str) -> str:
+        """Get the placement category of a block."""
+        return self.lookup(block_name)[0]
+
+    def is_air(self, block_name: str) -> bool:
+        """Check whether a block is any kind of air."""
+        return self.lookup(block_name)[0] == CATEGORY_AIR
+
+    def is_solid(self, block_name: str) -> bool:
+        """Check whether a block is a full supporting block (including gravity blocks)."""
+        return self.lookup(block_name)[0] in (CATEGORY_SOLID, CATEGORY_GRAVITY)
+
+    def has_tile_entity(self, block_name: str) -> bool:
+        """Check whether a block carries tile-entity data (containers, signs, ...)."""
+        return self.lookup(block_name)[1]
+
+    def for_palette(self, block_names: Iterable[str]) -> List[str]:
+        """Categorize a palette, one entry per name in order.
+
+        Args:
+            block_names: Palette block names
+
+        Returns:
+            Category per palette entry
+        """
+        return [self.lookup(name)[0] for name in block_names]
+
+    def order_for_placement(self, blocks: Iterable[Sequence[Any]]) -> Iterator[Sequence[Any]]:
+        """Reorder block changes so supports are placed before what depends on them.
+
+        Solids (and air, when clearing) come first, then gravity blocks from
+        the bottom up, then attachables, then liquids. Order within a pass is
+        otherwise preserved.
+
+        Args:
+            blocks: Block change tuples of (x, y, z, block_type, ...)
+
+        Returns:
+            Iterator over the same tuples in placement order
+        """
+        passes: Dict[str, List[Sequence[Any]]] = {category: [] for category in PLACEMENT_ORDER}
+        solid = passes[CATEGORY_SOLID]
+        lookup = self.lookup
+        for block in blocks:
+            passes.get(lookup(block[3])[0], solid).append(block)
+        passes[CATEGORY_GRAVITY].sort(key=lambda block: block[1])
+        return itertools.chain.from_iterable(passes[category] for category in PLACEMENT_ORDER)
+
+    def clear(self) -> None:
+        """Drop all cached classifications."""
+        self._cache.clear()
+
+
+# Shared by schematic placement, paste, overlay and smooth
+block_categories = BlockCategories()
+
+# Bedrock names produced by the default translation map whose category is
+# easy to get wrong from name patterns alone; checked once at import
+_PINNED_CATEGORIES = {
+    "minecraft:snow": CATEGORY_SOLID,
+    "minecraft:snow_layer": CATEGORY_ATTACHABLE,
+    "minecraft:azalea_leaves_flowered": CATEGORY_SOLID,
+    "minecraft:mangrove_propagule": CATEGORY_ATTACHABLE,
+}
+for _name, _expected in _PINNED_CATEGORIES.items():
+    if block_categories.category(_name) != _expected:
+        raise AssertionError(f"{_name} classified as {block_categories.category(_name)}, expected {_expected}")
@@ -0,0 +1,155 @@
+"""
+Java Edition to Bedrock Edition block translation.
+Translations are memoized process-wide and only rebuilt when the configured map changes.
+"""
+
+import re
+from typing import Any, Dict, Optional, Tuple
+
+# Pattern rules applied after the configured map, in order: (pattern, name, wall variant)
+_PATTERN_RULES = (
+    (re.compile(r"potted_"), "flower_pot", None),
+    (re.compile(r"_bed"), "bed", None),
+    (re.compile(r"_banner"), "standing_banner", "wall_banner"),
+    (re.compile(r"sign"), "standing_sign", "wall_sign"),
+)
+_WALL = re.compile(r"wall")
+
+_CARDINAL = {"north", "south", "east", "west"}
+_WEIRDO_DIRECTION = {"east": 0, "west": 1, "south": 2, "north": 3}
+_FACING_DIRECTION = {"down": 0, "up": 1, "north": 2, "south": 3, "west": 4, "east": 5}
+_FACING_DIRECTION_BLOCKS = {
+    "ladder", "dispenser", "dropper", "observer", "piston", "sticky_piston", "end_rod",
+}
+
+
+def parse_blockstate(java_name: str) -> Tuple[str, Dict[str, str]]:
+    """Split a Java blockstate string into its base name and properties.
+
+    Args:
+        java_name: Blockstate such as "minecraft:oak_stairs[facing=east,half=top]"
+
+    Returns:
+        Tuple of (base name without namespace, property dictionary)
+    """
+    name, _, props = java_name.partition("[")
+    base_name = name.strip().replace("minecraft:", "")
+    properties = {}
+    if props:
+        for pair in props.rstrip("]").split(","):
+            key, sep, value = pair.partition("=")
+            if sep:
+                properties[key.strip()] = value.strip()
+    return base_name, properties
+
+
+def _translate_states(base_name: str, properties: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Convert the Java properties Bedrock understands into block states."""
+    states: Dict[str, Any] = {}
+
+    axis = properties.get("axis")
+    if axis in ("x", "y", "z"):
+        states["pillar_axis"] = axis
+
+    facing = properties.get("facing")
+    if base_name.endswith("_stairs") and facing in _WEIRDO_DIRECTION:
+        states["weirdo_direction"] = _WEIRDO_DIRECTION[facing]
+    elif base_name.endswith(("_door", "_fence_gate")) and facing in _CARDINAL:
+        states["minecraft:cardinal_direction"] = facing
+    elif base_name.endswith(("_wall_sign", "_wall_banner")) or base_name in _FACING_DIRECTION_BLOCKS:
+        if facing in _FACING_DIRECTION:
+            states["facing_direction"] = _FACING_DIRECTION[facing]
+
+    half = properties.get("half")
+    if base_name.endswith("_stairs") and half in ("top", "bottom"):
+        states["upside_down_bit"] = half == "top"
+    elif half in ("upper", "lower"):
+        states["upper_block_bit"] = half == "upper"
+
+    slab_type = properties.get("type")
+    if base_name.endswith("_slab") and slab_type in ("top", "bottom"):
+        states["minecraft:vertical_half"] = slab_type
+
+    if properties.get("open") in ("true", "false"):
+        states["open_bit"] = properties["open"] == "true"
+
+    if base_name.endswith("_leaves") and properties.get("persistent") in ("true", "false"):
+        states["persistent_bit"] = properties["persistent"] == "true"
+
+    return states or None
+
+
+class BlockTranslator:
+    """Memoized Java to Bedrock block translation table."""
+
+    MAX_CACHE_SIZE = 65536
+
+    def __init__(self, translation_map: Optional[Dict[str, str]] = None):
+        """Initialize translator.
+
+        Args:
+            translation_map: Java base name to Bedrock base name overrides
+        """
+        self._source: Optional[Dict[str, str]] = None
+        self._translation_map: Dict[str, str] = {}
+        self._cache: Dict[str, Tuple[str, Optional[Dict[str, Any]]]] = {}
+        self.set_translation_map(translation_map or {})
+
+    def set_translation_map(self, translation_map: Dict[str, str]) -> None:
+        """Use a translation map, dropping cached results only if it changed.
+
+        Args:
+            translation_map: Java base name to Bedrock base name overrides
+        """
+        self._source = translation_map
+        if translation_map != self._translation_map:
+            self._translation_map = dict(translation_map)
+            self._cache.clear()
+
+    def translate(self, java_name: str, translation_map: Optional[Dict[str, str]] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Translate a Java blockstate to a Bedrock name and block states.
+
+        Args:
+            java_name: Java blockstate string
+            translation_map: Current config map; checked for changes by identity
+
+        Returns:
+            Tuple of (bedrock_name, block_states or None)
+        """
+        if translation_map is not None and translation_map is not self._source:
+            self.set_translation_map(translation_map)
+
+        result = self._cache.get(java_name)
+        if result is None:
+            if len(self._cache) >= self.MAX_CACHE_SIZE:
+                self._cache.clear()
+            result = self._cache[java_name] = self._translate(java_name)
+        return result
+
+    def _translate(self, java_name: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Translate a blockstate without consulting the cache."""
+        base_name, properties = parse_blockstate(java_name)
+        states = _translate_states(base_name, properties)
+
+        # 1. Check the direct mapping from config.json
+        mapped = self._translation_map.get(base_name)
+        if mapped is not None:
+            return f"minecraft:{mapped}", states
+
+        # 2. Handle general patterns
+        for pattern, name, wall_name in _PATTERN_RULES:
+            if pattern.search(base_name):
+                if wall_name and _WALL.search(base_name):
+                    return f"minecraft:{wall_name}", states
+                return f"minecraft:{name}", states
+
+        # 3. Return original name if no translation is found
+        return f"minecraft:{base_name}", states
+
+    def clear(self) -> None:
+        """Drop all cached translations."""
+        self._cache.clear()
+
+
+# Shared by schematic imports and any other Java-format converter
+block_translator = BlockTranslator()
@@ -1,27 +1,633 @@
-"""Blueprint management for WorldEdit."""
+"""Blueprint management for WorldEdit.
+
+Blueprints are stored as small binary manifests: a fixed header and JSON
+metadata listing the 16x16x16 sections of the clipboard's bounding box.
+Each section is an RLE/zlib stream of palette entries (see
+storage.RLECompressor) kept once in a content-addressed ChunkStore, so
+duplicated content costs one copy on disk. Saving over a blueprint adds a
+version; versions that only touch a few cells are stored as sparse deltas
+against the latest full version. Format 1 files (a single RLE body after
+the header), format 2 files (unversioned) and legacy .json blueprints are
+still read transparently.
+"""
 
 import json
 import os
+import struct
+import tempfile
+import zlib
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
 from datetime import datetime
 
+from .chunk_store import ChunkStore
+from .storage import BlockData, BlueprintMetadata, RLECompressor
+
+BLUEPRINT_EXTENSION = ".wbp"
+LEGACY_EXTENSION = ".json"
+
+MAGIC = b"WEBP"
+FORMAT_VERSION = 3
+SECTION_SIZE = 16
+# Above this fraction of changed cells a new version is stored in full
+DELTA_MAX_FRACTION = 0.25
+_HEADER = struct.Struct(">4sBI")  # magic, version, metadata length
+
+# Palette entry for cells of the bounding box the clipboard does not cover
+_VOID = BlockData("", 0)
+
+
+def _block_states(data: Any) -> Optional[Dict[str, Any]]:
+    """Extract serializable block states from a clipboard data value."""
+    if data is None:
+        return None
+    if isinstance(data, dict):
+        return data
+    states = getattr(data, "block_states", None)
+    return dict(states) if states else None
+
+
+def encode_clipboard(clipboard_data: List[Tuple]) -> Tuple[Tuple[float, float, float], Tuple[int, int, int], List[BlockData], int]:
+    """Lay clipboard entries out on their bounding box for RLE compression.
+
+    Args:
+        clipboard_data: Clipboard tuples of (x, y, z, block_type[, data])
+
+    Returns:
+        Tuple of (origin, (width, height, length), blocks in YZX order, block count)
+    """
+    if not clipboard_data:
+        return (0, 0, 0), (0, 0, 0), [], 0
+
+    min_x = min(entry[0] for entry in clipboard_data)
+    min_y = min(entry[1] for entry in clipboard_data)
+    min_z = min(entry[2] for entry in clipboard_data)
+    width = int(round(max(entry[0] for entry in clipboard_data) - min_x)) + 1
+    height = int(round(max(entry[1] for entry in clipboard_data) - min_y)) + 1
+    length = int(round(max(entry[2] for entry in clipboard_data) - min_z)) + 1
+
+    grid = [_VOID] * (width * height * length)
+    palette: Dict[Tuple[str, str], BlockData] = {}
+    for entry in clipboard_data:
+        block_type = str(entry[3])
+        states = _block_states(entry[4]) if len(entry) > 4 else None
+        key = (block_type, json.dumps(states, sort_keys=True) if states else "")
+        block = palette.get(key)
+        if block is None:
+            block = palette[key] = BlockData(block_type, 0, {"states": states} if states else None)
+        gx = int(round(entry[0] - min_x))
+        gy = int(round(entry[1] - min_y))
+        gz = int(round(entry[2] - min_z))
+        grid[(gy * length + gz) * width + gx] = block
+
+    return (min_x, min_y, min_z), (width, height, length), grid, len(clipboard_data)
+
+
+def decode_clipboard(
+    origin: Tuple[float, float, float],
+    dimensions: Tuple[int, int, int],
+    blocks: List[BlockData],
+    block_data_factory: Optional[Callable[[str, Dict[str, Any]], Any]] = None
+) -> List[Tuple]:
+    """Rebuild clipboard tuples from a decoded block grid.
+
+    Args:
+        origin: Clipboard coordinates of the grid's minimum corner
+        dimensions: Grid (width, height, length)
+        blocks: Palette entries in YZX order
+        block_data_factory: Creates a block data value from (block_type, states)
+
+    Returns:
+        Clipboard tuples of (x, y, z, block_type, data)
+    """
+    min_x, min_y, min_z = origin
+    width, height, length = dimensions
+    data_values: Dict[int, Any] = {}
+    clipboard = []
+    for i, block in enumerate(blocks):
+        if not block.block_type:
+            continue
+        data = data_values.get(id(block), _VOID)
+        if data is _VOID:
+            states = block.nbt.get("states") if block.nbt else None
+            data = block_data_factory(block.block_type, states) if states and block_data_factory else None
+            data_values[id(block)] = data
+        yz, x = divmod(i, width)
+        y, z = divmod(yz, length)
+        clipboard.append((min_x + x, min_y + y, min_z + z, block.block_type, data))
+    return clipboard
+
+
+def split_sections(
+    dimensions: Tuple[int, int, int],
+    blocks: List[BlockData],
+    size: int = SECTION_SIZE
+) -> Iterator[Tuple[Tuple[int, int, int], List[BlockData]]]:
+    """Cut a YZX block grid into cubic sections.
+
+    Sections at the far edges are clipped to the grid. Sections holding
+    nothing but void cells are skipped.
+
+    Args:
+        dimensions: Grid (width, height, length)
+        blocks: Palette entries in YZX order
+        size: Section edge length
+
+    Returns:
+        Iterator of ((section x, y, z), section blocks in YZX order)
+    """
+    width, height, length = dimensions
+    for y0 in range(0, height, size):
+        for z0 in range(0, length, size):
+            for x0 in range(0, width, size):
+                x1 = min(x0 + size, width)
+                section: List[BlockData] = []
+                for y in range(y0, min(y0 + size, height)):
+                    for z in range(z0, min(z0 + size, length)):
+                        row = (y * length + z) * width
+                        section.extend(blocks[row + x0:row + x1])
+                if any(block.block_type for block in section):
+                    yield (x0 // size, y0 // size, z0 // size), section
+
+
+def join_sections(
+    dimensions: Tuple[int, int, int],
+    sections: Iterable[Tuple[Tuple[int, int, int], List[BlockData]]],
+    size: int = SECTION_SIZE
+) -> List[BlockData]:
+    """Reassemble a YZX block grid from its sections.
+
+    Args:
+        dimensions: Grid (width, height, length)
+        sections: Pairs of ((section x, y, z), section blocks in YZX order)
+        size: Section edge length
+
+    Returns:
+        Palette entries in YZX order, void where no section covers a cell
+    """
+    width, height, length = dimensions
+    blocks = [_VOID] * (width * height * length)
+    for (sx, sy, sz), section in sections:
+        x0, y0, z0 = sx * size, sy * size, sz * size
+        x1 = min(x0 + size, width)
+        span = x1 - x0
+        i = 0
+        for y in range(y0, min(y0 + size, height)):
+            for z in range(z0, min(z0 + size, length)):
+                row = (y * length + z) * width
+                blocks[row + x0:row + x1] = section[i:i + span]
+                i += span
+    return blocks
+
+
+def _store_sections(
+    store: ChunkStore,
+    dimensions: Tuple[int, int, int],
+    blocks: List[BlockData]
+) -> List[List[Any]]:
+    """Put a grid's sections in the chunk store.
+
+    Returns:
+        Manifest section entries of [section x, y, z, digest]
+    """
+    return [
+        [sx, sy, sz, store.put(RLECompressor.compress(section))]
+        for (sx, sy, sz), section in split_sections(dimensions, blocks)
+    ]
+
+
+def encode_delta(base: List[BlockData], blocks: List[BlockData]) -> Tuple[bytes, int]:
+    """Encode the cells where a grid differs from a base grid of the same size.
+
+    Args:
+        base: Base grid in YZX order
+        blocks: New grid in YZX order
+
+    Returns:
+        Tuple of (compressed delta, number of changed cells)
+    """
+    palette: List[Dict[str, Any]] = []
+    palette_map: Dict[int, int] = {}
+    same: Dict[Tuple[int, int], bool] = {}
+    gaps: List[int] = []
+    values: List[int] = []
+    last = -1
+    for i, (old, new) in enumerate(zip(base, blocks)):
+        # Grids share palette objects, so compare each distinct pair once
+        pair = (id(old), id(new))
+        unchanged = same.get(pair)
+        if unchanged is None:
+            unchanged = same[pair] = old == new
+        if unchanged:
+            continue
+        value = palette_map.get(id(new))
+        if value is None:
+            value = palette_map[id(new)] = len(palette)
+            palette.append(new.to_dict())
+        gaps.append(i - last)
+        values.append(value)
+        last = i
+    data = {"palette": palette, "gaps": gaps, "values": values}
+    return zlib.compress(json.dumps(data).encode("utf-8")), len(gaps)
+
+
+def apply_delta(base: List[BlockData], delta: bytes) -> List[BlockData]:
+    """Apply a delta from encode_delta to its base grid.
+
+    Args:
+        base: Base grid in YZX order (left unchanged)
+        delta: Compressed delta
+
+    Returns:
+        New grid in YZX order
+    """
+    data = json.loads(zlib.decompress(delta).decode("utf-8"))
+    palette = [BlockData.from_dict(entry) for entry in data["palette"]]
+    blocks = list(base)
+    i = -1
+    for gap, value in zip(data["gaps"], data["values"]):
+        i += gap
+        blocks[i] = palette[value]
+    return blocks
+
+
+def header_versions(header: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Get the version entries of a manifest.
+
+    Unversioned (format 2) manifests are presented as a single full version.
+
+    Args:
+        header: Header from read_blueprint_header
+
+    Returns:
+        Version entries, oldest first
+    """
+    versions = header.get("versions")
+    if versions is not None:
+        return versions
+    metadata = header.get("metadata", {})
+    return [{
+        "version": 1,
+        "createdAt": metadata.get("createdAt", ""),
+        "author": metadata.get("author", ""),
+        "blockCount": metadata.get("blockCount", 0),
+        "dimensions": metadata.get("dimensions", [0, 0, 0]),
+        "origin": header.get("origin", [0, 0, 0]),
+        "sections": header.get("sections", [])
+    }]
+
+
+def _version_entry(metadata: BlueprintMetadata, origin: Tuple[float, float, float]) -> Dict[str, Any]:
+    """Build a manifest version entry, without its block data, from metadata."""
+    return {
+        "version": metadata.version,
+        "createdAt": metadata.created_at,
+        "author": metadata.author,
+        "blockCount": metadata.block_count,
+        "dimensions": list(metadata.dimensions),
+        "origin": list(origin)
+    }
+
+
+class VersionResolver:
+    """Rebuilds version grids of one manifest, decoding shared data once."""
+
+    def __init__(self, store: ChunkStore, header: Dict[str, Any]):
+        """Initialize resolver.
+
+        Args:
+            store: Chunk store holding the section and delta data
+            header: Header from read_blueprint_header (format 2 or later)
+        """
+        self.store = store
+        self.section_size = header.get("sectionSize", SECTION_SIZE)
+        self.versions = {entry["version"]: entry for entry in header_versions(header)}
+        self._sections: Dict[str, List[BlockData]] = {}
+        self._grids: Dict[int, List[BlockData]] = {}
+
+    def blocks(self, version: int) -> List[BlockData]:
+        """Get the block grid of a version.
+
+        Args:
+            version: Version number
+
+        Returns:
+            Palette entries in YZX order (shared; do not modify)
+
+        Raises:
+            KeyError: If the version does not exist
+        """
+        grid = self._grids.get(version)
+        if grid is not None:
+            return grid
+
+        entry = self.versions[version]
+        if "sections" in entry:
+            sections = []
+            for sx, sy, sz, digest in entry["sections"]:
+                # Sections repeated within the blueprint are read and decoded once
+                section = self._sections.get(digest)
+                if section is None:
+                    section = self._sections[digest] = RLECompressor.decompress(self.store.get(digest))
+                sections.append(((sx, sy, sz), section))
+            grid = join_sections(tuple(entry["dimensions"]), sections, self.section_size)
+        else:
+            # Deltas are always taken against a full version, so one step suffices
+            grid = apply_delta(self.blocks(entry["base"]), self.store.get(entry["delta"]))
+        self._grids[version] = grid
+        return grid
+
+
+def write_blueprint_file(
+    file_path: Path,
+    blueprint: "Blueprint",
+    store: ChunkStore,
+    previous: Optional[Dict[str, Any]] = None,
+    max_versions: int = 0,
+    overwrite: bool = True
+) -> None:
+    """Write a blueprint manifest, storing its sections in the chunk store.
+
+    With a previous manifest the blueprint becomes its next version, stored
+    as a sparse delta against the latest full version when the bounding box
+    is unchanged and few enough cells differ.
+
+    Args:
+        file_path: Destination path
+        blueprint: Blueprint to write
+        store: Chunk store receiving the section data
+        previous: Header of the manifest being superseded (format 2 or later)
+        max_versions: Versions to keep (0 keeps all)
+        overwrite: Replace an existing file (see write_manifest)
+    """
+    origin, dimensions, blocks, block_count = encode_clipboard(blueprint.clipboard_data)
+    metadata = blueprint.metadata
+    metadata.dimensions = dimensions
+    metadata.block_count = block_count
+
+    versions: List[Dict[str, Any]] = []
+    entry = None
+    if previous is not None:
+        versions = [dict(version) for version in header_versions(previous)]
+        latest = versions[-1]
+        metadata.version = latest["version"] + 1
+        full = latest if "sections" in latest else next(v for v in versions if v["version"] == latest["base"])
+        if tuple(full["dimensions"]) == dimensions and list(full["origin"]) == list(origin):
+            resolver = VersionResolver(store, previous)
+            delta, changes = encode_delta(resolver.blocks(full["version"]), blocks)
+            if changes <= len(blocks) * DELTA_MAX_FRACTION:
+                entry = _version_entry(metadata, origin)
+                entry.update(base=full["version"], delta=store.put(delta), changes=changes)
+    else:
+        metadata.version = 1
+
+    if entry is None:
+        entry = _version_entry(metadata, origin)
+        entry["sections"] = _store_sections(store, dimensions, blocks)
+    versions.append(entry)
+    if max_versions and len(versions) > max_versions:
+        versions = _trim_versions(store, previous, versions, max_versions)
+
+    write_manifest(file_path, {
+        "metadata": metadata.to_dict(),
+        "sectionSize": SECTION_SIZE,
+        "versions": versions
+    }, overwrite)
+
+
+def _trim_versions(
+    store: ChunkStore,
+    previous: Dict[str, Any],
+    versions: List[Dict[str, Any]],
+    max_versions: int
+) -> List[Dict[str, Any]]:
+    """Drop the oldest versions, rebasing deltas whose full version is dropped."""
+    resolver = VersionResolver(store, previous)
+    # Include the new entry so its base can be resolved as well
+    resolver.versions[versions[-1]["version"]] = versions[-1]
+    kept = versions[-max_versions:]
+    kept_numbers = {entry["version"] for entry in kept}
+    rebased: Dict[int, int] = {}
+    for entry in kept:
+        base = entry.get("base")
+        if base is None or base in kept_numbers:
+            continue
+        if base not in rebased:
+            # The oldest orphaned delta becomes the new full version for its group
+            rebased[base] = entry["version"]
+            grid = resolver.blocks(entry["version"])
+            entry["sections"] = _store_sections(store, tuple(entry["dimensions"]), grid)
+            for key in ("base", "delta", "changes"):
+                entry.pop(key, None)
+            continue
+        delta, changes = encode_delta(resolver.blocks(rebased[base]), resolver.blocks(entry["version"]))
+        entry.update(base=rebased[base], delta=store.put(delta), changes=changes)
+    return kept
+
+
+def write_manifest(file_path: Path, header: Dict[str, Any], overwrite: bool = True) -> None:
+    """Write a manifest-only blueprint file atomically.
+
+    Each write goes through its own temporary file, so concurrent writers
+    never interleave.
+
+    Args:
+        file_path: Destination path
+        header: Header dictionary with metadata, origin and sections
+        overwrite: Replace an existing file; if False the file is only
+            created, and FileExistsError is raised if it already exists
+
+    Raises:
+        FileExistsError: If overwrite is False and the file exists
+    """
+    data = json.dumps(header).encode("utf-8")
+    fd, tmp_name = tempfile.mkstemp(prefix=f"{file_path.name}.", suffix=".tmp", dir=file_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(data)))
+            f.write(data)
+        if overwrite:
+            os.replace(tmp_name, file_path)
+        else:
+            # Linking fails if the destination exists, unlike a rename
+            os.link(tmp_name, file_path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def read_blueprint_header(f) -> Dict[str, Any]:
+    """Read the header of an open binary blueprint, leaving the body unread.
+
+    Args:
+        f: Binary file object positioned at the start of the file
+
+    Returns:
+        Header dictionary with "metadata" and the file format "version";
+        see header_versions for the stored blueprint versions
+
+    Raises:
+        ValueError: If the file is not a supported blueprint
+    """
+    magic, version, header_length = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a WorldEdit blueprint file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Unsupported blueprint format version {version}")
+    header = json.loads(f.read(header_length).decode("utf-8"))
+    header["version"] = version
+    return header
+
+
+def read_blueprint_file(
+    file_path: Path,
+    store: ChunkStore,
+    block_data_factory: Optional[Callable[[str, Dict[str, Any]], Any]] = None
+) -> "Blueprint":
+    """Read a binary blueprint.
+
+    Args:
+        file_path: Path to the .wbp file
+        store: Chunk store holding the section data
+        block_data_factory: Creates a block data value from (block_type, states)
+
+    Returns:
+        Blueprint instance
+    """
+    metadata, clipboard = read_blueprint_body(file_path, store, block_data_factory)
+    return Blueprint.from_metadata(metadata, clipboard)
+
+
+def read_blueprint_body(
+    file_path: Path,
+    store: ChunkStore,
+    block_data_factory: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+    version: Optional[int] = None
+) -> Tuple[BlueprintMetadata, List[Tuple]]:
+    """Read and decode a binary blueprint's blocks.
+
+    Args:
+        file_path: Path to the .wbp file
+        store: Chunk store holding the section data
+        block_data_factory: Creates a block data value from (block_type, states)
+        version: Version to reconstruct (defaults to the latest)
+
+    Returns:
+        Tuple of (metadata, clipboard data)
+
+    Raises:
+        KeyError: If the requested version does not exist
+    """
+    with open(file_path, "rb") as f:
+        header = read_blueprint_header(f)
+        body = f.read()
+    metadata = BlueprintMetadata.from_dict(header.get("metadata", {}))
+
+    if header["version"] < 2:
+        if version not in (None, 1):
+            raise KeyError(version)
+        origin = tuple(header.get("origin", (0, 0, 0)))
+        blocks = RLECompressor.decompress(body)
+    else:
+        resolver = VersionResolver(store, header)
+        entry = resolver.versions[version if version is not None else header_versions(header)[-1]["version"]]
+        origin = tuple(entry["origin"])
+        metadata.version = entry["version"]
+        metadata.dimensions = tuple(entry["dimensions"])
+        metadata.block_count = entry["blockCount"]
+        metadata.created_at = entry["createdAt"]
+        metadata.author = entry["author"]
+        blocks = resolver.blocks(entry["version"])
+
+    clipboard = decode_clipboard(origin, metadata.dimensions, blocks, block_data_factory)
+    return metadata, clipboard
+
+
+def read_blueprint_metadata(file_path: Path) -> BlueprintMetadata:
+    """Read a blueprint's metadata without decoding its blocks.
+
+    Binary blueprints only have their header read. Legacy JSON files have
+    no header and are parsed in full.
+
+    Args:
+        file_path: Path to a .wbp or legacy .json blueprint
+
+    Returns:
+        Metadata with file_size filled in
+    """
+    if file_path.suffix == LEGACY_EXTENSION:
+        with open(file_path, "r") as f:
+            data = json.load(f)
+        metadata = Blueprint.from_dict(data).metadata
+        clipboard = data.get("clipboard") or []
+        metadata.name = file_path.stem
+        metadata.block_count = len(clipboard)
+        if clipboard:
+            metadata.dimensions = tuple(
+                int(round(max(entry[axis] for entry in clipboard) - min(entry[axis] for entry in clipboard))) + 1
+                for axis in range(3)
+            )
+    else:
+        with open(file_path, "rb") as f:
+            metadata = BlueprintMetadata.from_dict(read_blueprint_header(f).get("metadata", {}))
+    metadata.file_size = file_path.stat().st_size
+    return metadata
+
 
 class Blueprint:
     """Represents a saved blueprint."""
 
-    def __init__(self, name: str, clipboard_data: Dict[str, Any], author: str = "Unknown"):
+    def __init__(
+        self,
+        name: str,
+        clipboard_data: Optional[List[Tuple]],
+        author: str = "Unknown",
+        loader: Optional[Callable[[], List[Tuple]]] = None
+    ):
         """Initialize blueprint.
 
         Args:
             name: Blueprint name
-            clipboard_data: Clipboard data from WorldEdit
+            clipboard_data: Clipboard data from WorldEdit, or None to load lazily
             author: Blueprint author
+            loader: Loads the clipboard data on first access when it is None
         """
         self.name = name
-        self.clipboard_data = clipboard_data
-        self.author = author
-        self.created = datetime.now().isoformat()
+        self._clipboard_data = clipboard_data
+        self._loader = loader
+        self.metadata = BlueprintMetadata(name, author=author)
+
+    @property
+    def clipboard_data(self) -> List[Tuple]:
+        """Clipboard data, read from disk the first time it is needed."""
+        if self._clipboard_data is None and self._loader is not None:
+            self._clipboard_data = self._loader()
+            self._loader = None
+        return self._clipboard_data
+
+    @clipboard_data.setter
+    def clipboard_data(self, value: List[Tuple]) -> None:
+        self._clipboard_data = value
+        self._loader = None
+
+    @property
+    def author(self) -> str:
+        """Blueprint author."""
+        return self.metadata.author
+
+    @author.setter
+    def author(self, value: str) -> None:
+        self.metadata.author = value
+
+    @property
+    def created(self) -> str:
+        """Creation time as an ISO timestamp."""
+        return self.metadata.created_at
+
+    @created.setter
+    def created(self, value: str) -> None:
+        self.metadata.created_at = value
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization.
@@ -54,19 +660,180 @@ class Blueprint:
         bp.created = data.get("created", datetime.now().isoformat())
         return bp
 
+    @staticmethod
+    def from_metadata(
+        metadata: BlueprintMetadata,
+        clipboard_data: Optional[List[Tuple]],
+        loader: Optional[Callable[[], List[Tuple]]] = None
+    ) -> "Blueprint":
+        """Create blueprint from stored metadata and clipboard data.
+
+        Args:
+            metadata: Stored metadata
+            clipboard_data: Decoded clipboard, or None to load lazily
+            loader: Loads the clipboard data on first access
+
+        Returns:
+            Blueprint instance
+        """
+        bp = Blueprint(metadata.name, clipboard_data, metadata.author, loader)
+        bp.metadata = metadata
+        return bp
+
+
+class BlueprintIndex:
+    """Metadata index for one blueprint folder, so listing never opens blueprint bodies."""
+
+    INDEX_FILE = ".index"
+
+    def __init__(self, folder: Path):
+        """Initialize index, rebuilding it from file headers if it is missing.
+
+        Args:
+            folder: Blueprint folder the index describes
+        """
+        self.folder = folder
+        self.index_path = folder / self.INDEX_FILE
+        self.entries: Dict[str, BlueprintMetadata] = {}
+        if not self.load():
+            self.rebuild()
+
+    def load(self) -> bool:
+        """Load the index file.
+
+        Returns:
+            True if a valid index was loaded
+        """
+        if not self.index_path.exists():
+            return False
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            self.entries = {
+                name: BlueprintMetadata.from_dict(entry)
+                for name, entry in data.get("entries", {}).items()
+            }
+            return True
+        except Exception as e:
+            print(f"[WorldEdit] Error loading blueprint index: {e}")
+            self.entries = {}
+            return False
+
+    def save(self) -> None:
+        """Write the index file atomically."""
+        data = {"version": 1, "entries": {name: meta.to_dict() for name, meta in self.entries.items()}}
+        tmp_path = self.index_path.with_name(self.INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def rebuild(self) -> None:
+        """Rebuild the index from the folder, reading only binary headers."""
+        self.entries = {}
+        for extension in (LEGACY_EXTENSION, BLUEPRINT_EXTENSION):
+            for path in self.folder.glob(f"*{extension}"):
+                try:
+                    self.entries[path.stem] = read_blueprint_metadata(path)
+                except Exception as e:
+                    print(f"[WorldEdit] Error indexing blueprint '{path.name}': {e}")
+        self.save()
+
+    def put(self, metadata: BlueprintMetadata) -> None:
+        """Add or replace an entry and persist the index.
+
+        Args:
+            metadata: Metadata of the saved blueprint
+        """
+        self.entries[metadata.name] = metadata
+        self.save()
+
+    def remove(self, name: str) -> None:
+        """Remove an entry and persist the index.
+
+        Args:
+            name: Blueprint name
+        """
+        if self.entries.pop(name, None) is not None:
+            self.save()
+
+    def search(self, search: Optional[str] = None, sort_by: str = "name") -> List[BlueprintMetadata]:
+        """Filter and sort entries.
+
+        Args:
+            search: Case-insensitive text matched against name, author and tags
+            sort_by: One of name, newest, blocks or size
+
+        Returns:
+            Matching metadata
+        """
+        entries = list(self.entries.values())
+        if search:
+            needle = search.lower()
+            entries = [
+                meta for meta in entries
+                if needle in meta.name.lower() or needle in meta.author.lower()
+                or any(needle in tag.lower() for tag in meta.tags)
+            ]
+
+        if sort_by == "newest":
+            entries.sort(key=lambda meta: meta.created_at, reverse=True)
+        elif sort_by == "blocks":
+            entries.sort(key=lambda meta: meta.block_count, reverse=True)
+        elif sort_by == "size":
+            entries.sort(key=lambda meta: meta.file_size, reverse=True)
+        else:
+            entries.sort(key=lambda meta: meta.name.lower())
+        return entries
+
+    @staticmethod
+    def paginate(entries: List[BlueprintMetadata], page: int, per_page: int = 10) -> Tuple[List[BlueprintMetadata], int, int]:
+        """Slice a list of entries into a page.
+
+        Args:
+            entries: Entries to page through
+            page: 1-based page number (clamped to the valid range)
+            per_page: Entries per page
+
+        Returns:
+            Tuple of (page entries, page number, total pages)
+        """
+        total_pages = max(1, (len(entries) + per_page - 1) // per_page)
+        page = min(max(1, page), total_pages)
+        start = (page - 1) * per_page
+        return entries[start:start + per_page], page, total_pages
+
 
 class BlueprintManager:
     """Manages blueprint storage and loading."""
     
-    def __init__(self, blueprint_folder: str, shared_folder: str):
+    def __init__(
+        self,
+        blueprint_folder: str,
+        shared_folder: str,
+        block_data_factory: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+        cache_max_blocks: int = 2_000_000,
+        store_folder: Optional[str] = None,
+        max_versions: int = 50
+    ):
         """Initialize blueprint manager.
         
         Args:
             blueprint_folder: Base blueprint folder path
             shared_folder: Shared blueprint folder path
+            block_data_factory: Creates a block data value from (block_type, states) on load
+            cache_max_blocks: Total clipboard entries kept in the decoded blueprint cache
+            store_folder: Chunk store folder (defaults to "store" next to the blueprint folder)
+            max_versions: Versions kept per blueprint (0 keeps all)
         """
         self.blueprint_folder = Path(blueprint_folder)
         self.shared_folder = Path(shared_folder)
+        self.store = ChunkStore(store_folder or str(self.blueprint_folder.parent / "store"))
+        self.max_versions = max_versions
+        self.block_data_factory = block_data_factory
+        self._indexes: Dict[Path, BlueprintIndex] = {}
+        self.cache_max_blocks = cache_max_blocks
+        self._cache_blocks = 0
+        self._cache: "OrderedDict[str, Tuple[int, int, Tuple[Tuple, ...]]]" = OrderedDict()
         
         # Create directories
         self.blueprint_folder.mkdir(parents=True, exist_ok=True)
@@ -84,14 +851,46 @@ class BlueprintManager:
         folder = self.blueprint_folder / "personal" / player_uuid
         folder.mkdir(parents=True, exist_ok=True)
         return folder
+
+    def get_folder(self, player_uuid: str, shared: bool = False) -> Path:
+        """Get the folder a blueprint lives in.
+
+        Args:
+            player_uuid: Player UUID
+            shared: Whether to use the shared folder
+
+        Returns:
+            Path to the folder
+        """
+        return self.shared_folder if shared else self.get_personal_folder(player_uuid)
+
+    def get_index(self, folder: Path) -> BlueprintIndex:
+        """Get the metadata index of a folder, loading it on first use.
+
+        Args:
+            folder: Blueprint folder
+
+        Returns:
+            Folder index
+        """
+        index = self._indexes.get(folder)
+        if index is None:
+            index = self._indexes[folder] = BlueprintIndex(folder)
+        return index
+
+    def reload_indexes(self) -> None:
+        """Rebuild every loaded index (e.g. after files were converted)."""
+        for index in self._indexes.values():
+            index.rebuild()
     
     def save_blueprint(
         self,
         player_uuid: str,
         name: str,
-        clipboard_data: Dict[str, Any],
+        clipboard_data: List[Tuple],
         author: str = "",
-        shared: bool = False
+        shared: bool = False,
+        tags: Optional[List[str]] = None
     ) -> bool:
         """Save blueprint to file.
 
@@ -101,34 +900,78 @@ class BlueprintManager:
             clipboard_data: Clipboard data to save (from WorldEdit)
             author: Blueprint author
             shared: Whether to save to shared folder
+            tags: Optional search tags
+
+        Saving over an existing blueprint adds a new version of it.
 
         Returns:
             True if saved successfully
         """
         try:
             blueprint = Blueprint(name, clipboard_data, author)
+            blueprint.metadata.tags = list(tags or [])
+            folder = self.get_folder(player_uuid, shared)
+            file_path = folder / f"{name}{BLUEPRINT_EXTENSION}"
 
-            # Determine save location
-            if shared:
-                folder = self.shared_folder
-            else:
-                folder = self.get_personal_folder(player_uuid)
+            previous = self._read_history_header(folder, name)
+            if previous is not None and not tags:
+                blueprint.metadata.tags = list(previous.get("metadata", {}).get("tags", []))
+            write_blueprint_file(file_path, blueprint, self.store, previous, self.max_versions)
+            self._uncache(str(file_path))
+
+            # The binary file supersedes any legacy copy of the same name
+            legacy_path = folder / f"{name}{LEGACY_EXTENSION}"
+            if legacy_path.exists():
+                legacy_path.unlink()
+                self._uncache(str(legacy_path))
 
-            # Save to file
-            file_path = folder / f"{name}.json"
-            with open(file_path, "w") as f:
-                json.dump(blueprint.to_dict(), f, indent=2)
+            blueprint.metadata.file_size = file_path.stat().st_size
+            self.get_index(folder).put(blueprint.metadata)
 
             return True
         except Exception as e:
             print(f"[WorldEdit] Error saving blueprint: {e}")
             return False
     
+    def _read_history_header(self, folder: Path, name: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest header an existing blueprint's next version builds on.
+
+        Format 1 and legacy blueprints are first rewritten as a manifest so
+        their content becomes version 1.
+
+        Args:
+            folder: Blueprint folder
+            name: Blueprint name
+
+        Returns:
+            Header dictionary, or None if the blueprint does not exist
+        """
+        file_path = folder / f"{name}{BLUEPRINT_EXTENSION}"
+        legacy_path = folder / f"{name}{LEGACY_EXTENSION}"
+        if file_path.exists():
+            with open(file_path, "rb") as f:
+                header = read_blueprint_header(f)
+            if header["version"] >= 2:
+                return header
+            blueprint = read_blueprint_file(file_path, self.store, self.block_data_factory)
+        elif legacy_path.exists():
+            blueprint = self._read_legacy(legacy_path)
+        else:
+            return None
+
+        write_blueprint_file(file_path, blueprint, self.store)
+        if legacy_path.exists():
+            legacy_path.unlink()
+            self._uncache(str(legacy_path))
+        with open(file_path, "rb") as f:
+            return read_blueprint_header(f)
+
     def load_blueprint(
         self,
         player_uuid: str,
         name: str,
-        from_shared: bool = False
+        from_shared: bool = False,
+        version: Optional[int] = None
     ) -> Optional[Blueprint]:
         """Load blueprint from file.
 
@@ -136,30 +979,144 @@ class BlueprintManager:
             player_uuid: Player UUID
             name: Blueprint name
             from_shared: Whether to load from shared folder
+            version: Version to load (defaults to the latest)
 
         Returns:
             Blueprint or None if not found
         """
         try:
-            # Determine load location
-            if from_shared:
-                folder = self.shared_folder
+            folder = self.get_folder(player_uuid, from_shared)
+
+            for extension in (BLUEPRINT_EXTENSION, LEGACY_EXTENSION):
+                file_path = folder / f"{name}{extension}"
+                if file_path.exists():
+                    break
             else:
-                folder = self.get_personal_folder(player_uuid)
+                return None
 
-            file_path = folder / f"{name}.json"
+            # Metadata comes from the index; blocks are decoded on first use
+            entry = self.get_index(folder).entries.get(name)
+            if entry is not None:
+                metadata = BlueprintMetadata.from_dict(entry.to_dict())
+            else:
+                metadata = read_blueprint_metadata(file_path)
 
-            if not file_path.exists():
-                return None
+            if version is not None and version != metadata.version:
+                history = {item["version"]: item for item in self.blueprint_history(player_uuid, name, from_shared) or []}
+                item = history.get(version)
+                if item is None:
+                    return None
+                metadata.version = version
+                metadata.created_at = item["createdAt"]
+                metadata.author = item["author"]
+                metadata.block_count = item["blockCount"]
+                metadata.dimensions = tuple(item["dimensions"])
+            else:
+                version = None
+            return Blueprint.from_metadata(metadata, None, loader=lambda: self._load_body(file_path, version))
+        except Exception as e:
+            print(f"[WorldEdit] Error loading blueprint: {e}")
+            return None
 
-            with open(file_path, "r") as f:
-                data = json.load(f)
+    def _load_body(self, file_path: Path, version: Optional[int] = None) -> List[Tuple]:
+        """Get a blueprint's clipboard data from the cache or from disk.
+
+        Args:
+            file_path: Path to the blueprint file
+            version: Version to load (defaults to the latest)
 
-            return Blueprint.from_dict(data)
+        Returns:
+            A new list of clipboard entries (empty if the file cannot be read)
+        """
+        key = str(file_path) if version is None else f"{file_path}@{version}"
+        try:
+            stat = file_path.stat()
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                self._cache.move_to_end(key)
+                return list(cached[2])
+
+            if file_path.suffix == LEGACY_EXTENSION:
+                clipboard = self._read_legacy(file_path, self.block_data_factory).clipboard_data
+            else:
+                clipboard = read_blueprint_body(file_path, self.store, self.block_data_factory, version)[1]
         except Exception as e:
             print(f"[WorldEdit] Error loading blueprint: {e}")
+            return []
+
+        self._uncache(key)
+        if len(clipboard) <= self.cache_max_blocks:
+            self._cache[key] = (stat.st_mtime_ns, stat.st_size, tuple(clipboard))
+            self._cache_blocks += len(clipboard)
+            while self._cache_blocks > self.cache_max_blocks:
+                self._uncache(next(iter(self._cache)))
+        return clipboard
+
+    def _uncache(self, key: str) -> None:
+        """Drop a decoded blueprint from the cache."""
+        cached = self._cache.pop(key, None)
+        if cached is not None:
+            self._cache_blocks -= len(cached[2])
+
+    def blueprint_history(
+        self,
+        player_uuid: str,
+        name: str,
+        from_shared: bool = False
+    ) -> Optional[List[Dict[str, Any]]]:
+        """List the stored versions of a blueprint.
+
+        Args:
+            player_uuid: Player UUID
+            name: Blueprint name
+            from_shared: Whether to look in the shared folder
+
+        Returns:
+            Version entries (version, createdAt, author, blockCount,
+            dimensions, and changes for delta versions), oldest first, or
+            None if the blueprint does not exist
+        """
+        try:
+            folder = self.get_folder(player_uuid, from_shared)
+            file_path = folder / f"{name}{BLUEPRINT_EXTENSION}"
+            if file_path.exists():
+                with open(file_path, "rb") as f:
+                    header = read_blueprint_header(f)
+                if header["version"] >= 2:
+                    versions = header_versions(header)
+                    return [
+                        {key: value for key, value in entry.items() if key not in ("sections", "delta", "origin")}
+                        for entry in versions
+                    ]
+            elif not (folder / f"{name}{LEGACY_EXTENSION}").exists():
+                return None
+
+            # Older formats hold a single version
+            metadata = read_blueprint_metadata(file_path if file_path.exists() else folder / f"{name}{LEGACY_EXTENSION}")
+            return [{
+                "version": 1,
+                "createdAt": metadata.created_at,
+                "author": metadata.author,
+                "blockCount": metadata.block_count,
+                "dimensions": list(metadata.dimensions)
+            }]
+        except Exception as e:
+            print(f"[WorldEdit] Error reading blueprint history: {e}")
             return None
 
+    def get_metadata(self, player_uuid: str, name: str, shared: bool = False) -> Optional[BlueprintMetadata]:
+        """Get the indexed metadata of a blueprint.
+
+        Args:
+            player_uuid: Player UUID
+            name: Blueprint name
+            shared: Whether to look in the shared folder
+
+        Returns:
+            Metadata or None if not found
+        """
+        return self.get_index(self.get_folder(player_uuid, shared)).entries.get(name)
+
     def list_blueprints(self, player_uuid: str, include_shared: bool = True) -> List[str]:
         """List available blueprints.
 
@@ -174,16 +1131,36 @@ class BlueprintManager:
 
         # Personal blueprints
         personal_folder = self.get_personal_folder(player_uuid)
-        for file in personal_folder.glob("*.json"):
-            blueprints.append(file.stem)
+        for name in self.get_index(personal_folder).entries:
+            blueprints.append(name)
 
         # Shared blueprints
         if include_shared:
-            for file in self.shared_folder.glob("*.json"):
-                blueprints.append(f"[Shared] {file.stem}")
+            for name in self.get_index(self.shared_folder).entries:
+                blueprints.append(f"[Shared] {name}")
 
         return sorted(blueprints)
 
+    def list_metadata(
+        self,
+        player_uuid: str,
+        shared: bool = False,
+        search: Optional[str] = None,
+        sort_by: str = "name"
+    ) -> List[BlueprintMetadata]:
+        """List blueprint metadata from the folder index.
+
+        Args:
+            player_uuid: Player UUID
+            shared: Whether to list the shared folder instead of the player's
+            search: Case-insensitive text matched against name, author and tags
+            sort_by: One of name, newest, blocks or size
+
+        Returns:
+            Matching metadata
+        """
+        return self.get_index(self.get_folder(player_uuid, shared)).search(search, sort_by)
+
     def delete_blueprint(self, player_uuid: str, name: str, from_shared: bool = False) -> bool:
         """Delete blueprint file.
 
@@ -196,18 +1173,137 @@ class BlueprintManager:
             True if deleted successfully
         """
         try:
-            if from_shared:
-                folder = self.shared_folder
-            else:
-                folder = self.get_personal_folder(player_uuid)
+            folder = self.get_folder(player_uuid, from_shared)
 
-            file_path = folder / f"{name}.json"
-
-            if file_path.exists():
-                file_path.unlink()
-                return True
-            return False
+            deleted = False
+            for extension in (BLUEPRINT_EXTENSION, LEGACY_EXTENSION):
+                file_path = folder / f"{name}{extension}"
+                self._uncache(str(file_path))
+                if file_path.exists():
+                    file_path.unlink()
+                    deleted = True
+            self.get_index(folder).remove(name)
+            return deleted
         except Exception as e:
             print(f"[WorldEdit] Error deleting blueprint: {e}")
             return False
 
+    def share_blueprint(self, player_uuid: str, name: str) -> bool:
+        """Publish a personal blueprint to the shared folder.
+
+        Only the manifest is copied; the shared blueprint references the same
+        stored sections as the personal one.
+
+        Args:
+            player_uuid: Player UUID
+            name: Blueprint name
+
+        Returns:
+            True if shared successfully
+        """
+        try:
+            folder = self.get_personal_folder(player_uuid)
+            header = self._read_history_header(folder, name)
+            if header is None:
+                return False
+            del header["version"]
+
+            shared_path = self.shared_folder / f"{name}{BLUEPRINT_EXTENSION}"
+            write_manifest(shared_path, header)
+            self._uncache(str(shared_path))
+
+            metadata = BlueprintMetadata.from_dict(header["metadata"])
+            metadata.file_size = shared_path.stat().st_size
+            self.get_index(self.shared_folder).put(metadata)
+            return True
+        except Exception as e:
+            print(f"[WorldEdit] Error sharing blueprint: {e}")
+            return False
+
+    def _blueprint_folders(self) -> List[Path]:
+        """Get the shared folder and every personal folder."""
+        folders = [self.shared_folder]
+        personal_root = self.blueprint_folder / "personal"
+        if personal_root.is_dir():
+            folders.extend(path for path in personal_root.iterdir() if path.is_dir())
+        return folders
+
+    def collect_garbage(self) -> int:
+        """Remove stored sections no blueprint manifest references.
+
+        Safe to run in a background thread (see ChunkStore.collect_garbage).
+
+        Returns:
+            Number of chunks removed
+        """
+        referenced = set()
+        for folder in self._blueprint_folders():
+            for path in folder.glob(f"*{BLUEPRINT_EXTENSION}"):
+                try:
+                    with open(path, "rb") as f:
+                        header = read_blueprint_header(f)
+                except Exception as e:
+                    # An unreadable manifest might still reference anything; keep everything
+                    print(f"[WorldEdit] Skipping chunk cleanup, cannot read '{path}': {e}")
+                    return 0
+                for entry in header_versions(header):
+                    referenced.update(section[3] for section in entry.get("sections", []))
+                    if "delta" in entry:
+                        referenced.add(entry["delta"])
+        return self.store.collect_garbage(referenced)
+
+    def migrate_legacy_blueprints(self) -> int:
+        """Convert every legacy .json blueprint to the binary format.
+
+        Safe to run in a background thread: block states are copied as plain
+        data (block data values are created on the main thread at load time),
+        a blueprint already saved in the binary format is never overwritten,
+        and the legacy file is removed only after its replacement exists.
+
+        Returns:
+            Number of blueprints migrated
+        """
+        migrated = 0
+        for folder in self._blueprint_folders():
+            for legacy_path in folder.glob(f"*{LEGACY_EXTENSION}"):
+                file_path = legacy_path.with_suffix(BLUEPRINT_EXTENSION)
+                if file_path.exists():
+                    continue
+                try:
+                    blueprint = self._read_legacy(legacy_path)
+                    write_blueprint_file(file_path, blueprint, self.store, overwrite=False)
+                    legacy_path.unlink()
+                    migrated += 1
+                except FileExistsError:
+                    # Saved from the main thread while this one was being converted
+                    continue
+                except Exception as e:
+                    print(f"[WorldEdit] Error migrating blueprint '{legacy_path}': {e}")
+        return migrated
+
+    def _read_legacy(
+        self,
+        file_path: Path,
+        block_data_factory: Optional[Callable[[str, Dict[str, Any]], Any]] = None
+    ) -> Blueprint:
+        """Read a legacy JSON blueprint, normalizing its clipboard entries.
+
+        Block states stay plain dictionaries unless block_data_factory is
+        given, which must then be called on the main thread.
+        """
+        with open(file_path, "r") as f:
+            data = json.load(f)
+
+        blueprint = Blueprint.from_dict(data)
+        clipboard = []
+        for entry in blueprint.clipboard_data or []:
+            entry = tuple(entry)
+            if len(entry) > 4:
+                states = entry[4] if isinstance(entry[4], dict) else None
+                data_value = states or None
+                if states and block_data_factory:
+                    data_value = block_data_factory(entry[3], states)
+                entry = entry[:4] + (data_value,)
+            clipboard.append(entry)
+        blueprint.clipboard_data = clipboard
+        return blueprint
@@ -3,9 +3,14 @@ Build Area Management System
 Manages designated build zones where builders can use WorldEdit commands
 """
 import json
+import math
 import os
+import threading
 from typing import Dict, List, Tuple, Optional
 
+from .persistence import DebouncedJsonWriter
+from .spatial_index import ChunkGridIndex
+
 
 class BuildArea:
     """Represents a cuboid build area with permissions"""
@@ -92,10 +97,29 @@ class BuildArea:
 class BuildAreaManager:
     """Manages all build areas"""
     
-    def __init__(self, config_path: str = "plugins/WorldEdit/build_areas.json"):
+    def __init__(self, config_path: str = "plugins/WorldEdit/build_areas.json", save_delay: float = 2.0):
         self.config_path = config_path
         self.areas: Dict[str, BuildArea] = {}
+        # Guards areas and builder lists against the background writer's snapshot
+        self._lock = threading.RLock()
+        self.writer = DebouncedJsonWriter(config_path, self._snapshot, delay=save_delay)
+        self.index = ChunkGridIndex()
+        # Bumped on every change to areas or builders so cached lookups can be invalidated
+        self.generation = 0
         self.load_areas()
+
+    def _rebuild_index(self):
+        """Re-register every area in the spatial index"""
+        self.generation += 1
+        self.index.clear()
+        for area in self.areas.values():
+            self._index_area(area)
+
+    def _index_area(self, area: BuildArea):
+        """Register an area in the spatial index"""
+        self.index.insert(area.name, area.world,
+                          (area.min_x, area.min_y, area.min_z),
+                          (area.max_x, area.max_y, area.max_z))
     
     def load_areas(self):
         """Load build areas from JSON file"""
@@ -103,37 +127,60 @@ class BuildAreaManager:
             try:
                 with open(self.config_path, 'r') as f:
                     data = json.load(f)
-                    self.areas = {
+                    areas = {
                         name: BuildArea.from_dict(area_data)
                         for name, area_data in data.items()
                     }
             except Exception as e:
                 print(f"[WorldEdit] Error loading build areas: {e}")
-                self.areas = {}
+                areas = {}
+            with self._lock:
+                self.areas = areas
         else:
-            self.areas = {}
+            with self._lock:
+                self.areas = {}
             self.save_areas()
-    
+        self._rebuild_index()
+
+    def _snapshot(self) -> dict:
+        """Copy build areas into JSON-ready data (called from the writer thread)"""
+        with self._lock:
+            return {
+                name: dict(area.to_dict(), builders=list(area.builders))
+                for name, area in self.areas.items()
+            }
+
     def save_areas(self):
-        """Save build areas to JSON file"""
-        os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-        with open(self.config_path, 'w') as f:
-            data = {name: area.to_dict() for name, area in self.areas.items()}
-            json.dump(data, f, indent=4)
+        """Schedule a write of the build areas file.
+
+        Changes made within the save delay are coalesced into one write, done
+        on a background thread; call flush() to write immediately.
+        """
+        self.writer.schedule()
+
+    def flush(self):
+        """Write any unsaved build area changes now"""
+        self.writer.flush()
     
     def create_area(self, name: str, world: str, pos1: Tuple[int, int, int], 
                     pos2: Tuple[int, int, int], creative_mode: bool = True) -> bool:
         """Create a new build area"""
         if name in self.areas:
             return False
-        self.areas[name] = BuildArea(name, world, pos1, pos2, creative_mode=creative_mode)
+        with self._lock:
+            self.areas[name] = BuildArea(name, world, pos1, pos2, creative_mode=creative_mode)
+        self._index_area(self.areas[name])
+        self.generation += 1
         self.save_areas()
         return True
     
     def delete_area(self, name: str) -> bool:
         """Delete a build area"""
         if name in self.areas:
-            del self.areas[name]
+            with self._lock:
+                del self.areas[name]
+            self.index.remove(name)
+            self.generation += 1
             self.save_areas()
             return True
         return False
@@ -144,8 +191,16 @@ class BuildAreaManager:
 
     def get_areas_at_location(self, world: str, x: float, y: float, z: float) -> List[BuildArea]:
         """Get all build areas containing a specific location"""
-        return [area for area in self.areas.values()
-                if area.world == world and area.contains_point(x, y, z)]
+        return [self.areas[name] for name in self.index.query_point(world, x, y, z)]
+
+    def get_areas_in_column(self, world: str, x: float, z: float) -> List[BuildArea]:
+        """Get all build areas overlapping the chunk column of a location"""
+        return [self.areas[name] for name in self.index.query_column(world, x, z)]
+
+    def get_areas_in_box(self, world: str, min_pos: Tuple[float, float, float],
+                         max_pos: Tuple[float, float, float]) -> List[BuildArea]:
+        """Get all build areas intersecting a box (inclusive corners)"""
+        return [self.areas[name] for name in self.index.query_box(world, min_pos, max_pos)]
 
     def get_player_areas(self, player_name: str, world: str = None) -> List[BuildArea]:
         """Get all build areas where a player is authorized"""
@@ -169,7 +224,9 @@ class BuildAreaManager:
         """Add a builder to a build area"""
         area = self.get_area(area_name)
         if area:
-            area.add_builder(player_name)
+            with self._lock:
+                area.add_builder(player_name)
+            self.generation += 1
             self.save_areas()
             return True
         return False
@@ -178,7 +235,9 @@ class BuildAreaManager:
         """Remove a builder from a build area"""
         area = self.get_area(area_name)
         if area:
-            area.remove_builder(player_name)
+            with self._lock:
+                area.remove_builder(player_name)
+            self.generation += 1
             self.save_areas()
             return True
         return False
@@ -190,3 +249,50 @@ class BuildAreaManager:
             areas = [area for area in areas if area.world == world]
         return areas
 
+
+
+class AreaPresenceTracker:
+    """Tracks which authorized build areas each player stands in.
+
+    Stationary players are skipped outright, and players moving within a
+    chunk column only re-test the few areas overlapping it; the area index
+    is queried again only on a column crossing or a change to the areas.
+    """
+
+    def __init__(self, manager: BuildAreaManager):
+        self.manager = manager
+        # player id -> (generation, world, column, position, candidate areas, current area names)
+        self._players: Dict[object, tuple] = {}
+
+    def update(self, player_id, player_name: str, world: str,
+               x: float, y: float, z: float) -> Optional[List[BuildArea]]:
+        """Update a player's position.
+
+        Returns the authorized areas containing the player, or None if they
+        are the same as on the previous update.
+        """
+        manager = self.manager
+        position = (x, y, z)
+        column = (math.floor(x) >> ChunkGridIndex.CHUNK_SHIFT, math.floor(z) >> ChunkGridIndex.CHUNK_SHIFT)
+        state = self._players.get(player_id)
+
+        if state is not None and state[0] == manager.generation and state[1] == world:
+            if state[3] == position:
+                return None
+            candidates = state[4] if state[2] == column else None
+        else:
+            candidates = None
+
+        if candidates is None:
+            candidates = [area for area in manager.get_areas_in_column(world, x, z)
+                          if area.has_builder(player_name)]
+
+        areas = [area for area in candidates if area.contains_point(x, y, z)]
+        names = tuple(area.name for area in areas)
+        unchanged = state is not None and state[5] == names
+        self._players[player_id] = (manager.generation, world, column, position, candidates, names)
+        return None if unchanged else areas
+
+    def forget(self, player_id):
+        """Drop the cached state of a player (e.g. when they leave)"""
+        self._players.pop(player_id, None)
@@ -1,10 +1,13 @@
 """Menu handlers for WorldEdit Builder Menu."""
 
+import math
 from typing import TYPE_CHECKING, Optional
 from endstone.form import ActionForm, MessageForm, ModalForm, TextInput, Toggle, Dropdown
 from endstone.inventory import ItemStack
 
 from .ui_components import UIBuilder
+from .utils import queue_placement
+from .block_categories import block_categories
 
 if TYPE_CHECKING:
     from endstone.player import Player
@@ -14,6 +17,9 @@ if TYPE_CHECKING:
 class MenuHandler:
     """Handles UI menu interactions."""
 
+    # Catalog entries offered in a schematic dropdown; the rest are reached by searching
+    MAX_SCHEMATIC_OPTIONS = 50
+
     def __init__(self, plugin: "WorldEditPlugin"):
         """Initialize menu handler.
 
@@ -890,15 +896,16 @@ class MenuHandler:
         form.on_submit = on_submit
         player.send_form(form)
 
-    def show_quick_load_form(self, player: "Player") -> None:
+    def show_quick_load_form(self, player: "Player", search: Optional[str] = None) -> None:
         """Show quick load form (load to clipboard only).
 
         Args:
             player: Player to show menu to
+            search: Text to filter the schematic list by
         """
         form = ModalForm()
         form.title = "§l§aQuick Load§r"
-        form.add_control(TextInput("Filename:", "Without .schem extension", "my_build"))
+        entries = self.add_schematic_picker(player, form, search)
 
         def on_submit(player: "Player", data: Optional[str]):
             if data is None:
@@ -908,11 +915,15 @@ class MenuHandler:
             import json
             values = json.loads(data)
 
-            if not values[0]:
+            try:
+                filename = self.resolve_schematic_choice(player, values, entries, self.show_quick_load_form)
+            except IndexError:
+                player.send_message("§cInvalid schematic selection!§r")
                 self.show_schematic_menu(player)
                 return
+            if filename is None:
+                return
 
-            filename = values[0].strip()
             # Load to clipboard using direct handler call
             self.plugin.logger.info(f"[BUILDER MENU DEBUG] Quick Load - Calling schem handler with args: ['load', '{filename}', '-c']")
             from endstone_worldedit.commands.schem import handler as schem_handler
@@ -922,17 +933,18 @@ class MenuHandler:
         form.on_submit = on_submit
         player.send_form(form)
 
-    def show_load_and_place_form(self, player: "Player") -> None:
+    def show_load_and_place_form(self, player: "Player", search: Optional[str] = None) -> None:
         """Show load and place form with full control.
 
         Args:
             player: Player to show menu to
+            search: Text to filter the schematic list by
         """
         form = ModalForm()
         form.title = "§l§bLoad & Place Schematic§r"
 
-        # Filename
-        form.add_control(TextInput("Filename:", "Without .schem extension", "my_build"))
+        # Schematic
+        entries = self.add_schematic_picker(player, form, search)
 
         # Rotation
         form.add_control(Dropdown("Rotation:", ["0° (No rotation)", "90° (Clockwise)", "180°", "270° (Counter-clockwise)"], 0))
@@ -963,30 +975,28 @@ class MenuHandler:
             import json
             values = json.loads(data)
 
-            if not values[0]:
-                self.show_schematic_menu(player)
-                return
-
             try:
-                # Parse filename
-                filename = values[0].strip()
+                # Parse schematic selection (removes its values from the list)
+                filename = self.resolve_schematic_choice(player, values, entries, self.show_load_and_place_form)
+                if filename is None:
+                    return
 
                 # Parse rotation
-                rotation = values[1] if len(values) > 1 else 0
+                rotation = values[0] if len(values) > 0 else 0
                 rotation_degrees = [0, 90, 180, 270][rotation]
 
                 # Parse flips
-                flip_x = values[2] if len(values) > 2 else False
-                flip_y = values[3] if len(values) > 3 else False
-                flip_z = values[4] if len(values) > 4 else False
+                flip_x = values[1] if len(values) > 1 else False
+                flip_y = values[2] if len(values) > 2 else False
+                flip_z = values[3] if len(values) > 3 else False
 
                 # Parse placement position
-                placement = values[5] if len(values) > 5 else 0
+                placement = values[4] if len(values) > 4 else 0
 
                 # Parse custom offsets
-                custom_x = int(values[6]) if len(values) > 6 and values[6] else 0
-                custom_y = int(values[7]) if len(values) > 7 and values[7] else 0
-                custom_z = int(values[8]) if len(values) > 8 and values[8] else 0
+                custom_x = int(values[5]) if len(values) > 5 and values[5] else 0
+                custom_y = int(values[6]) if len(values) > 6 and values[6] else 0
+                custom_z = int(values[7]) if len(values) > 7 and values[7] else 0
 
                 # Calculate offset based on placement choice
                 offset_x, offset_y, offset_z = 0, 0, 0
@@ -1004,9 +1014,9 @@ class MenuHandler:
                     offset_z = custom_z
 
                 # Parse additional options
-                include_air = values[9] if len(values) > 9 else True
-                paste_entities = values[10] if len(values) > 10 else True
-                paste_biomes = values[11] if len(values) > 11 else False
+                include_air = values[8] if len(values) > 8 else True
+                paste_entities = values[9] if len(values) > 9 else True
+                paste_biomes = values[10] if len(values) > 10 else False
 
                 # First, load the schematic to clipboard using direct handler call
                 self.plugin.logger.info(f"[BUILDER MENU DEBUG] Load & Place - Calling schem handler with args: ['load', '{filename}', '-c']")
@@ -1057,6 +1067,78 @@ class MenuHandler:
         form.on_submit = on_submit
         player.send_form(form)
 
+    def add_schematic_picker(self, player: "Player", form: "ModalForm", search: Optional[str]) -> list:
+        """Add the filename input and, if the catalog has matches, a schematic dropdown to a form.
+
+        Args:
+            player: Player the form is for
+            form: Form to add the controls to
+            search: Text to filter the dropdown by (also prefills the input)
+
+        Returns:
+            Catalog entries offered in the dropdown; empty if no dropdown was added
+        """
+        catalog = self.plugin.schematic_catalog
+        matches = catalog.list_entries(search=search)
+        entries = matches[:self.MAX_SCHEMATIC_OPTIONS]
+        form.add_control(TextInput("Filename or search:", "Without .schem extension", search or ""))
+        if entries:
+            label = "Or pick a schematic:"
+            if len(matches) > len(entries):
+                label = f"Or pick a schematic (first {len(entries)} of {len(matches)}, type to search):"
+            options = ["(use filename above)"] + [self.format_schematic_option(e) for e in entries]
+            form.add_control(Dropdown(label, options, 0))
+        elif catalog.refreshing:
+            player.send_message("§7Schematic list is still indexing; type a filename instead.§r")
+        return entries
+
+    def resolve_schematic_choice(self, player: "Player", values: list, entries: list, reshow) -> Optional[str]:
+        """Get the schematic chosen in a form built with add_schematic_picker.
+
+        A picked dropdown entry wins over the typed text. Text naming a
+        schematic exactly, or matching none in the catalog, is used as the
+        filename; text matching several is treated as a search and the form
+        is shown again with the dropdown filtered by it.
+
+        Args:
+            player: Player who submitted the form
+            values: Submitted form values; the picker's values are removed from the front
+            entries: Entries returned by add_schematic_picker
+            reshow: Called with (player, search) to show the form again
+
+        Returns:
+            Filename to load, or None if another form was shown instead
+
+        Raises:
+            IndexError: If the dropdown index is out of range
+        """
+        text = str(values.pop(0) if values else "").strip()
+        choice = values.pop(0) if entries and values else 0
+        if choice:
+            return entries[choice - 1].name
+        if not text:
+            player.send_message("§cEnter a filename or pick a schematic!§r")
+            self.show_schematic_menu(player)
+            return None
+
+        matches = self.plugin.schematic_catalog.list_entries(search=text)
+        if matches and all(entry.name != text for entry in matches):
+            reshow(player, text)
+            return None
+        return text
+
+    @staticmethod
+    def format_schematic_option(entry) -> str:
+        """Format a catalog entry as a dropdown option.
+
+        Args:
+            entry: Schematic catalog entry
+
+        Returns:
+            Option label with dimensions and block count
+        """
+        return f"{entry.name} ({entry.width}x{entry.height}x{entry.length}, {entry.block_count:,} blocks)"
+
     def show_build_areas_menu(self, player: "Player") -> None:
         """Show build areas menu.
 
@@ -1373,7 +1455,7 @@ class MenuHandler:
                 transformed_blocks = []
                 for relative_x, relative_y, relative_z, block_type, data_value in copied_blocks:
                     # Skip air if not including air
-                    if not include_air and block_type == "minecraft:air":
+                    if not include_air and block_categories.is_air(block_type):
                         continue
 
                     # Normalize to 0-based coordinates
@@ -1411,31 +1493,11 @@ class MenuHandler:
 
                     transformed_blocks.append((target_x, target_y, target_z, block_type, data_value))
 
-                # Prepare undo
-                undo_entry = []
-                self.plugin.redo_history[player_uuid] = []
-
-                # Store undo history
-                for x, y, z, _, _ in transformed_blocks:
-                    block = dimension.get_block_at(x, y, z)
-                    undo_entry.append((x, y, z, block.type, block.data))
-
-                if player_uuid not in self.plugin.undo_history:
-                    self.plugin.undo_history[player_uuid] = []
-                self.plugin.undo_history[player_uuid].append(undo_entry)
-
-                # Place blocks
+                # Place in dependency order; undo is recorded as blocks are placed
                 affected_blocks = len(transformed_blocks)
-                if affected_blocks > self.plugin.plugin_config["async-threshold"]:
-                    self.plugin.tasks[player_uuid] = {"dimension": dimension, "blocks": transformed_blocks}
+                if queue_placement(self.plugin, player_uuid, dimension, transformed_blocks, affected_blocks,
+                                   "§aPasted {count} blocks§r"):
                     player.send_message(f"§aStarting async paste operation for {affected_blocks} blocks...§r")
-                else:
-                    for x, y, z, block_type, data_value in transformed_blocks:
-                        block = dimension.get_block_at(x, y, z)
-                        block.set_type(block_type)
-                        if data_value is not None:
-                            block.set_data(data_value)
-                    player.send_message(f"§aPasted {affected_blocks} blocks§r")
 
                 # Show transformation info
                 if rotation_degrees > 0 or flip_x or flip_y or flip_z or offset_x != 0 or offset_y != 0 or offset_z != 0:
@@ -2052,20 +2114,17 @@ class MenuHandler:
             return
 
         location = player.location
-        center_x, center_y, center_z = int(location.x), int(location.y), int(location.z)
+        center_x, center_y, center_z = math.floor(location.x), math.floor(location.y), math.floor(location.z)
         dimension = player.dimension.name
 
-        # Create zone using build area manager
-        min_x, min_y, min_z = center_x - radius, center_y - radius, center_z - radius
-        max_x, max_y, max_z = center_x + radius, center_y + radius, center_z + radius
-
-        self.plugin.build_area_manager.create_area(
+        zone = self.plugin.zone_manager.create_zone_at_location(
             name,
+            player.name,
+            (center_x, center_y, center_z),
             dimension,
-            min_x, min_y, min_z,
-            max_x, max_y, max_z,
-            [player.name]
+            radius,
+            duration_hours=duration
         )
 
-        player.send_message(f"§aCreated builder zone '{name}' (radius: {radius})§r")
+        player.send_message(f"§aCreated builder zone '{zone.name}' (radius: {radius}, expires in {duration:g}h)§r")
 
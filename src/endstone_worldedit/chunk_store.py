@@ -0,0 +1,99 @@
+"""
+Content-addressed chunk store for WorldEdit.
+Chunks are immutable byte strings stored once under their SHA-256 digest, so
+identical regions saved by different blueprints share a single file on disk.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Set
+
+
+class ChunkStore:
+    """Stores byte chunks on disk keyed by their SHA-256 digest."""
+
+    EXTENSION = ".chunk"
+
+    def __init__(self, root: str):
+        """Initialize chunk store.
+
+        Args:
+            root: Store directory
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        """Get the file path of a chunk (fanned out by digest prefix)."""
+        return self.root / digest[:2] / f"{digest}{self.EXTENSION}"
+
+    def put(self, data: bytes) -> str:
+        """Store a chunk unless an identical one already exists.
+
+        Args:
+            data: Chunk bytes
+
+        Returns:
+            Hex digest identifying the chunk
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            # Refresh the timestamp so garbage collection treats it as recently used
+            os.utime(path)
+            return digest
+
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Read a chunk.
+
+        Args:
+            digest: Chunk digest
+
+        Returns:
+            Chunk bytes
+
+        Raises:
+            FileNotFoundError: If the chunk is missing
+        """
+        with open(self._path(digest), "rb") as f:
+            return f.read()
+
+    def has(self, digest: str) -> bool:
+        """Check whether a chunk is stored."""
+        return self._path(digest).exists()
+
+    def collect_garbage(self, referenced: Iterable[str], grace_seconds: float = 3600) -> int:
+        """Delete chunks no manifest references any more.
+
+        Chunks touched within the grace period are kept, so a save that has
+        stored its chunks but not yet written its manifest is never broken.
+
+        Args:
+            referenced: Digests still in use
+            grace_seconds: Minimum age of a chunk before it can be removed
+
+        Returns:
+            Number of chunks removed
+        """
+        keep: Set[str] = set(referenced)
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        for path in self.root.glob(f"*/*{self.EXTENSION}"):
+            if path.stem in keep:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        return removed
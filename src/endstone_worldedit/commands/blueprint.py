@@ -1,15 +1,18 @@
 """Blueprint management commands for WorldEdit."""
 from endstone_worldedit.utils import command_executor
+from endstone_worldedit.blueprints import BlueprintIndex
 
 command = {
     "blueprint": {
         "description": "Manage blueprints (personal clipboard saves).",
         "usages": [
-            "/blueprint save <name>",
-            "/blueprint load <name>",
-            "/blueprint list",
+            "/blueprint save <name> [tags]",
+            "/blueprint load <name> [version]",
+            "/blueprint history <name>",
+            "/blueprint list [search] [page]",
             "/blueprint delete <name>",
-            "/blueprint shared list",
+            "/blueprint share <name>",
+            "/blueprint shared list [search] [page]",
             "/blueprint shared load <name>"
         ],
         "aliases": ["bp"],
@@ -17,6 +20,37 @@ command = {
     }
 }
 
+def _parse_list_args(args):
+    """Split list arguments into (search, page)."""
+    search, page = None, 1
+    for arg in args:
+        if arg.isdigit():
+            page = int(arg)
+        else:
+            search = arg
+    return search, page
+
+
+def _send_listing(sender, entries, search, page, title, next_command):
+    """Send one page of blueprint metadata."""
+    page_entries, page, total_pages = BlueprintIndex.paginate(entries, page)
+    header = f"§6{title} §7({len(entries)} total, page {page}/{total_pages})"
+    if search:
+        header += f" §7matching '{search}'"
+    sender.send_message(header + "§r")
+    for meta in page_entries:
+        width, height, length = meta.dimensions
+        line = f"  §e- {meta.name} §7{width}x{height}x{length}, {meta.block_count:,} blocks"
+        if meta.author:
+            line += f", by {meta.author}"
+        if meta.tags:
+            line += f" [{', '.join(meta.tags)}]"
+        sender.send_message(line + "§r")
+    if page < total_pages:
+        next_args = f"{search} {page + 1}" if search else f"{page + 1}"
+        sender.send_message(f"§7Use {next_command} {next_args} for the next page§r")
+
+
 @command_executor("blueprint", area_check=False)
 def handler(plugin, sender, args):
     """Handle blueprint commands.
@@ -30,7 +64,7 @@ def handler(plugin, sender, args):
         True if command was handled
     """
     if len(args) < 1:
-        sender.send_message("§cUsage: /blueprint <save|load|list|delete|shared> [name]§r")
+        sender.send_message("§cUsage: /blueprint <save|load|list|history|delete|share|shared> [name]§r")
         return False
 
     sub_command = args[0].lower()
@@ -39,10 +73,11 @@ def handler(plugin, sender, args):
 
     if sub_command == "save":
         if len(args) < 2:
-            sender.send_message("§cUsage: /blueprint save <name>§r")
+            sender.send_message("§cUsage: /blueprint save <name> [tags]§r")
             return False
 
         name = args[1]
+        tags = [tag.strip() for tag in ",".join(args[2:]).split(",") if tag.strip()]
 
         # Check if player has clipboard
         if player_uuid not in plugin.clipboard or not plugin.clipboard[player_uuid]:
@@ -56,12 +91,18 @@ def handler(plugin, sender, args):
             name,
             clipboard_data,
             author=player_name,
-            shared=False
+            shared=False,
+            tags=tags
         )
 
         if success:
-            sender.send_message(f"§aBlueprint '{name}' saved!§r")
-            sender.send_message(f"§7Use /blueprint load {name} to load it§r")
+            metadata = plugin.blueprint_manager.get_metadata(player_uuid, name)
+            if metadata is not None and metadata.version > 1:
+                sender.send_message(f"§aBlueprint '{name}' saved as version {metadata.version}!§r")
+                sender.send_message(f"§7Use /blueprint history {name} to see earlier versions§r")
+            else:
+                sender.send_message(f"§aBlueprint '{name}' saved!§r")
+                sender.send_message(f"§7Use /blueprint load {name} to load it§r")
         else:
             sender.send_message(f"§cFailed to save blueprint '{name}'§r")
 
@@ -69,15 +110,26 @@ def handler(plugin, sender, args):
 
     elif sub_command == "load":
         if len(args) < 2:
-            sender.send_message("§cUsage: /blueprint load <name>§r")
+            sender.send_message("§cUsage: /blueprint load <name> [version]§r")
             return False
 
         name = args[1]
+        version = None
+        if len(args) > 2:
+            try:
+                version = int(args[2].lstrip("vV"))
+            except ValueError:
+                sender.send_message(f"§cInvalid version: {args[2]}§r")
+                return False
 
         # Load blueprint
-        blueprint = plugin.blueprint_manager.load_blueprint(player_uuid, name, from_shared=False)
+        blueprint = plugin.blueprint_manager.load_blueprint(player_uuid, name, from_shared=False, version=version)
 
         if blueprint is None:
+            if version is not None:
+                sender.send_message(f"§cBlueprint '{name}' has no version {version}!§r")
+                sender.send_message(f"§7Use /blueprint history {name} to see its versions§r")
+                return False
             sender.send_message(f"§cBlueprint '{name}' not found!§r")
             sender.send_message(f"§7Use /blueprint list to see available blueprints§r")
             return False
@@ -85,27 +137,57 @@ def handler(plugin, sender, args):
         # Load into clipboard
         plugin.clipboard[player_uuid] = blueprint.clipboard_data
 
-        sender.send_message(f"§aBlueprint '{name}' loaded into clipboard!§r")
+        if version is not None:
+            sender.send_message(f"§aBlueprint '{name}' version {version} loaded into clipboard!§r")
+        else:
+            sender.send_message(f"§aBlueprint '{name}' loaded into clipboard!§r")
         sender.send_message(f"§7Author: {blueprint.author}§r")
         sender.send_message(f"§7Use /paste to place it§r")
 
         return True
 
     elif sub_command == "list":
-        blueprints = plugin.blueprint_manager.list_blueprints(player_uuid, include_shared=False)
+        search, page = _parse_list_args(args[1:])
+        blueprints = plugin.blueprint_manager.list_metadata(player_uuid, shared=False, search=search)
 
         if not blueprints:
+            if search:
+                sender.send_message(f"§7No blueprints matching '{search}'.§r")
+                return True
             sender.send_message("§7You don't have any saved blueprints.§r")
             sender.send_message("§7Use /blueprint save <name> to save your clipboard§r")
             return True
 
-        sender.send_message(f"§6Your Blueprints §7({len(blueprints)} total)§6:§r")
-        for bp_name in blueprints:
-            sender.send_message(f"  §e- {bp_name}§r")
+        _send_listing(sender, blueprints, search, page, "Your Blueprints", "/blueprint list")
         sender.send_message(f"§7Use /blueprint load <name> to load a blueprint§r")
 
         return True
 
+    elif sub_command == "history":
+        if len(args) < 2:
+            sender.send_message("§cUsage: /blueprint history <name>§r")
+            return False
+
+        name = args[1]
+        history = plugin.blueprint_manager.blueprint_history(player_uuid, name)
+
+        if history is None:
+            sender.send_message(f"§cBlueprint '{name}' not found!§r")
+            return False
+
+        sender.send_message(f"§6Versions of '{name}' §7({len(history)} stored)§r")
+        for entry in reversed(history):
+            width, height, length = entry["dimensions"]
+            line = f"  §ev{entry['version']} §7{entry['createdAt'][:16].replace('T', ' ')}, {width}x{height}x{length}, {entry['blockCount']:,} blocks"
+            if entry.get("author"):
+                line += f", by {entry['author']}"
+            if "changes" in entry:
+                line += f" §8({entry['changes']:,} changes)"
+            sender.send_message(line + "§r")
+        sender.send_message(f"§7Use /blueprint load {name} <version> to load an earlier version§r")
+
+        return True
+
     elif sub_command == "delete":
         if len(args) < 2:
             sender.send_message("§cUsage: /blueprint delete <name>§r")
@@ -123,6 +205,24 @@ def handler(plugin, sender, args):
 
         return True
 
+    elif sub_command == "share":
+        if len(args) < 2:
+            sender.send_message("§cUsage: /blueprint share <name>§r")
+            return False
+
+        name = args[1]
+
+        # Publish to the shared folder (the stored blocks are not copied)
+        success = plugin.blueprint_manager.share_blueprint(player_uuid, name)
+
+        if success:
+            sender.send_message(f"§aBlueprint '{name}' shared!§r")
+            sender.send_message(f"§7Others can use /blueprint shared load {name}§r")
+        else:
+            sender.send_message(f"§cBlueprint '{name}' not found!§r")
+
+        return True
+
     elif sub_command == "shared":
         if len(args) < 2:
             sender.send_message("§cUsage: /blueprint shared <list|load> [name]§r")
@@ -131,17 +231,14 @@ def handler(plugin, sender, args):
         shared_sub = args[1].lower()
 
         if shared_sub == "list":
-            blueprints = plugin.blueprint_manager.list_blueprints(player_uuid, include_shared=True)
-            shared_blueprints = [bp for bp in blueprints if bp.startswith("[Shared]")]
+            search, page = _parse_list_args(args[2:])
+            shared_blueprints = plugin.blueprint_manager.list_metadata(player_uuid, shared=True, search=search)
 
             if not shared_blueprints:
                 sender.send_message("§7No shared blueprints available.§r")
                 return True
 
-            sender.send_message(f"§6Shared Blueprints §7({len(shared_blueprints)} total)§6:§r")
-            for bp_name in shared_blueprints:
-                clean_name = bp_name.replace("[Shared] ", "")
-                sender.send_message(f"  §e- {clean_name}§r")
+            _send_listing(sender, shared_blueprints, search, page, "Shared Blueprints", "/blueprint shared list")
             sender.send_message(f"§7Use /blueprint shared load <name> to load§r")
 
             return True
@@ -170,6 +267,6 @@ def handler(plugin, sender, args):
             return True
 
     sender.send_message(f"§cUnknown sub-command '{sub_command}'§r")
-    sender.send_message("§7Use: save, load, list, delete, or shared§r")
+    sender.send_message("§7Use: save, load, list, history, delete, share, or shared§r")
     return False
 
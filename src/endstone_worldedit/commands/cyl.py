@@ -1,5 +1,5 @@
 import math
-from endstone_worldedit.utils import command_executor
+from endstone_worldedit.utils import command_executor, queue_placement
 
 command = {
     "cyl": {
@@ -26,9 +26,6 @@ def handler(plugin, sender, args):
     dimension = sender.dimension
     center = sender.location
 
-    undo_entry = []
-    plugin.redo_history[player_uuid] = []
-
     blocks_to_change = []
     for y in range(int(center.y), int(center.y) + height):
         for x in range(int(center.x) - radius, int(center.x) + radius + 1):
@@ -38,23 +35,9 @@ def handler(plugin, sender, args):
 
     affected_blocks = len(blocks_to_change)
 
-    for x, y, z, _, _ in blocks_to_change:
-        block = dimension.get_block_at(x, y, z)
-        undo_entry.append((x, y, z, block.type, block.data))
-
-    if player_uuid not in plugin.undo_history:
-        plugin.undo_history[player_uuid] = []
-    plugin.undo_history[player_uuid].append(undo_entry)
-
-    if affected_blocks > plugin.plugin_config["async-threshold"]:
-        plugin.tasks[player_uuid] = {"dimension": dimension, "blocks": blocks_to_change}
+    # Undo is recorded as blocks are placed; blocks outside the player's build areas are skipped
+    if queue_placement(plugin, player_uuid, dimension, blocks_to_change, affected_blocks,
+                       "Operation complete ({count} blocks affected)."):
         sender.send_message(f"Starting async operation for {affected_blocks} blocks...")
-    else:
-        for x, y, z, block_type, data_value in blocks_to_change:
-            block = dimension.get_block_at(x, y, z)
-            block.set_type(block_type)
-            if data_value is not None:
-                block.set_data(data_value)
-        sender.send_message(f"Operation complete ({affected_blocks} blocks affected).")
-        
+
     return True
@@ -1,5 +1,6 @@
-from endstone_worldedit.utils import command_executor
+from endstone_worldedit.utils import command_executor, queue_placement
 from endstone_worldedit.structure_utils import structure_load
+from endstone_worldedit.block_categories import block_categories
 
 command = {
     "paste": {
@@ -87,9 +88,6 @@ def handler(plugin, sender, args):
 
         i += 1
 
-    undo_entry = []
-    plugin.redo_history[player_uuid] = []  # Clear redo history on new action
-
     copied_blocks = plugin.clipboard[player_uuid]
 
     # Calculate dimensions of clipboard for rotation
@@ -112,7 +110,7 @@ def handler(plugin, sender, args):
     blocks_to_change = []
     for relative_x, relative_y, relative_z, block_type, data_value in copied_blocks:
         # Skip air blocks unless include_air is set
-        if not include_air and block_type == "minecraft:air":
+        if not include_air and block_categories.is_air(block_type):
             continue
 
         # Normalize to 0-based coordinates
@@ -159,32 +157,15 @@ def handler(plugin, sender, args):
         sender.send_message("§cNo blocks to paste§r")
         return False
 
-    # Store undo history first
-    for x, y, z, _, _ in blocks_to_change:
-        block = dimension.get_block_at(x, y, z)
-        undo_entry.append((x, y, z, block.type, block.data))
-
-    if player_uuid not in plugin.undo_history:
-        plugin.undo_history[player_uuid] = []
-    plugin.undo_history[player_uuid].append(undo_entry)
-
-    # Execute asynchronously if the task is large
-    if affected_blocks > plugin.plugin_config["async-threshold"]:
-        plugin.tasks[player_uuid] = {"dimension": dimension, "blocks": blocks_to_change}
+    # Supports first, then gravity blocks bottom-up, attachables and liquids; undo is recorded as blocks are placed
+    msg = "§aPaste complete ({count} blocks affected"
+    if rotation_degrees > 0:
+        msg += f", rotated {rotation_degrees}°"
+    msg += ")§r"
+    if queue_placement(plugin, player_uuid, dimension, blocks_to_change, affected_blocks, msg):
         msg = f"§aStarting async paste operation for {affected_blocks} blocks"
         if rotation_degrees > 0:
             msg += f" (rotated {rotation_degrees}°)"
         msg += "...§r"
         sender.send_message(msg)
-    else:
-        for x, y, z, block_type, data_value in blocks_to_change:
-            block = dimension.get_block_at(x, y, z)
-            block.set_type(block_type)
-            if data_value is not None:
-                block.set_data(data_value)
-        msg = f"§aPaste complete ({affected_blocks} blocks affected"
-        if rotation_degrees > 0:
-            msg += f", rotated {rotation_degrees}°"
-        msg += ")§r"
-        sender.send_message(msg)
     return True
@@ -1,32 +1,11 @@
+import itertools
 import os
-import nbtlib
-from nbtlib.tag import *
-from ..utils import command_executor, LEGACY_ID_TO_BEDROCK_NAME, translate_block_name
+from ..utils import command_executor, queue_placement, translate_block_name
 from ..structure_utils import structure_save, structure_load, structure_exists
-
-def read_varint(stream):
-    result = 0
-    shift = 0
-    while True:
-        byte = next(stream)
-        result |= (byte & 0x7F) << shift
-        if (byte & 0x80) == 0:
-            break
-        shift += 7
-    return result
-
-def write_varint(value):
-    """Encode an integer as a varint and return as bytes."""
-    result = bytearray()
-    while True:
-        byte = value & 0x7F
-        value >>= 7
-        if value != 0:
-            byte |= 0x80
-        result.append(byte)
-        if value == 0:
-            break
-    return bytes(result)
+from ..schematic_utils import FORMAT_SPONGE, translate_palette, read_schematic_header, save_schematic
+from ..schematic_catalog import SchematicEntry
+from ..schematic_capture import SchematicCapture
+from ..block_categories import CATEGORY_AIR, PLACEMENT_ORDER, block_categories
 
 command = {
     "schem": {
@@ -53,11 +32,33 @@ def handler(plugin, sender, args):
         if not os.path.exists(schematic_path):
             sender.send_message("Schematic directory not found.")
             return False
-        files = [f.replace('.schem', '') for f in os.listdir(schematic_path) if f.endswith('.schem')]
-        if not files:
+
+        # /schem list [search] [page]
+        search, page = None, 1
+        for arg in args[1:]:
+            if arg.isdigit():
+                page = int(arg)
+            else:
+                search = arg
+
+        entries = plugin.schematic_catalog.list_entries(search=search)
+        if not entries:
+            if plugin.schematic_catalog.refreshing:
+                sender.send_message("§7Indexing schematics, try again in a moment.§r")
+                return True
             sender.send_message("No schematics found.")
-        else:
-            sender.send_message("Available schematics: " + ", ".join(files))
+            return True
+
+        page_entries, page, total_pages = plugin.schematic_catalog.paginate(entries, page)
+        header = f"§6Schematics §7({len(entries)} total, page {page}/{total_pages})"
+        if search:
+            header += f" §7matching '{search}'"
+        sender.send_message(header + "§r")
+        for entry in page_entries:
+            sender.send_message(f"  {entry.get_summary()}")
+        if page < total_pages:
+            next_args = f"{search} {page + 1}" if search else f"{page + 1}"
+            sender.send_message(f"§7Use /schem list {next_args} for the next page§r")
         return True
 
     if sub_command == "save":
@@ -79,36 +80,16 @@ def handler(plugin, sender, args):
         min_y, max_y = min(pos1[1], pos2[1]), max(pos1[1], pos2[1])
         min_z, max_z = min(pos1[2], pos2[2]), max(pos1[2], pos2[2])
 
-        width, height, length = int(max_x - min_x + 1), int(max_y - min_y + 1), int(max_z - min_z + 1)
-
-        # Create a palette by finding all unique block types in the selection
-        all_blocks = [str(dimension.get_block_at(x, y, z).type) for y in range(min_y, max_y + 1) for z in range(min_z, max_z + 1) for x in range(min_x, max_x + 1)]
-        palette_map = {name: i for i, name in enumerate(sorted(list(set(all_blocks))))}
-
-        # Create BlockData array using varint encoding for palette indices
-        block_data = bytearray()
-        for block_name in all_blocks:
-            palette_index = palette_map[block_name]
-            block_data.extend(write_varint(palette_index))
-
-        nbt_palette = nbtlib.Compound({name: nbtlib.Int(index) for name, index in palette_map.items()})
-
-        schematic_nbt = nbtlib.File({
-            'Schematic': nbtlib.Compound({
-                'Width': nbtlib.Short(width), 'Height': nbtlib.Short(height), 'Length': nbtlib.Short(length),
-                'Palette': nbt_palette,
-                'BlockData': nbtlib.ByteArray(block_data),
-                'Entities': nbtlib.List[nbtlib.Compound]([]),
-                'TileEntities': nbtlib.List[nbtlib.Compound]([]),
-            })
-        })
-        
+        if player_uuid in plugin.capture_jobs:
+            sender.send_message("§cA schematic save is already in progress.§r")
+            return False
+
         file_path = os.path.join(schematic_path, f"{name}.schem")
-        schematic_nbt.save(file_path, gzipped=True)
-        sender.send_message(f"§aSchematic '{name}.schem' saved successfully!§r")
+        capture = SchematicCapture(dimension, (min_x, min_y, min_z), (max_x, max_y, max_z))
 
         # ALSO save as .mcstructure using /structure save command to preserve containers
         plugin.logger.info(f"[SCHEM SAVE] Also saving as .mcstructure to preserve containers...")
+        structure_success = False
         try:
             structure_success = structure_save(
                 plugin,
@@ -119,16 +100,51 @@ def handler(plugin, sender, args):
                 include_entities=True,
                 include_blocks=True
             )
+        except Exception as e:
+            plugin.logger.error(f"[SCHEM SAVE] Structure save error: {e}")
 
+        def on_written(file_size):
+            plugin.schematic_cache.invalidate(file_path)
+            # Record catalog metadata from what we just wrote instead of re-reading the file
+            plugin.schematic_catalog.record(SchematicEntry(
+                name=name,
+                width=capture.width,
+                height=capture.height,
+                length=capture.length,
+                block_count=capture.volume - capture.count("minecraft:air"),
+                palette_size=len(capture.palette),
+                format=FORMAT_SPONGE,
+                mcstructure=bool(structure_success)
+            ))
+
+            player = plugin.server.get_player(player_uuid)
+            if player is None:
+                return
+            player.send_message(f"§aSchematic '{name}.schem' saved successfully! §7({max(1, file_size // 1024)} KB)§r")
             if structure_success:
-                sender.send_message(f"§a✓ Also saved as '{name}.mcstructure' with container data!§r")
-                sender.send_message(f"§7Containers (chests, furnaces, etc.) will be preserved!§r")
+                player.send_message(f"§a✓ Also saved as '{name}.mcstructure' with container data!§r")
+                player.send_message(f"§7Containers (chests, furnaces, etc.) will be preserved!§r")
             else:
-                sender.send_message(f"§eNote: Structure save failed, only .schem saved (no containers)§r")
-        except Exception as e:
-            plugin.logger.error(f"[SCHEM SAVE] Structure save error: {e}")
-            sender.send_message(f"§eNote: Only .schem saved (containers not preserved)§r")
+                player.send_message(f"§eNote: Structure save failed, only .schem saved (no containers)§r")
+
+        def on_write_error(error):
+            plugin.logger.error(f"[SCHEM SAVE] Failed to write '{file_path}': {error}")
+            player = plugin.server.get_player(player_uuid)
+            if player is not None:
+                player.send_message(f"§cFailed to save schematic '{name}': {error}§r")
+
+        def on_captured(capture):
+            # Encoding and gzip run in a worker; the file is renamed into place when complete
+            plugin.background.submit(
+                save_schematic, file_path, capture.width, capture.height, capture.length,
+                capture.palette, capture.indices,
+                callback=on_written,
+                errback=on_write_error
+            )
 
+        # Blocks are read a budget per tick, then handed off for writing
+        plugin.capture_jobs[player_uuid] = {"capture": capture, "on_complete": on_captured}
+        sender.send_message(f"§7Saving {capture.volume:,} blocks to '{name}.schem'...§r")
         return True
 
     elif sub_command == "load":
@@ -190,136 +206,92 @@ def handler(plugin, sender, args):
             sender.send_message(f"Schematic '{name}.schem' not found.")
             return False
 
-        try:
-            nbt_file = nbtlib.load(file_path, gzipped=True)
-            schematic = nbt_file.get('Schematic', nbt_file) # Handle root tag being 'Schematic' or the data itself
-        except Exception as e:
-            sender.send_message(f"Error reading schematic file: {e}")
-            return False
-
-        if not all(k in schematic for k in ['Width', 'Height', 'Length']):
-            sender.send_message("Invalid schematic: Missing Width, Height, or Length tags.")
-            return False
-
-        width, height, length = schematic['Width'], schematic['Height'], schematic['Length']
+        # Remember where the command was issued; placement happens once the file is decoded
         player_uuid, dimension, player_location = sender.unique_id, sender.dimension, sender.location
 
-        # Prepare blocks list (relative coordinates for clipboard, absolute for direct placement)
-        blocks_list = []
+        def on_loaded(schematic):
+            # Back on the main thread; the player may have left while the file was read
+            sender = plugin.server.get_player(player_uuid)
+            if sender is None:
+                return
+
+            width, height, length = schematic.width, schematic.height, schematic.length
 
-        # Modern schematics (Sponge v2 format with Palette)
-        if 'Palette' in schematic and 'BlockData' in schematic:
-            if not load_to_clipboard:
-                sender.send_message("Loading modern schematic (Palette)...")
-            id_to_name = {v: k for k, v in schematic['Palette'].items()}
-            block_data_stream = iter(schematic['BlockData'])
-
-            for y in range(height):
-                for z in range(length):
-                    for x in range(width):
-                        palette_index = read_varint(block_data_stream)
-                        java_name = id_to_name.get(palette_index, "minecraft:air")
-                        block_name, data_value = translate_block_name(plugin, java_name)
-
-                        # Store blocks with relative coordinates
-                        blocks_list.append((x, y, z, block_name, data_value))
-
-        # Legacy schematics (MCEdit format with numeric IDs)
-        elif 'Blocks' in schematic:
             if not load_to_clipboard:
-                sender.send_message("Loading legacy schematic (Block IDs)...")
-            block_ids = schematic['Blocks']
-
-            for y in range(height):
-                for z in range(length):
-                    for x in range(width):
-                        index = (y * length + z) * width + x
-                        java_name = LEGACY_ID_TO_BEDROCK_NAME.get(str(block_ids[index]), "minecraft:air")
-                        block_name, data_value = translate_block_name(plugin, java_name)
-
-                        # Store blocks with relative coordinates
-                        blocks_list.append((x, y, z, block_name, data_value))
-        else:
-            sender.send_message("Unsupported schematic format. Missing Palette/BlockData or Blocks tags.")
-            return False
+                if schematic.format == FORMAT_SPONGE:
+                    sender.send_message("Loading modern schematic (Palette)...")
+                else:
+                    sender.send_message("Loading legacy schematic (Block IDs)...")
 
-        if not blocks_list:
-            sender.send_message("Schematic is empty or only contains air.")
-            return True
+            # Translate each palette entry (or legacy ID) once; voxels are then streamed through the table
+            palette_table = translate_palette(
+                schematic.names,
+                lambda java_name: translate_block_name(plugin, java_name),
+                size=max(schematic.counts, default=-1) + 1  # The worker already built the histogram
+            )
 
-        # If loading to clipboard, store relative coordinates
-        if load_to_clipboard:
-            # Convert to clipboard format (relative to player position)
-            clipboard_blocks = []
-            for x, y, z, block_name, data_value in blocks_list:
-                # Store as relative coordinates from origin (0,0,0)
-                clipboard_blocks.append((x, y, z, block_name, data_value))
-
-            plugin.clipboard[player_uuid] = clipboard_blocks
-            sender.send_message(f"§aSchematic '{name}' loaded to clipboard ({len(clipboard_blocks)} blocks)§r")
-            sender.send_message(f"§7Dimensions: {width}x{height}x{length}§r")
-            sender.send_message(f"§7Use /paste to place it§r")
-            return True
+            # If loading to clipboard, store relative coordinates from origin (0,0,0)
+            if load_to_clipboard:
+                clipboard_blocks = list(schematic.iter_blocks(palette_table))
+                if not clipboard_blocks:
+                    sender.send_message("Schematic is empty or only contains air.")
+                    return
+
+                plugin.clipboard[player_uuid] = clipboard_blocks
+                sender.send_message(f"§aSchematic '{name}' loaded to clipboard ({len(clipboard_blocks)} blocks)§r")
+                sender.send_message(f"§7Dimensions: {width}x{height}x{length}§r")
+                sender.send_message(f"§7Use /paste to place it§r")
+                return
+
+            # Classify per palette entry, not per voxel; air is never placed
+            categories = block_categories.for_palette(block_name for block_name, _ in palette_table)
+            block_count = sum(n for i, n in schematic.counts.items() if categories[i] != CATEGORY_AIR)
+            if not block_count:
+                sender.send_message("Schematic is empty or only contains air.")
+                return
+
+            sender.send_message(f"Placing {block_count} blocks...")
+            origin = (int(player_location.x), int(player_location.y), int(player_location.z))
+
+            def on_grouped(positions):
+                sender = plugin.server.get_player(player_uuid)
+                if sender is None:
+                    return
+                # One pass per category in placement order; positions ascend in YZX
+                # order, so the gravity pass is already bottom-up
+                blocks_to_change = itertools.chain.from_iterable(
+                    schematic.iter_positions(palette_table, positions[category], origin)
+                    for category in PLACEMENT_ORDER
+                )
 
-        # Otherwise, place directly in world
-        blocks_to_change = []
-        for x, y, z, block_name, data_value in blocks_list:
-            if block_name != "minecraft:air":
-                # Convert to world coordinates
-                target_x = int(player_location.x) + x
-                target_y = int(player_location.y) + y
-                target_z = int(player_location.z) + z
-                blocks_to_change.append((target_x, target_y, target_z, block_name, data_value))
-
-        if not blocks_to_change:
-            sender.send_message("Schematic is empty or only contains air.")
-            return True
+                # The undo entry is filled by the job engine as each block is replaced
+                if queue_placement(plugin, player_uuid, dimension, blocks_to_change, block_count,
+                                   "Operation complete ({count} blocks affected)."):
+                    sender.send_message(f"Starting async operation for {block_count} blocks...")
+
+                # Clear preview if it exists
+                if player_uuid in plugin.schematic_previews:
+                    del plugin.schematic_previews[player_uuid]
 
-        sender.send_message(f"Placing {len(blocks_to_change)} blocks...")
-
-        # Define blocks that need a solid block underneath them
-        dependent_blocks = [
-            "flower", "sapling", "mushroom", "torch", "rail", "redstone_wire", "repeater", "comparator",
-            "sign", "door", "lever", "button", "pressure_plate", "tripwire_hook", "tripwire", "banner"
-        ]
-
-        solid_pass = [b for b in blocks_to_change if not any(d in b[3] for d in dependent_blocks)]
-        dependent_pass = [b for b in blocks_to_change if any(d in b[3] for d in dependent_blocks)]
-
-        # Combine passes for undo history
-        full_undo_entry = [(x, y, z, str(dimension.get_block_at(x, y, z).type), dimension.get_block_at(x, y, z).data) for x, y, z, _, _ in blocks_to_change]
-        if player_uuid not in plugin.undo_history:
-            plugin.undo_history[player_uuid] = []
-        plugin.undo_history[player_uuid].append(full_undo_entry)
-        plugin.redo_history[player_uuid] = []
-
-        # Function to execute a pass
-        def execute_pass(blocks_pass):
-            if len(blocks_pass) > plugin.plugin_config["async-threshold"]:
-                plugin.tasks[player_uuid] = {"dimension": dimension, "blocks": blocks_pass}
-                sender.send_message(f"Starting async operation for {len(blocks_pass)} blocks...")
+            # Sort voxels into categories off the main thread, so sparse passes
+            # (a few torches in a large build) do not rescan the whole volume per tick
+            plugin.background.submit(
+                schematic.positions_by_group, categories, PLACEMENT_ORDER,
+                callback=on_grouped, errback=on_error
+            )
+
+        def on_error(error):
+            sender = plugin.server.get_player(player_uuid)
+            if sender is None:
+                return
+            if isinstance(error, ValueError):
+                sender.send_message(str(error))
             else:
-                for x, y, z, block_type, data_value in blocks_pass:
-                    try:
-                        block = dimension.get_block_at(x, y, z)
-                        block.set_type(block_type)
-                        # if data_value is not None:
-                        #     # block.data = data_value # Endstone API is read-only
-                        #     pass
-                    except RuntimeError as e:
-                        plugin.logger.error(f"Skipping block '{block_type}' for player {sender.name}: {e}")
-                        sender.send_message(f"§cSkipped block: {block_type} ({e})§r")
-                        continue
-
-        # Execute passes
-        execute_pass(solid_pass)
-        execute_pass(dependent_pass)
-
-        # Clear preview if it exists
-        if player_uuid in plugin.schematic_previews:
-            del plugin.schematic_previews[player_uuid]
+                sender.send_message(f"Error reading schematic file: {error}")
 
-        sender.send_message(f"Operation complete ({len(blocks_to_change)} blocks affected).")
+        # Read, decompress and decode off the main thread (cache hits return immediately)
+        sender.send_message(f"§7Reading schematic '{name}'...§r")
+        plugin.schematic_cache.load_async(file_path, plugin.background, on_loaded, on_error)
         return True
 
     elif sub_command == "preview":
@@ -334,18 +306,19 @@ def handler(plugin, sender, args):
             sender.send_message(f"Schematic '{name}.schem' not found.")
             return False
 
-        try:
-            nbt_file = nbtlib.load(file_path, gzipped=True)
-            schematic = nbt_file.get('Schematic', nbt_file)
-        except Exception as e:
-            sender.send_message(f"Error reading schematic file: {e}")
-            return False
-
-        if not all(k in schematic for k in ['Width', 'Height', 'Length']):
-            sender.send_message("Invalid schematic: Missing Width, Height, or Length tags.")
-            return False
-
-        width, height, length = int(schematic['Width']), int(schematic['Height']), int(schematic['Length'])
+        # Use catalog metadata if it is current, otherwise read just the header
+        schematic = plugin.schematic_catalog.get_cached(name)
+        if schematic is None or schematic.format is None:
+            try:
+                schematic = read_schematic_header(file_path)
+            except ValueError as e:
+                sender.send_message(str(e))
+                return False
+            except Exception as e:
+                sender.send_message(f"Error reading schematic file: {e}")
+                return False
+
+        width, height, length = schematic.width, schematic.height, schematic.length
         player_uuid = sender.unique_id
         player_location = sender.location
 
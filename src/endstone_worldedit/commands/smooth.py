@@ -1,4 +1,5 @@
 from endstone_worldedit.utils import command_executor
+from endstone_worldedit.block_categories import block_categories
 
 command = {
     "smooth": {
@@ -56,7 +57,7 @@ def handler(plugin, sender, args):
                 top_y = None
                 for y in range(max_y, min_y - 1, -1):
                     block = dimension.get_block_at(x, y, z)
-                    if block.type != "minecraft:air":
+                    if block_categories.is_solid(block.type):
                         top_y = y
                         break
                 
@@ -75,7 +76,7 @@ def handler(plugin, sender, args):
                             # Find top block of neighbor
                             for ny in range(max_y, min_y - 1, -1):
                                 neighbor_block = dimension.get_block_at(nx, ny, nz)
-                                if neighbor_block.type != "minecraft:air":
+                                if block_categories.is_solid(neighbor_block.type):
                                     neighbor_heights.append(ny)
                                     break
                 
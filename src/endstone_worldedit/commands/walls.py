@@ -1,4 +1,4 @@
-from endstone_worldedit.utils import command_executor
+from endstone_worldedit.utils import command_executor, queue_placement
 
 command = {
     "walls": {
@@ -8,7 +8,7 @@ command = {
     }
 }
 
-@command_executor("walls", selection_required=True)
+@command_executor("walls", selection_required=True, clip_to_areas=True)
 def handler(plugin, sender, args):
     if len(args) < 1:
         sender.send_message("Usage: /walls <block>")
@@ -21,9 +21,6 @@ def handler(plugin, sender, args):
     pos2 = plugin.selections[player_uuid]['pos2']
     
     dimension = sender.dimension
-    
-    undo_entry = []
-    plugin.redo_history[player_uuid] = []
 
     blocks_to_change = []
     min_x, max_x = min(pos1[0], pos2[0]), max(pos1[0], pos2[0])
@@ -40,23 +37,9 @@ def handler(plugin, sender, args):
 
     affected_blocks = len(blocks_to_change)
 
-    for x, y, z, _, _ in blocks_to_change:
-        block = dimension.get_block_at(x, y, z)
-        undo_entry.append((x, y, z, block.type, block.data))
-
-    if player_uuid not in plugin.undo_history:
-        plugin.undo_history[player_uuid] = []
-    plugin.undo_history[player_uuid].append(undo_entry)
-
-    if affected_blocks > plugin.plugin_config["async-threshold"]:
-        plugin.tasks[player_uuid] = {"dimension": dimension, "blocks": blocks_to_change}
+    # Undo is recorded as blocks are placed; blocks outside the player's build areas are skipped
+    if queue_placement(plugin, player_uuid, dimension, blocks_to_change, affected_blocks,
+                       "Operation complete ({count} blocks affected)."):
         sender.send_message(f"Starting async operation for {affected_blocks} blocks...")
-    else:
-        for x, y, z, block_type, data_value in blocks_to_change:
-            block = dimension.get_block_at(x, y, z)
-            block.set_type(block_type)
-            if data_value is not None:
-                block.set_data(data_value)
-        sender.send_message(f"Operation complete ({affected_blocks} blocks affected).")
-        
+
     return True
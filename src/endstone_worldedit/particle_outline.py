@@ -0,0 +1,140 @@
+"""
+Particle outline renderer for WorldEdit.
+Draws the edges of selections and previews with per-player particle spawns.
+Edge point lists are cached by box size and spacing, points beyond the view
+distance are culled, and each player gets a limited number of particles per
+second; when an outline needs more, its spacing is widened to fit.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+Point = Tuple[int, int, int]
+
+
+def outline_offsets(size: Tuple[int, int, int], step: int) -> List[Point]:
+    """Get the edge points of a box, relative to its minimum corner.
+
+    Args:
+        size: Box extent (max - min) on each axis
+        step: Distance between points along an edge
+
+    Returns:
+        Points on the 12 edges, every step blocks from the minimum corner,
+        plus the 8 corners; no point appears twice
+    """
+    sx, sy, sz = size
+    points: Dict[Point, None] = {}
+    for x in range(0, sx + 1, step):
+        for y, z in ((0, 0), (sy, 0), (0, sz), (sy, sz)):
+            points[(x, y, z)] = None
+    for y in range(0, sy + 1, step):
+        for x, z in ((0, 0), (sx, 0), (0, sz), (sx, sz)):
+            points[(x, y, z)] = None
+    for z in range(0, sz + 1, step):
+        for x, y in ((0, 0), (sx, 0), (0, sy), (sx, sy)):
+            points[(x, y, z)] = None
+    for x in (0, sx):
+        for y in (0, sy):
+            for z in (0, sz):
+                points[(x, y, z)] = None
+    return list(points)
+
+
+class OutlineRenderer:
+    """Renders box outlines to players within a particle budget."""
+
+    # Outline point lists kept, by (size, step)
+    CACHE_ENTRIES = 64
+
+    def __init__(self, max_points: int = 1000, view_distance: float = 64):
+        """Initialize renderer.
+
+        Args:
+            max_points: Particles each player may be sent per second (0 = unlimited)
+            view_distance: Points farther than this from the player are skipped (0 = no culling)
+        """
+        self.max_points = max_points
+        self.view_distance = view_distance
+        self._outlines: "OrderedDict[Tuple[Tuple[int, int, int], int], List[Point]]" = OrderedDict()
+        # player id -> (second, particles sent in that second)
+        self._spent: Dict[object, Tuple[int, int]] = {}
+
+    def _outline(self, size: Tuple[int, int, int], step: int) -> List[Point]:
+        """Get cached outline offsets for a box size and spacing."""
+        key = (size, step)
+        points = self._outlines.get(key)
+        if points is None:
+            points = self._outlines[key] = outline_offsets(size, step)
+            if len(self._outlines) > self.CACHE_ENTRIES:
+                self._outlines.popitem(last=False)
+        else:
+            self._outlines.move_to_end(key)
+        return points
+
+    def _visible(self, offsets: List[Point], low: Point, eye: Tuple[float, float, float]) -> List[Point]:
+        """Translate offsets to world positions, dropping those out of view."""
+        lx, ly, lz = low
+        if not self.view_distance:
+            return [(lx + x, ly + y, lz + z) for x, y, z in offsets]
+        ex, ey, ez = eye[0] - lx, eye[1] - ly, eye[2] - lz
+        limit = self.view_distance * self.view_distance
+        return [
+            (lx + x, ly + y, lz + z) for x, y, z in offsets
+            if (x - ex) ** 2 + (y - ey) ** 2 + (z - ez) ** 2 <= limit
+        ]
+
+    def _remaining(self, player_id) -> int:
+        """Get how many particles a player may still be sent this second."""
+        if not self.max_points:
+            return math.inf
+        second = int(time.monotonic())
+        spent_second, spent = self._spent.get(player_id, (second, 0))
+        if spent_second != second:
+            spent = 0
+        return self.max_points - spent
+
+    def _consume(self, player_id, count: int) -> None:
+        second = int(time.monotonic())
+        spent_second, spent = self._spent.get(player_id, (second, 0))
+        self._spent[player_id] = (second, (spent if spent_second == second else 0) + count)
+
+    def draw(self, player, pos1, pos2, particle: str, step: int) -> int:
+        """Draw the outline of a box to one player.
+
+        Args:
+            player: Player who sees the particles
+            pos1: One corner of the box
+            pos2: Opposite corner of the box
+            particle: Particle identifier
+            step: Preferred distance between points along an edge
+
+        Returns:
+            Number of particles spawned
+        """
+        budget = self._remaining(player.unique_id)
+        if budget <= 0:
+            return 0
+
+        low = tuple(math.floor(min(pos1[axis], pos2[axis])) for axis in range(3))
+        size = tuple(math.floor(max(pos1[axis], pos2[axis])) - low[axis] for axis in range(3))
+        location = player.location
+        eye = (location.x, location.y, location.z)
+
+        step = max(1, int(step))
+        points = self._visible(self._outline(size, step), low, eye)
+        if len(points) > budget:
+            # Widen the spacing so the visible part of the outline fits the budget
+            step *= math.ceil(len(points) / budget)
+            points = self._visible(self._outline(size, step), low, eye)[:budget]
+
+        for x, y, z in points:
+            player.spawn_particle(particle, x, y, z)
+        self._consume(player.unique_id, len(points))
+        return len(points)
+
+    def forget(self, player_id) -> None:
+        """Drop the particle budget state of a player (e.g. when they leave)."""
+        self._spent.pop(player_id, None)
@@ -0,0 +1,169 @@
+"""
+Build permission engine for WorldEdit.
+Answers whether a player may edit a point or box in a dimension, combining
+the build areas they are a builder of with the builder zones they can access.
+Point checks are served from a per-player cache of the allowed boxes in each
+chunk column, invalidated whenever areas, zones or their builders change.
+"""
+
+import math
+import time
+from typing import Dict, List, Tuple
+
+from .spatial_index import Bounds, ChunkGridIndex, ClipMask, box_difference
+
+
+class PermissionEngine:
+    """Decides where players may build, over build areas and builder zones."""
+
+    # Columns cached per player before the player's cache is dropped and rebuilt
+    MAX_COLUMNS_PER_PLAYER = 1024
+
+    def __init__(self, build_area_manager, zone_manager=None):
+        """Initialize permission engine.
+
+        Args:
+            build_area_manager: BuildAreaManager with the build areas
+            zone_manager: ZoneManager with the builder zones (None = areas only)
+        """
+        self.build_area_manager = build_area_manager
+        self.zone_manager = zone_manager
+        # player name -> {(world, chunk x, chunk z): (allowed boxes, earliest zone expiry)}
+        self._columns: Dict[str, Dict[Tuple[str, int, int], Tuple[Tuple[Bounds, ...], float]]] = {}
+        self._generation = None
+
+    def _current_generation(self) -> tuple:
+        zone_generation = self.zone_manager.generation if self.zone_manager is not None else 0
+        return self.build_area_manager.generation, zone_generation
+
+    def _check_generation(self) -> None:
+        """Drop every cached decision if areas, zones or builders changed."""
+        generation = self._current_generation()
+        if generation != self._generation:
+            self._columns.clear()
+            self._generation = generation
+
+    def _allowed(self, player_name: str, areas, zones) -> Tuple[List[Bounds], float]:
+        """Get the boxes of the areas and zones a player may build in.
+
+        Returns:
+            Tuple of (boxes, earliest expiry timestamp of the zones used, or inf)
+        """
+        boxes = [
+            ((area.min_x, area.min_y, area.min_z), (area.max_x, area.max_y, area.max_z))
+            for area in areas if area.has_builder(player_name)
+        ]
+        expires = math.inf
+        for zone in zones:
+            if zone.has_access(player_name):
+                boxes.append((tuple(zone.min_pos), tuple(zone.max_pos)))
+                if zone.expires_at is not None:
+                    expires = min(expires, zone.expires_at.timestamp())
+        return boxes, expires
+
+    def _column_boxes(self, player_name: str, world: str, x: float, z: float) -> Tuple[Bounds, ...]:
+        """Get the allowed boxes overlapping a point's chunk column, from the cache if possible."""
+        self._check_generation()
+        shift = ChunkGridIndex.CHUNK_SHIFT
+        key = (world, math.floor(x) >> shift, math.floor(z) >> shift)
+        player_columns = self._columns.setdefault(player_name, {})
+        cached = player_columns.get(key)
+        # Zones that expired since the last purge must stop granting access
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+
+        areas = self.build_area_manager.get_areas_in_column(world, x, z)
+        zones = self.zone_manager.get_zones_in_column(x, z, world) if self.zone_manager is not None else []
+        boxes, expires = self._allowed(player_name, areas, zones)
+        if len(player_columns) >= self.MAX_COLUMNS_PER_PLAYER:
+            player_columns.clear()
+        player_columns[key] = (tuple(boxes), expires)
+        return player_columns[key][0]
+
+    def can_build_at(self, player_name: str, world: str, x: float, y: float, z: float,
+                     is_operator: bool = False) -> bool:
+        """Check if a player can build at a location.
+
+        Args:
+            player_name: Player name
+            world: Dimension name
+            x: X coordinate
+            y: Y coordinate
+            z: Z coordinate
+            is_operator: Whether the player bypasses restrictions
+
+        Returns:
+            True if the location is in an area or zone the player may build in
+        """
+        if is_operator:
+            return True
+        for (min_x, min_y, min_z), (max_x, max_y, max_z) in self._column_boxes(player_name, world, x, z):
+            if min_x <= x <= max_x and min_y <= y <= max_y and min_z <= z <= max_z:
+                return True
+        return False
+
+    def get_uncovered_parts(self, player_name: str, world: str,
+                            pos1: Tuple[float, float, float], pos2: Tuple[float, float, float],
+                            is_operator: bool = False) -> List[Bounds]:
+        """Get the parts of a box the player may not build in.
+
+        Args:
+            player_name: Player name
+            world: Dimension name
+            pos1: One corner of the box
+            pos2: Opposite corner of the box
+            is_operator: Whether the player bypasses restrictions
+
+        Returns:
+            Disjoint (min, max) block boxes; empty if the whole box is allowed
+        """
+        if is_operator:
+            return []
+        low = tuple(math.floor(min(pos1[axis], pos2[axis])) for axis in range(3))
+        high = tuple(math.floor(max(pos1[axis], pos2[axis])) for axis in range(3))
+        areas = self.build_area_manager.get_areas_in_box(world, low, high)
+        zones = self.zone_manager.get_zones_in_box(low, high, world) if self.zone_manager is not None else []
+        boxes, _ = self._allowed(player_name, areas, zones)
+        return box_difference((low, high), boxes)
+
+    def can_build_box(self, player_name: str, world: str,
+                      pos1: Tuple[float, float, float], pos2: Tuple[float, float, float],
+                      is_operator: bool = False) -> bool:
+        """Check if a player can build in every block of a box.
+
+        Args:
+            player_name: Player name
+            world: Dimension name
+            pos1: One corner of the box
+            pos2: Opposite corner of the box
+            is_operator: Whether the player bypasses restrictions
+
+        Returns:
+            True if the whole box is allowed
+        """
+        return not self.get_uncovered_parts(player_name, world, pos1, pos2, is_operator)
+
+    def get_clip_mask(self, player_name: str, world: str) -> ClipMask:
+        """Get a mask limiting a player's edits to where they may build.
+
+        Args:
+            player_name: Player name
+            world: Dimension name
+
+        Returns:
+            ClipMask over the player's areas and zones in the dimension
+        """
+        areas = self.build_area_manager.get_player_areas(player_name, world)
+        zones = []
+        if self.zone_manager is not None:
+            zones = [zone for zone in self.zone_manager.get_player_zones(player_name) if zone.dimension == world]
+        boxes, _ = self._allowed(player_name, areas, zones)
+        return ClipMask(boxes)
+
+    def forget(self, player_name: str) -> None:
+        """Drop the cached decisions of a player (e.g. when they leave).
+
+        Args:
+            player_name: Player name
+        """
+        self._columns.pop(player_name, None)
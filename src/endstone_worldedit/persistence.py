@@ -0,0 +1,82 @@
+"""
+Write-behind JSON persistence for WorldEdit.
+Changes are coalesced: the first change after a write starts a short timer,
+and when it fires one snapshot is written on a background thread, through a
+temporary file and an atomic rename.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Optional
+
+
+class DebouncedJsonWriter:
+    """Coalesces save requests for one JSON file into delayed background writes."""
+
+    def __init__(self, path: str, snapshot: Callable[[], Any], delay: float = 2.0, indent: Optional[int] = 4):
+        """Initialize writer.
+
+        Args:
+            path: File to write
+            snapshot: Returns the data to write; called on the writer thread,
+                so it must take whatever lock guards the data
+            delay: Seconds between the first unsaved change and the write
+            indent: JSON indentation (None for compact output)
+        """
+        self.path = path
+        self.snapshot = snapshot
+        self.delay = delay
+        self.indent = indent
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+
+    def schedule(self) -> None:
+        """Mark the data changed; it is written within delay seconds."""
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Write pending changes now, on the calling thread."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._write_pending()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        self._write_pending()
+
+    def _write_pending(self) -> None:
+        """Write the current snapshot if anything changed since the last write."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Cleared before the snapshot so changes made while writing trigger another write
+                self._dirty = False
+            try:
+                self._write(self.snapshot())
+            except Exception as e:
+                print(f"[WorldEdit] Error saving {self.path}: {e}")
+                self.schedule()
+
+    def _write(self, data: Any) -> None:
+        """Write data through a temporary file and an atomic rename."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=self.indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -1,6 +1,7 @@
 from endstone.plugin import Plugin
 from endstone.event import (
     PlayerInteractEvent,
+    PlayerQuitEvent,
     BlockBreakEvent,
     EventPriority,
     event_handler,
@@ -9,14 +10,22 @@ from endstone import GameMode
 import time
 import os
 import json
-from endstone.command import Command, CommandSender, CommandSenderWrapper
+import itertools
+from endstone.command import Command, CommandSender
 from .commands import preloaded_commands, preloaded_handlers
-from .build_areas import BuildAreaManager
+from .build_areas import AreaPresenceTracker, BuildAreaManager
+from .particle_outline import OutlineRenderer
+from .permissions import PermissionEngine
 from .builder_menu import MenuHandler
 from .blueprints import BlueprintManager
 from .zones import ZoneManager
 from .shape_tool_menu import ShapeToolMenuHandler
 from .smooth_tool_menu import SmoothToolMenuHandler
+from .block_translation import block_translator
+from .schematic_catalog import SchematicCatalog
+from .schematic_cache import SchematicCache
+from .background import BackgroundExecutor
+from .utils import LEGACY_ID_TO_BEDROCK_NAME, resolve_block_data
 
 
 class WorldEditPlugin(Plugin):
@@ -33,12 +42,18 @@ class WorldEditPlugin(Plugin):
         self.clipboard = {}
         self.block_translation_map = {}
         self.particle_toggle = {}  # Stores player UUID -> bool
+        self.outline_renderer = None  # Selection and preview particle outlines
         self.schematic_previews = {}  # Stores schematic preview data per player UUID
         self.build_area_manager = None  # Initialized in on_load
         self.player_previous_gamemode = {}  # Track player gamemodes for area transitions
         self.menu_handler = None  # Builder menu handler
         self.blueprint_manager = None  # Blueprint manager
         self.zone_manager = None  # Zone manager
+        self.permissions = None  # Build permission engine over areas and zones
+        self.schematic_catalog = None  # Schematic metadata index
+        self.schematic_cache = None  # Decoded schematic LRU cache
+        self.background = None  # Worker pool for file I/O and decoding
+        self.capture_jobs = {}  # Stores in-progress schematic captures per player UUID
         self.smooth_tool_settings = {}  # Stores smooth tool settings per player UUID
         self.shape_tool_handler = ShapeToolMenuHandler(self)
         self.smooth_tool_handler = SmoothToolMenuHandler(self)
@@ -49,15 +64,32 @@ class WorldEditPlugin(Plugin):
         self.load_config()
 
         # Initialize build area manager
-        self.build_area_manager = BuildAreaManager()
+        self.build_area_manager = BuildAreaManager(
+            save_delay=self.plugin_config.get("build-area-save-delay", 2.0)
+        )
+        self.area_presence = AreaPresenceTracker(self.build_area_manager)
+
+        # Initialize particle outline renderer
+        self.outline_renderer = OutlineRenderer(
+            max_points=self.plugin_config.get("particle-max-points", 1000),
+            view_distance=self.plugin_config.get("particle-view-distance", 64)
+        )
 
         # Initialize blueprint manager
         blueprint_folder = "plugins/WorldEdit/blueprints"
         shared_folder = "plugins/WorldEdit/blueprints/shared"
-        self.blueprint_manager = BlueprintManager(blueprint_folder, shared_folder)
+        self.blueprint_manager = BlueprintManager(
+            blueprint_folder,
+            shared_folder,
+            block_data_factory=lambda block_type, states: resolve_block_data(self, block_type, states),
+            cache_max_blocks=self.plugin_config.get("blueprint-cache-blocks", 2000000),
+            store_folder="plugins/WorldEdit/store",
+            max_versions=self.plugin_config.get("blueprint-max-versions", 50)
+        )
 
         # Initialize zone manager
-        self.zone_manager = ZoneManager()
+        self.zone_manager = ZoneManager("plugins/WorldEdit/zones")
+        self.permissions = PermissionEngine(self.build_area_manager, self.zone_manager)
 
         # Initialize menu handler
         self.menu_handler = MenuHandler(self)
@@ -67,6 +99,13 @@ class WorldEditPlugin(Plugin):
         if not os.path.exists(schematic_path):
             os.makedirs(schematic_path)
 
+        # Initialize schematic catalog
+        self.schematic_catalog = SchematicCatalog(schematic_path)
+
+        # Initialize decoded schematic cache
+        cache_mb = self.plugin_config.get("schematic-cache-mb", 64)
+        self.schematic_cache = SchematicCache(cache_mb * 1024 * 1024, LEGACY_ID_TO_BEDROCK_NAME)
+
     def load_config(self):
         config_path = "plugins/WorldEdit/config.json"
         default_block_translation_map = {
@@ -135,7 +174,15 @@ class WorldEditPlugin(Plugin):
             "async-threshold": 5000,
             "particle-type": "minecraft:endrod",
             "particle-density-step": 5,
+            "particle-max-points": 1000,
+            "particle-view-distance": 64,
             "schematic-path": "plugins/WorldEdit/schematics",
+            "schematic-cache-mb": 64,
+            "schematic-process-threshold-mb": 32,
+            "blueprint-migrate-legacy": False,
+            "blueprint-cache-blocks": 2000000,
+            "blueprint-max-versions": 50,
+            "build-area-save-delay": 2.0,
             "block_translation_map": default_block_translation_map,
             "build_areas": {
                 "enabled": True,
@@ -155,19 +202,52 @@ class WorldEditPlugin(Plugin):
                 self.plugin_config = json.load(f)
         
         self.block_translation_map = self.plugin_config.get("block_translation_map", {})
+        block_translator.set_translation_map(self.block_translation_map)
 
     def on_enable(self):
         self.logger.info("WorldEditPlugin has been enabled!")
         self.register_events(self)
         self.tasks = {}
-        self.silent_sender = CommandSenderWrapper(self.server.command_sender, on_message=lambda msg: None)
+        process_mb = self.plugin_config.get("schematic-process-threshold-mb", 32)
+        self.background = BackgroundExecutor(self, max_workers=2, process_threshold=process_mb * 1024 * 1024)
+        # Index new or changed schematics without blocking the server thread
+        self.schematic_catalog.background = self.background
+        self.schematic_catalog.refresh_async()
+        if self.plugin_config.get("blueprint-migrate-legacy", False):
+            # Rewrite legacy .json blueprints in the binary format without holding up startup
+            self.background.submit(
+                self.blueprint_manager.migrate_legacy_blueprints,
+                callback=self._on_blueprints_migrated
+            )
+        # Drop stored blueprint sections left behind by deleted or overwritten blueprints
+        self.background.submit(self.blueprint_manager.collect_garbage, callback=self._on_blueprint_chunks_collected)
         self.server.scheduler.run_task(self, self.run_tasks, delay=1, period=1)
+        self.server.scheduler.run_task(self, self.run_capture_jobs, delay=1, period=1)
         self.server.scheduler.run_task(self, self.show_selection_particles, delay=20, period=20)  # Every second
         self.server.scheduler.run_task(self, self.show_schematic_preview_particles, delay=20, period=20)  # Every second
         self.server.scheduler.run_task(self, self.check_build_areas, delay=20, period=20)  # Check build areas every second
+        self.server.scheduler.run_task(self, self.zone_manager.purge_expired, delay=20, period=20)  # Expire zones every second
         self.player_last_area = {}  # Track which area each player was last in
         # Removed shape tool detection task - only use interaction events
 
+    def _on_blueprints_migrated(self, count):
+        if count:
+            self.blueprint_manager.reload_indexes()
+            self.logger.info(f"Migrated {count} legacy blueprints to the binary format")
+
+    def _on_blueprint_chunks_collected(self, count):
+        if count:
+            self.logger.info(f"Removed {count} unused blueprint chunks")
+
+    def on_disable(self):
+        if self.build_area_manager is not None:
+            self.build_area_manager.flush()
+        if self.zone_manager is not None:
+            self.zone_manager.compact()
+        if self.background is not None:
+            self.background.shutdown()
+            self.background = None
+
     def show_selection_particles(self):
         for player_uuid, selection in self.selections.items():
             # Check if particles are enabled for this player
@@ -177,39 +257,13 @@ class WorldEditPlugin(Plugin):
             if "pos1" in selection and "pos2" in selection:
                 player = self.server.get_player(player_uuid)
                 if player:
-                    pos1 = selection["pos1"]
-                    pos2 = selection["pos2"]
-                    min_x, max_x = min(pos1[0], pos2[0]), max(pos1[0], pos2[0])
-                    min_y, max_y = min(pos1[1], pos2[1]), max(pos1[1], pos2[1])
-                    min_z, max_z = min(pos1[2], pos2[2]), max(pos1[2], pos2[2])
-
-                    # Draw a grid of particles along the edges, executed by the player
-                    step = self.plugin_config["particle-density-step"]
-                    particle_type = self.plugin_config["particle-type"]
-                    # Draw a grid of particles along the edges, executed by the player
-                    step = self.plugin_config["particle-density-step"]
-                    particle_type = self.plugin_config["particle-type"]
-                    player_name = player.name
-                    
-                    def run_particle_command(x, y, z):
-                        command = f"execute as {player.name} at @s run particle {particle_type} {x} {y} {z}"
-                        self.server.dispatch_command(self.silent_sender, command)
-
-                    for x in range(int(min_x), int(max_x) + 1, step):
-                        run_particle_command(x, min_y, min_z)
-                        run_particle_command(x, max_y, min_z)
-                        run_particle_command(x, min_y, max_z)
-                        run_particle_command(x, max_y, max_z)
-                    for y in range(int(min_y), int(max_y) + 1, step):
-                        run_particle_command(min_x, y, min_z)
-                        run_particle_command(max_x, y, min_z)
-                        run_particle_command(min_x, y, max_z)
-                        run_particle_command(max_x, y, max_z)
-                    for z in range(int(min_z), int(max_z) + 1, step):
-                        run_particle_command(min_x, min_y, z)
-                        run_particle_command(max_x, min_y, z)
-                        run_particle_command(min_x, max_y, z)
-                        run_particle_command(max_x, max_y, z)
+                    self.outline_renderer.draw(
+                        player,
+                        selection["pos1"],
+                        selection["pos2"],
+                        self.plugin_config["particle-type"],
+                        self.plugin_config["particle-density-step"]
+                    )
 
     def show_schematic_preview_particles(self):
         """Show particle outline for schematic previews."""
@@ -235,71 +289,94 @@ class WorldEditPlugin(Plugin):
                 preview_data['min_pos'] = (min_x, min_y, min_z)
                 preview_data['max_pos'] = (max_x, max_y, max_z)
 
-                # Use different particle for preview (yellow/orange flame)
-                step = self.plugin_config["particle-density-step"]
                 # Use basic_flame_particle for yellow/orange color (different from selection)
-                particle_type = "minecraft:basic_flame_particle"
-
-                def run_particle_command(x, y, z):
-                    # Use same format as selection particles
-                    command = f"execute as {player.name} at @s run particle {particle_type} {x} {y} {z}"
-                    self.server.dispatch_command(self.silent_sender, command)
-
-                # Draw edges of the preview box
-                for x in range(int(min_x), int(max_x) + 1, step):
-                    run_particle_command(x, min_y, min_z)
-                    run_particle_command(x, max_y, min_z)
-                    run_particle_command(x, min_y, max_z)
-                    run_particle_command(x, max_y, max_z)
-                for y in range(int(min_y), int(max_y) + 1, step):
-                    run_particle_command(min_x, y, min_z)
-                    run_particle_command(max_x, y, min_z)
-                    run_particle_command(min_x, y, max_z)
-                    run_particle_command(max_x, y, max_z)
-                for z in range(int(min_z), int(max_z) + 1, step):
-                    run_particle_command(min_x, min_y, z)
-                    run_particle_command(max_x, min_y, z)
-                    run_particle_command(min_x, max_y, z)
-                    run_particle_command(max_x, max_y, z)
+                self.outline_renderer.draw(
+                    player,
+                    preview_data['min_pos'],
+                    preview_data['max_pos'],
+                    "minecraft:basic_flame_particle",
+                    self.plugin_config["particle-density-step"]
+                )
 
     def run_tasks(self):
+        # Process a chunk of blocks each tick
+        chunk_size = self.plugin_config["async-threshold"]
         for player_uuid, task_info in list(self.tasks.items()):
-            dimension = task_info["dimension"]
-            blocks_to_change = task_info["blocks"]
-            
-            # Process a chunk of blocks each tick
-            chunk_size = self.plugin_config["async-threshold"]
-            for _ in range(chunk_size):
-                if not blocks_to_change:
-                    player = self.server.get_player(player_uuid)
-                    if player:
-                        player.send_message("Async operation complete.")
-                    del self.tasks[player_uuid]
-                    break
-                
-                # Unpack data, now including the data value
-                try:
-                    if not blocks_to_change:
-                        break
-                    block_data = blocks_to_change.pop(0)
-                    
-                    # Handle both 4-value and 5-value tuples for compatibility
-                    if len(block_data) == 5:
-                        x, y, z, block_type, data_value = block_data
-                    else:
-                        x, y, z, block_type = block_data
-                        data_value = None
-
-                    block = dimension.get_block_at(x, y, z)
-                    block.set_type(block_type)
-                    if data_value is not None:
-                        block.set_data(data_value) # Assuming data_value is the saved block data
-                except RuntimeError as e:
-                    self.logger.error(f"Skipping block '{block_type}' for player {player_uuid}: {e}")
-                    player = self.server.get_player(player_uuid)
-                    if player:
-                        player.send_message(f"§cSkipped block: {block_type} ({e})§r")
-                    continue  # Skip to the next block
+            self.process_task(player_uuid, task_info, chunk_size)
+
+    def process_task(self, player_uuid, task_info, budget):
+        """Place up to budget blocks of a task, finishing it when its blocks run out.
+
+        Args:
+            player_uuid: Owner of the task
+            task_info: Task dictionary from self.tasks
+            budget: Maximum number of blocks to place
+
+        Returns:
+            True if the task finished
+        """
+        dimension = task_info["dimension"]
+        # "blocks" may be a list or a lazy iterator; both are consumed from the front
+        blocks_to_change = task_info.get("iterator")
+        if blocks_to_change is None:
+            blocks_to_change = task_info["iterator"] = iter(task_info["blocks"])
+        undo_entry = task_info.get("undo")
+
+        processed = 0
+        for block_data in itertools.islice(blocks_to_change, budget):
+            processed += 1
+            # Handle both 4-value and 5-value tuples for compatibility
+            if len(block_data) == 5:
+                x, y, z, block_type, data_value = block_data
+            else:
+                x, y, z, block_type = block_data
+                data_value = None
+
+            try:
+                block = dimension.get_block_at(x, y, z)
+                if undo_entry is not None:
+                    # Streamed jobs record the previous state as they go
+                    undo_entry.append((x, y, z, str(block.type), block.data))
+                block.set_type(block_type)
+                if data_value is not None:
+                    block.set_data(data_value) # Assuming data_value is the saved block data
+            except RuntimeError as e:
+                self.logger.error(f"Skipping block '{block_type}' for player {player_uuid}: {e}")
+                player = self.server.get_player(player_uuid)
+                if player:
+                    player.send_message(f"§cSkipped block: {block_type} ({e})§r")
+                continue  # Skip to the next block
+
+        task_info["placed"] = task_info.get("placed", 0) + processed
+        if processed == budget:
+            return False
+
+        if self.tasks.get(player_uuid) is task_info:
+            del self.tasks[player_uuid]
+        player = self.server.get_player(player_uuid)
+        if player:
+            player.send_message(task_info.get("complete_message", "Async operation complete.").format(count=task_info["placed"]))
+            clip_mask = task_info.get("clip")
+            if clip_mask is not None and clip_mask.skipped:
+                player.send_message(f"§7{clip_mask.skipped:,} blocks outside your build areas were skipped§r")
+        return True
+
+    def run_capture_jobs(self):
+        budget = self.plugin_config["async-threshold"]
+        for player_uuid, job in list(self.capture_jobs.items()):
+            capture = job["capture"]
+            try:
+                done = capture.step(budget)
+            except RuntimeError as e:
+                self.logger.error(f"Schematic capture failed for player {player_uuid}: {e}")
+                del self.capture_jobs[player_uuid]
+                player = self.server.get_player(player_uuid)
+                if player:
+                    player.send_message(f"§cSchematic save failed: {e}§r")
+                continue
+            if done:
+                del self.capture_jobs[player_uuid]
+                job["on_complete"](capture)
 
     def check_build_areas(self):
         """Check player positions and manage creative mode in build areas"""
@@ -319,13 +396,12 @@ class WorldEditPlugin(Plugin):
             location = player.location
             world = player.dimension.name
 
-            # Get areas at current location
-            current_areas = self.build_area_manager.get_areas_at_location(
-                world, location.x, location.y, location.z
+            # Authorized areas at the current location; None if unchanged since the last check
+            authorized_areas = self.area_presence.update(
+                player_uuid, player_name, world, location.x, location.y, location.z
             )
-
-            # Filter to areas where player is authorized
-            authorized_areas = [area for area in current_areas if area.has_builder(player_name)]
+            if authorized_areas is None:
+                continue
 
             # Determine if player should be in creative mode
             should_be_creative = any(area.creative_mode for area in authorized_areas)
@@ -379,6 +455,13 @@ class WorldEditPlugin(Plugin):
             self.logger.warning(f"[COMMAND DEBUG] No handler found for command: {command.name}")
         return False
 
+    @event_handler
+    def on_player_quit(self, event: PlayerQuitEvent):
+        """Drop cached build area presence, permissions and particle budgets for players who leave."""
+        self.area_presence.forget(event.player.unique_id)
+        self.outline_renderer.forget(event.player.unique_id)
+        self.permissions.forget(event.player.name)
+
     @event_handler(priority=EventPriority.HIGH)
     def on_block_break(self, event: BlockBreakEvent):
         """Handle block break events for wand tool only."""
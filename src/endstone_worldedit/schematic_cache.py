@@ -0,0 +1,139 @@
+"""In-memory LRU cache of decoded schematics for WorldEdit."""
+
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from .schematic_utils import DecodedSchematic, load_schematic
+
+
+class SchematicCache:
+    """Byte-budgeted LRU of decoded schematics, validated by file mtime and size."""
+
+    def __init__(self, max_bytes: int, legacy_names: Optional[Dict[int, str]] = None):
+        """Initialize cache.
+
+        Args:
+            max_bytes: Total memory budget for cached schematics
+            legacy_names: Legacy block ID to block name, used for MCEdit files
+        """
+        self.max_bytes = max_bytes
+        self.legacy_names = legacy_names or {}
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, DecodedSchematic]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, file_path: str) -> DecodedSchematic:
+        """Return the decoded schematic, reading the file only if needed.
+
+        Args:
+            file_path: Path to the schematic file
+
+        Returns:
+            Decoded schematic
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the schematic is invalid
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+        decoded = self._lookup(key, stat)
+        if decoded is not None:
+            return decoded
+
+        decoded = load_schematic(key, self.legacy_names)
+        self.put(key, stat.st_mtime, stat.st_size, decoded)
+        return decoded
+
+    def load_async(
+        self,
+        file_path: str,
+        executor,
+        callback: Callable[[DecodedSchematic], None],
+        errback: Callable[[Exception], None]
+    ) -> None:
+        """Load a schematic without blocking the caller.
+
+        Cache hits are delivered immediately; misses are read and decoded by
+        the executor and delivered on the main thread.
+
+        Args:
+            file_path: Path to the schematic file
+            executor: BackgroundExecutor that runs the read and decode
+            callback: Called with the decoded schematic
+            errback: Called with the exception if the file cannot be loaded
+        """
+        key = os.path.abspath(file_path)
+        try:
+            stat = os.stat(key)
+        except OSError as e:
+            errback(e)
+            return
+        decoded = self._lookup(key, stat)
+        if decoded is not None:
+            callback(decoded)
+            return
+
+        def on_loaded(decoded: DecodedSchematic):
+            self.put(key, stat.st_mtime, stat.st_size, decoded)
+            callback(decoded)
+
+        executor.submit(
+            load_schematic, key, self.legacy_names,
+            callback=on_loaded,
+            errback=errback,
+            use_process=executor.use_process_for(stat.st_size)
+        )
+
+    def _lookup(self, key: str, stat: os.stat_result) -> Optional[DecodedSchematic]:
+        """Return a cached schematic if it is still current, counting hits and misses."""
+        cached = self._entries.get(key)
+        if cached is not None:
+            mtime, size, decoded = cached
+            if mtime == stat.st_mtime and size == stat.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return decoded
+            self._remove(key)
+        self.misses += 1
+        return None
+
+    def put(self, file_path: str, mtime: float, size: int, decoded: DecodedSchematic) -> None:
+        """Insert a decoded schematic, evicting least recently used entries.
+
+        Schematics larger than the whole budget are not cached.
+
+        Args:
+            file_path: Path the schematic was read from
+            mtime: File modification time at read
+            size: File size at read
+            decoded: Decoded schematic
+        """
+        key = os.path.abspath(file_path)
+        self._remove(key)
+        if decoded.nbytes > self.max_bytes:
+            return
+        self._entries[key] = (mtime, size, decoded)
+        self.total_bytes += decoded.nbytes
+        while self.total_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, file_path: str) -> None:
+        """Drop a schematic from the cache (e.g. after it was overwritten).
+
+        Args:
+            file_path: Path to the schematic file
+        """
+        self._remove(os.path.abspath(file_path))
+
+    def clear(self) -> None:
+        """Drop all cached schematics."""
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def _remove(self, key: str) -> None:
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self.total_bytes -= cached[2].nbytes
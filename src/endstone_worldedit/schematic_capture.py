@@ -0,0 +1,79 @@
+"""Tick-budgeted region capture for WorldEdit schematic saves."""
+
+from array import array
+from typing import Dict, Iterator, Tuple
+
+
+class SchematicCapture:
+    """Reads a region into a palette and a compact index array over several ticks."""
+
+    def __init__(self, dimension, min_pos: Tuple[int, int, int], max_pos: Tuple[int, int, int]):
+        """Initialize capture.
+
+        Args:
+            dimension: Dimension to read blocks from
+            min_pos: Minimum corner (x, y, z)
+            max_pos: Maximum corner (x, y, z)
+        """
+        self.dimension = dimension
+        self.min_pos = min_pos = tuple(int(v) for v in min_pos)
+        self.max_pos = max_pos = tuple(int(v) for v in max_pos)
+        self.width = max_pos[0] - min_pos[0] + 1
+        self.height = max_pos[1] - min_pos[1] + 1
+        self.length = max_pos[2] - min_pos[2] + 1
+        self.palette: Dict[str, int] = {}
+        self.indices = array("H")
+        self._positions = self._iter_positions()
+
+    @property
+    def volume(self) -> int:
+        """Total number of blocks in the region."""
+        return self.width * self.height * self.length
+
+    @property
+    def done(self) -> bool:
+        """Whether every block has been read."""
+        return len(self.indices) >= self.volume
+
+    def step(self, budget: int) -> bool:
+        """Read up to budget blocks.
+
+        Args:
+            budget: Maximum number of blocks to read this call
+
+        Returns:
+            True once the whole region has been read
+        """
+        palette = self.palette
+        indices = self.indices
+        get_block_at = self.dimension.get_block_at
+        for _, (x, y, z) in zip(range(budget), self._positions):
+            block_type = str(get_block_at(x, y, z).type)
+            index = palette.get(block_type)
+            if index is None:
+                index = palette[block_type] = len(palette)
+                if index > 0xFFFF and indices.typecode == "H":
+                    self.indices = indices = array("i", indices)
+            indices.append(index)
+        return self.done
+
+    def count(self, block_type: str) -> int:
+        """Count captured blocks of one type.
+
+        Args:
+            block_type: Block type name
+
+        Returns:
+            Number of captured blocks with that type
+        """
+        index = self.palette.get(block_type)
+        return 0 if index is None else self.indices.count(index)
+
+    def _iter_positions(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield world positions in schematic (YZX) order."""
+        min_x, min_y, min_z = self.min_pos
+        max_x, max_y, max_z = self.max_pos
+        for y in range(min_y, max_y + 1):
+            for z in range(min_z, max_z + 1):
+                for x in range(min_x, max_x + 1):
+                    yield x, y, z
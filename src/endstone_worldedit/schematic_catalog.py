@@ -0,0 +1,397 @@
+"""Schematic catalog for WorldEdit.
+
+Keeps a persistent index of schematic metadata next to the schematic files so
+listing, searching and previewing never need to open the NBT data.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .schematic_utils import FORMAT_MCEDIT, FORMAT_SPONGE, decode_varints, read_schematic
+
+AIR_BLOCKS = {"minecraft:air", "minecraft:cave_air", "minecraft:void_air"}
+
+
+class SchematicEntry:
+    """Catalog metadata for one schematic file."""
+
+    def __init__(
+        self,
+        name: str,
+        width: int = 0,
+        height: int = 0,
+        length: int = 0,
+        block_count: int = 0,
+        palette_size: int = 0,
+        format: Optional[str] = None,
+        file_size: int = 0,
+        mtime: float = 0.0,
+        mcstructure: bool = False
+    ):
+        """Initialize catalog entry.
+
+        Args:
+            name: Schematic name without extension
+            width: Size along X
+            height: Size along Y
+            length: Size along Z
+            block_count: Number of non-air blocks
+            palette_size: Number of distinct block types
+            format: Schematic format (sponge or mcedit)
+            file_size: File size in bytes
+            mtime: File modification time
+            mcstructure: Whether a .mcstructure structure was saved alongside
+        """
+        self.name = name
+        self.width = width
+        self.height = height
+        self.length = length
+        self.block_count = block_count
+        self.palette_size = palette_size
+        self.format = format
+        self.file_size = file_size
+        self.mtime = mtime
+        self.mcstructure = mcstructure
+
+    @property
+    def dimensions(self) -> Tuple[int, int, int]:
+        """Schematic dimensions as (width, height, length)."""
+        return (self.width, self.height, self.length)
+
+    def get_summary(self) -> str:
+        """Get a one-line formatted description of this schematic."""
+        size_kb = max(1, self.file_size // 1024)
+        companion = " §a+mcstructure" if self.mcstructure else ""
+        return (f"§e{self.name} §7{self.width}x{self.height}x{self.length}, "
+                f"{self.block_count:,} blocks, {self.palette_size} types, "
+                f"{self.format or 'unknown'}, {size_kb} KB{companion}§r")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "length": self.length,
+            "block_count": self.block_count,
+            "palette_size": self.palette_size,
+            "format": self.format,
+            "file_size": self.file_size,
+            "mtime": self.mtime,
+            "mcstructure": self.mcstructure,
+        }
+
+    @staticmethod
+    def from_dict(name: str, data: Dict[str, Any]) -> "SchematicEntry":
+        """Create entry from dictionary."""
+        return SchematicEntry(
+            name=name,
+            width=data.get("width", 0),
+            height=data.get("height", 0),
+            length=data.get("length", 0),
+            block_count=data.get("block_count", 0),
+            palette_size=data.get("palette_size", 0),
+            format=data.get("format"),
+            file_size=data.get("file_size", 0),
+            mtime=data.get("mtime", 0.0),
+            mcstructure=data.get("mcstructure", False)
+        )
+
+
+class SchematicCatalog:
+    """Maintains the schematic metadata index, refreshed incrementally by mtime."""
+
+    INDEX_FILE = ".index"
+    EXTENSION = ".schem"
+
+    def __init__(self, schematic_path: str, background=None):
+        """Initialize catalog.
+
+        Args:
+            schematic_path: Folder containing .schem files
+            background: BackgroundExecutor for refreshing off the main thread
+                (None = refresh synchronously)
+        """
+        self.schematic_path = schematic_path
+        self.index_path = os.path.join(schematic_path, self.INDEX_FILE)
+        self.entries: Dict[str, SchematicEntry] = {}
+        self.background = background
+        self.refreshing = False
+        self.load_index()
+
+    def load_index(self) -> None:
+        """Load the index file, starting empty if it is missing or corrupt."""
+        self.entries = {}
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            self.entries = {
+                name: SchematicEntry.from_dict(name, entry)
+                for name, entry in data.get("entries", {}).items()
+            }
+        except Exception as e:
+            print(f"[WorldEdit] Error loading schematic index: {e}")
+            self.entries = {}
+
+    def save_index(self) -> None:
+        """Write the index file atomically."""
+        os.makedirs(self.schematic_path, exist_ok=True)
+        data = {"version": 1, "entries": {name: entry.to_dict() for name, entry in self.entries.items()}}
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def refresh(self) -> bool:
+        """Bring the index up to date with the schematic folder.
+
+        Only files whose mtime or size changed since they were indexed are
+        re-read; everything else costs a single stat from the folder scan.
+
+        Returns:
+            True if any entry was added, updated or removed
+        """
+        known = dict(self.entries)
+        return self._apply_scan(known, *self._scan(known))
+
+    def refresh_async(self) -> None:
+        """Start refreshing the index in the background.
+
+        The current entries keep being served until the scan finishes. Does
+        nothing if a refresh is already running; refreshes synchronously if
+        there is no background executor.
+        """
+        if self.background is None:
+            self.refresh()
+            return
+        if self.refreshing:
+            return
+        self.refreshing = True
+        known = dict(self.entries)
+
+        def on_scanned(result):
+            self.refreshing = False
+            self._apply_scan(known, *result)
+
+        def on_failed(error):
+            self.refreshing = False
+            print(f"[WorldEdit] Error refreshing schematic index: {error}")
+
+        if self.background.submit(self._scan, known, callback=on_scanned, errback=on_failed) is None:
+            self.refreshing = False
+
+    def _scan(self, known: Dict[str, SchematicEntry]) -> Tuple[Dict[str, SchematicEntry], Set[str]]:
+        """Re-read the schematics that changed since they were indexed.
+
+        Safe to run on a worker thread: it only reads known and the files.
+
+        Args:
+            known: Entries as of the start of the scan
+
+        Returns:
+            Tuple of (new or updated entries, names of all schematics found)
+        """
+        updated: Dict[str, SchematicEntry] = {}
+        seen: Set[str] = set()
+        if not os.path.isdir(self.schematic_path):
+            return updated, seen
+
+        with os.scandir(self.schematic_path) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(self.EXTENSION) or not dir_entry.is_file():
+                    continue
+                name = dir_entry.name[:-len(self.EXTENSION)]
+                seen.add(name)
+                entry = self._build_if_changed(name, dir_entry.stat(), known.get(name))
+                if entry is not None:
+                    updated[name] = entry
+        return updated, seen
+
+    def _apply_scan(self, known: Dict[str, SchematicEntry], updated: Dict[str, SchematicEntry],
+                    seen: Set[str]) -> bool:
+        """Merge scan results into the index and save it if anything changed.
+
+        Entries recorded while the scan ran are newer than its results and
+        are kept as they are.
+
+        Returns:
+            True if any entry was added, updated or removed
+        """
+        changed = False
+        for name, entry in updated.items():
+            if self.entries.get(name) is known.get(name):
+                self.entries[name] = entry
+                changed = True
+        for name in list(self.entries):
+            if name not in seen and self.entries[name] is known.get(name):
+                del self.entries[name]
+                changed = True
+
+        if changed:
+            self.save_index()
+        return changed
+
+    def _build_if_changed(self, name: str, stat: os.stat_result,
+                          entry: Optional[SchematicEntry]) -> Optional[SchematicEntry]:
+        """Re-read one schematic if its mtime or size changed.
+
+        Returns:
+            New entry, or None if entry is still current
+        """
+        if entry is not None and entry.mtime == stat.st_mtime and entry.file_size == stat.st_size:
+            return None
+        try:
+            new_entry = self.build_entry(name)
+        except Exception as e:
+            # Remember unreadable files too so they are not re-parsed until they change
+            print(f"[WorldEdit] Error indexing schematic '{name}': {e}")
+            new_entry = SchematicEntry(name, file_size=stat.st_size, mtime=stat.st_mtime)
+        if entry is not None:
+            # Only record() knows whether a structure was saved with the schematic
+            new_entry.mcstructure = entry.mcstructure
+        return new_entry
+
+    def build_entry(self, name: str) -> SchematicEntry:
+        """Read a schematic file and compute its catalog metadata.
+
+        Args:
+            name: Schematic name without extension
+
+        Returns:
+            Fresh catalog entry
+        """
+        file_path = self.get_path(name)
+        stat = os.stat(file_path)
+        data = read_schematic(file_path)
+
+        block_count = data.volume
+        palette_size = 0
+        if data.format == FORMAT_SPONGE:
+            indices = decode_varints(data.block_data)
+            palette_size = len(data.palette)
+            for index, block_name in data.palette.items():
+                if block_name.split("[")[0] in AIR_BLOCKS:
+                    block_count -= indices.count(index)
+        elif data.format == FORMAT_MCEDIT:
+            palette_size = len(set(data.blocks))
+            block_count -= data.blocks.count(0)
+
+        return SchematicEntry(
+            name=name,
+            width=data.width,
+            height=data.height,
+            length=data.length,
+            block_count=block_count,
+            palette_size=palette_size,
+            format=data.format,
+            file_size=stat.st_size,
+            mtime=stat.st_mtime
+        )
+
+    def record(self, entry: SchematicEntry) -> None:
+        """Store an entry computed elsewhere (e.g. right after a save).
+
+        Args:
+            entry: Entry to store; size and mtime are taken from the file
+        """
+        try:
+            stat = os.stat(self.get_path(entry.name))
+            entry.file_size = stat.st_size
+            entry.mtime = stat.st_mtime
+        except OSError:
+            return
+        self.entries[entry.name] = entry
+        self.save_index()
+
+    def get(self, name: str) -> Optional[SchematicEntry]:
+        """Get an up-to-date entry, re-reading the file only if it changed.
+
+        Args:
+            name: Schematic name without extension
+
+        Returns:
+            Entry or None if the schematic does not exist or is unreadable
+        """
+        try:
+            stat = os.stat(self.get_path(name))
+        except OSError:
+            if self.entries.pop(name, None) is not None:
+                self.save_index()
+            return None
+        new_entry = self._build_if_changed(name, stat, self.entries.get(name))
+        if new_entry is not None:
+            self.entries[name] = new_entry
+            self.save_index()
+        return self.entries.get(name)
+
+    def get_cached(self, name: str) -> Optional[SchematicEntry]:
+        """Get an entry only if it is still valid, without reading the file.
+
+        Args:
+            name: Schematic name without extension
+
+        Returns:
+            Entry, or None if it is missing or stale
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(self.get_path(name))
+        except OSError:
+            return None
+        if entry.mtime != stat.st_mtime or entry.file_size != stat.st_size:
+            return None
+        return entry
+
+    def get_path(self, name: str) -> str:
+        """Get the file path for a schematic name."""
+        return os.path.join(self.schematic_path, f"{name}{self.EXTENSION}")
+
+    def list_entries(self, search: Optional[str] = None, sort_by: str = "name") -> List[SchematicEntry]:
+        """List catalog entries, optionally filtered and sorted.
+
+        Serves the current index and starts a background refresh, so new or
+        changed files show up once it finishes (see refreshing).
+
+        Args:
+            search: Case-insensitive substring to match against names
+            sort_by: One of name, size, blocks or newest
+
+        Returns:
+            Matching entries
+        """
+        self.refresh_async()
+        entries = list(self.entries.values())
+        if search:
+            needle = search.lower()
+            entries = [e for e in entries if needle in e.name.lower()]
+
+        if sort_by == "size":
+            entries.sort(key=lambda e: e.width * e.height * e.length, reverse=True)
+        elif sort_by == "blocks":
+            entries.sort(key=lambda e: e.block_count, reverse=True)
+        elif sort_by == "newest":
+            entries.sort(key=lambda e: e.mtime, reverse=True)
+        else:
+            entries.sort(key=lambda e: e.name.lower())
+        return entries
+
+    @staticmethod
+    def paginate(entries: List[SchematicEntry], page: int, per_page: int = 10) -> Tuple[List[SchematicEntry], int, int]:
+        """Slice a list of entries into a page.
+
+        Args:
+            entries: Entries to page through
+            page: 1-based page number (clamped to the valid range)
+            per_page: Entries per page
+
+        Returns:
+            Tuple of (page entries, page number, total pages)
+        """
+        total_pages = max(1, (len(entries) + per_page - 1) // per_page)
+        page = min(max(1, page), total_pages)
+        start = (page - 1) * per_page
+        return entries[start:start + per_page], page, total_pages
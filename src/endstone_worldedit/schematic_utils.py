@@ -0,0 +1,719 @@
+"""
+Utility functions for reading and writing Sponge/MCEdit schematic data.
+Block data is decoded and encoded in bulk rather than one voxel at a time.
+"""
+
+import gzip
+import os
+import struct
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import nbtlib
+
+try:
+    import numpy
+except ImportError:  # numpy ships with nbtlib, but the codec must not depend on it
+    numpy = None
+
+try:
+    import rapidnbt
+except ImportError:
+    rapidnbt = None
+
+
+FORMAT_SPONGE = "sponge"
+FORMAT_MCEDIT = "mcedit"
+
+# NBT tag type IDs
+TAG_END, TAG_BYTE, TAG_SHORT, TAG_INT, TAG_LONG, TAG_FLOAT, TAG_DOUBLE = range(7)
+TAG_BYTE_ARRAY, TAG_STRING, TAG_LIST, TAG_COMPOUND, TAG_INT_ARRAY, TAG_LONG_ARRAY = range(7, 13)
+
+_FIXED_TAG_SIZES = {TAG_BYTE: 1, TAG_SHORT: 2, TAG_INT: 4, TAG_LONG: 8, TAG_FLOAT: 4, TAG_DOUBLE: 8}
+_ARRAY_ITEM_SIZES = {TAG_BYTE_ARRAY: 1, TAG_INT_ARRAY: 4, TAG_LONG_ARRAY: 8}
+
+
+class SchematicData:
+    """Decoded schematic contents with block arrays kept as raw bytes."""
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        length: int,
+        palette: Optional[Dict[int, str]] = None,
+        block_data: Optional[bytes] = None,
+        blocks: Optional[bytes] = None
+    ):
+        """Initialize schematic data.
+
+        Args:
+            width: Size along X
+            height: Size along Y
+            length: Size along Z
+            palette: Sponge palette index to block name
+            block_data: Sponge varint-encoded BlockData bytes
+            blocks: MCEdit legacy block ID bytes
+        """
+        self.width = width
+        self.height = height
+        self.length = length
+        self.palette = palette
+        self.block_data = block_data
+        self.blocks = blocks
+        self.format: Optional[str] = None
+        if palette is not None:
+            self.format = FORMAT_SPONGE
+        elif blocks is not None:
+            self.format = FORMAT_MCEDIT
+
+    @property
+    def is_modern(self) -> bool:
+        """Whether this is a Sponge schematic with a palette."""
+        return self.palette is not None and self.block_data is not None
+
+    @property
+    def is_legacy(self) -> bool:
+        """Whether this is an MCEdit schematic with numeric block IDs."""
+        return not self.is_modern and self.blocks is not None
+
+    @property
+    def volume(self) -> int:
+        """Number of voxels in the schematic."""
+        return self.width * self.height * self.length
+
+
+def as_byte_buffer(data) -> bytes:
+    """Return the raw unsigned bytes behind a ByteArray-like object.
+
+    Accepts bytes, bytearray, memoryview, nbtlib ByteArray (a signed int8
+    NumPy array) or any iterable of ints.
+
+    Args:
+        data: Byte buffer or sequence of byte values
+
+    Returns:
+        Immutable bytes object
+    """
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, bytearray):
+        return bytes(data)
+    try:
+        return memoryview(data).cast("B").tobytes()
+    except (TypeError, ValueError):
+        return bytes(b & 0xFF for b in data)
+
+
+def decode_varints(data, count: Optional[int] = None) -> Sequence[int]:
+    """Decode a whole varint-encoded BlockData buffer into palette indices.
+
+    When every byte is below 128 each byte is its own index and the buffer
+    is returned as-is. Otherwise the buffer is decoded in one pass, using
+    NumPy when it is available and a tight Python loop when it is not.
+
+    Args:
+        data: Raw BlockData bytes (bytes, ByteArray, memoryview, ...)
+        count: Expected number of indices, validated if given
+
+    Returns:
+        Sequence of palette indices (bytes or an int array)
+
+    Raises:
+        ValueError: If the buffer is truncated or the count does not match
+    """
+    buf = as_byte_buffer(data)
+
+    if not buf or max(buf) < 0x80:
+        indices = buf
+    elif numpy is not None:
+        indices = _decode_varints_numpy(buf)
+    else:
+        indices = _decode_varints_python(buf)
+
+    if count is not None and len(indices) != count:
+        raise ValueError(f"BlockData holds {len(indices)} entries, expected {count}")
+    return indices
+
+
+def _decode_varints_numpy(buf: bytes) -> array:
+    """Vectorised varint decoding for buffers containing multi-byte values."""
+    raw = numpy.frombuffer(buf, dtype=numpy.uint8)
+    if raw[-1] & 0x80:
+        raise ValueError("BlockData ends in the middle of a varint")
+
+    ends = numpy.flatnonzero(raw < 0x80)
+    starts = numpy.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+
+    values = (raw[starts] & 0x7F).astype(numpy.int64)
+    for k in range(1, int(lengths.max())):
+        mask = lengths > k
+        values[mask] |= (raw[starts[mask] + k] & 0x7F).astype(numpy.int64) << (7 * k)
+
+    # Keep the result compact: two bytes per voxel unless the palette is huge
+    if values.max() < 0x10000:
+        indices = array("H")
+        indices.frombytes(values.astype(numpy.uint16).tobytes())
+    else:
+        indices = array("i")
+        indices.frombytes(values.astype(numpy.int32).tobytes())
+    return indices
+
+
+def _decode_varints_python(buf: bytes) -> array:
+    """Tight-loop varint decoding used when NumPy is unavailable."""
+    indices = array("i")
+    append = indices.append
+    value = 0
+    shift = 0
+    for byte in buf:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            append(value)
+            value = 0
+            shift = 0
+    if shift:
+        raise ValueError("BlockData ends in the middle of a varint")
+    return indices
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode a single non-negative integer as a varint."""
+    result = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value != 0:
+            byte |= 0x80
+        result.append(byte)
+        if value == 0:
+            break
+    return bytes(result)
+
+
+def encode_varints(indices: Iterable[int]) -> bytes:
+    """Encode a sequence of palette indices as a varint BlockData buffer.
+
+    Indices below 128 are written directly; larger palettes encode each
+    distinct index once and join the cached encodings.
+
+    Args:
+        indices: Palette indices in YZX order
+
+    Returns:
+        Encoded BlockData bytes
+    """
+    if not isinstance(indices, (list, tuple, bytes, bytearray, array)):
+        indices = list(indices)
+    if not indices:
+        return b""
+    if max(indices) < 0x80:
+        if isinstance(indices, array) and indices.itemsize > 1:
+            return array("B", indices).tobytes()
+        return bytes(indices)
+
+    encoded = {value: encode_varint(value) for value in set(indices)}
+    return b"".join(map(encoded.__getitem__, indices))
+
+
+def translate_palette(
+    names: Dict[int, str],
+    translate: Callable[[str], Tuple[str, Any]],
+    size: int = 0
+) -> List[Tuple[str, Any]]:
+    """Translate every palette entry once and return a lookup table.
+
+    Args:
+        names: Mapping of palette index (or legacy ID) to block name
+        translate: Function returning (bedrock_name, data_value) for a name
+        size: Minimum table length; indices without a name map to air
+
+    Returns:
+        List indexed by palette index holding (bedrock_name, data_value)
+    """
+    size = max(size, max(names, default=-1) + 1)
+    air = translate("minecraft:air")
+    table = [air] * size
+    for index, name in names.items():
+        table[index] = translate(name)
+    return table
+
+
+def read_schematic(file_path: str) -> SchematicData:
+    """Read a gzipped .schem file, using rapidnbt when it is installed.
+
+    Args:
+        file_path: Path to the schematic file
+
+    Returns:
+        Decoded schematic data
+
+    Raises:
+        ValueError: If the file is missing the Width, Height or Length tags
+        Exception: If the file cannot be parsed as NBT
+    """
+    if rapidnbt is not None:
+        root = rapidnbt.nbtio.load(file_path)
+        if root is not None:
+            return _read_schematic_rapidnbt(root)
+    return _read_schematic_nbtlib(nbtlib.load(file_path, gzipped=True))
+
+
+def _read_schematic_rapidnbt(root) -> SchematicData:
+    """Build SchematicData from a rapidnbt root compound."""
+    schematic = root["Schematic"] if root.contains("Schematic") else root
+    if not all(schematic.contains(k) for k in ("Width", "Height", "Length")):
+        raise ValueError("Invalid schematic: Missing Width, Height, or Length tags.")
+
+    data = SchematicData(
+        int(schematic["Width"].value) & 0xFFFF,
+        int(schematic["Height"].value) & 0xFFFF,
+        int(schematic["Length"].value) & 0xFFFF
+    )
+    if schematic.contains("Palette") and schematic.contains("BlockData"):
+        data.palette = {int(v.value): str(k) for k, v in schematic["Palette"].items()}
+        data.block_data = schematic["BlockData"].get_byte_array()
+        data.format = FORMAT_SPONGE
+    elif schematic.contains("Blocks"):
+        data.blocks = schematic["Blocks"].get_byte_array()
+        data.format = FORMAT_MCEDIT
+    return data
+
+
+def _read_schematic_nbtlib(nbt_file) -> SchematicData:
+    """Build SchematicData from an nbtlib file."""
+    schematic = nbt_file.get("Schematic", nbt_file)  # Handle root tag being 'Schematic' or the data itself
+    if not all(k in schematic for k in ("Width", "Height", "Length")):
+        raise ValueError("Invalid schematic: Missing Width, Height, or Length tags.")
+
+    data = SchematicData(
+        int(schematic["Width"]) & 0xFFFF,
+        int(schematic["Height"]) & 0xFFFF,
+        int(schematic["Length"]) & 0xFFFF
+    )
+    if "Palette" in schematic and "BlockData" in schematic:
+        data.palette = {int(v): str(k) for k, v in schematic["Palette"].items()}
+        data.block_data = as_byte_buffer(schematic["BlockData"])
+        data.format = FORMAT_SPONGE
+    elif "Blocks" in schematic:
+        data.blocks = as_byte_buffer(schematic["Blocks"])
+        data.format = FORMAT_MCEDIT
+    return data
+
+
+class DecodedSchematic:
+    """Schematic reduced to a palette and a compact index array (YZX order)."""
+
+    def __init__(self, width: int, height: int, length: int, format: str, names: Dict[int, str], indices: Sequence[int]):
+        """Initialize decoded schematic.
+
+        Args:
+            width: Size along X
+            height: Size along Y
+            length: Size along Z
+            format: Source format (sponge or mcedit)
+            names: Index to block name (Sponge palette or legacy ID names)
+            indices: Palette index per voxel as bytes or an int array
+        """
+        self.width = width
+        self.height = height
+        self.length = length
+        self.format = format
+        self.names = names
+        self.indices = indices
+        self._counts: Optional[Dict[int, int]] = None
+
+    @property
+    def volume(self) -> int:
+        """Number of voxels in the schematic."""
+        return self.width * self.height * self.length
+
+    @property
+    def counts(self) -> Dict[int, int]:
+        """Number of voxels per palette index, computed once."""
+        if self._counts is None:
+            if numpy is not None and len(self.indices):
+                dtype = numpy.uint8 if isinstance(self.indices, (bytes, bytearray)) else numpy.dtype(self.indices.typecode)
+                histogram = numpy.bincount(numpy.frombuffer(self.indices, dtype=dtype))
+                self._counts = {int(i): int(histogram[i]) for i in numpy.flatnonzero(histogram)}
+            else:
+                self._counts = dict(Counter(self.indices))
+        return self._counts
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the decoded data."""
+        itemsize = getattr(self.indices, "itemsize", 1)
+        return len(self.indices) * itemsize + sum(64 + len(name) for name in self.names.values())
+
+    def iter_blocks(
+        self,
+        table: Sequence[Tuple[str, Any]],
+        origin: Tuple[int, int, int] = (0, 0, 0)
+    ) -> Iterator[Tuple[int, int, int, str, Any]]:
+        """Yield placed blocks one at a time without building a voxel list.
+
+        Args:
+            table: Translated palette from translate_palette
+            origin: Offset added to every (x, y, z)
+
+        Yields:
+            Tuples of (x, y, z, block_name, data_value)
+        """
+        width, indices = self.width, self.indices
+        ox, oy, oz = origin
+        i = 0
+        for y in range(oy, oy + self.height):
+            for z in range(oz, oz + self.length):
+                row = indices[i:i + width]
+                i += width
+                for x, index in enumerate(row, ox):
+                    name, data = table[index]
+                    yield x, y, z, name, data
+
+    def positions_by_group(self, groups: Sequence[Any], wanted: Iterable[Any]) -> Dict[Any, array]:
+        """Collect the voxel positions of each group of palette indices.
+
+        This scans the whole volume once, so it belongs on a worker thread;
+        iter_positions then costs the same per block however sparse a group is.
+
+        Args:
+            groups: Group (e.g. placement category) per palette index
+            wanted: Groups to collect; voxels in other groups are dropped
+
+        Returns:
+            Group to flat YZX voxel positions, in ascending order
+        """
+        wanted = set(wanted)
+        if numpy is not None and len(self.indices):
+            dtype = numpy.uint8 if isinstance(self.indices, (bytes, bytearray)) else numpy.dtype(self.indices.typecode)
+            codes = {group: code for code, group in enumerate(wanted)}
+            lookup = numpy.array([codes.get(group, -1) for group in groups], dtype=numpy.int32)
+            per_voxel = lookup[numpy.frombuffer(self.indices, dtype=dtype)]
+            result = {}
+            for group, code in codes.items():
+                positions = array("I")
+                positions.frombytes(numpy.flatnonzero(per_voxel == code).astype(numpy.uint32).tobytes())
+                result[group] = positions
+            return result
+
+        result = {group: array("I") for group in wanted}
+        appends = [result[group].append if group in wanted else None for group in groups]
+        for position, index in enumerate(self.indices):
+            append = appends[index]
+            if append is not None:
+                append(position)
+        return result
+
+    def iter_positions(
+        self,
+        table: Sequence[Tuple[str, Any]],
+        positions: Iterable[int],
+        origin: Tuple[int, int, int] = (0, 0, 0)
+    ) -> Iterator[Tuple[int, int, int, str, Any]]:
+        """Yield the blocks at flat YZX voxel positions (see positions_by_group).
+
+        Args:
+            table: Translated palette from translate_palette
+            positions: Flat voxel positions
+            origin: Offset added to every (x, y, z)
+
+        Yields:
+            Tuples of (x, y, z, block_name, data_value)
+        """
+        width, indices = self.width, self.indices
+        layer = width * self.length
+        ox, oy, oz = origin
+        for position in positions:
+            y, rest = divmod(position, layer)
+            z, x = divmod(rest, width)
+            name, data = table[indices[position]]
+            yield ox + x, oy + y, oz + z, name, data
+
+
+def decode_schematic(data: SchematicData, legacy_names: Optional[Dict[int, str]] = None) -> DecodedSchematic:
+    """Decode the block arrays of a schematic into a DecodedSchematic.
+
+    Args:
+        data: Schematic read by read_schematic
+        legacy_names: Legacy block ID to block name, used for MCEdit files
+
+    Returns:
+        Decoded schematic
+
+    Raises:
+        ValueError: If the format is unsupported or BlockData is malformed
+    """
+    if data.is_modern:
+        indices = decode_varints(data.block_data, count=data.volume)
+        return DecodedSchematic(data.width, data.height, data.length, FORMAT_SPONGE, dict(data.palette), indices)
+    if data.is_legacy:
+        if len(data.blocks) < data.volume:
+            raise ValueError(f"Blocks holds {len(data.blocks)} entries, expected {data.volume}")
+        legacy_names = legacy_names or {}
+        names = {block_id: legacy_names.get(block_id, "minecraft:air") for block_id in set(data.blocks)}
+        return DecodedSchematic(data.width, data.height, data.length, FORMAT_MCEDIT, names, data.blocks[:data.volume])
+    raise ValueError("Unsupported schematic format. Missing Palette/BlockData or Blocks tags.")
+
+
+def load_schematic(file_path: str, legacy_names: Optional[Dict[int, str]] = None) -> DecodedSchematic:
+    """Read and decode a schematic file in one step.
+
+    This is a module-level function so it can be run in a worker process.
+
+    Args:
+        file_path: Path to the schematic file
+        legacy_names: Legacy block ID to block name, used for MCEdit files
+
+    Returns:
+        Decoded schematic
+    """
+    decoded = decode_schematic(read_schematic(file_path), legacy_names)
+    decoded.counts  # Build the histogram here so callers on the main thread get it for free
+    return decoded
+
+
+def read_schematic_header(file_path: str, include_palette: bool = False) -> SchematicData:
+    """Read only the dimensions (and optionally the palette) of a .schem file.
+
+    The gzip stream is parsed tag by tag and abandoned as soon as the
+    requested tags have been seen, so files written header-first cost a
+    few KB of I/O regardless of their size.
+
+    Args:
+        file_path: Path to the schematic file
+        include_palette: Whether to also read the Sponge palette
+
+    Returns:
+        SchematicData with dimensions and format but no block arrays
+
+    Raises:
+        ValueError: If the file is not an NBT compound or lacks dimensions
+        OSError: If the file cannot be read or decompressed
+    """
+    with gzip.open(file_path, "rb") as stream:
+        reader = _NbtHeaderReader(stream, include_palette)
+        if reader.read_byte() != TAG_COMPOUND:
+            raise ValueError("Invalid schematic: Root tag is not a compound.")
+        reader.read_string()
+        reader.read_compound(root=True)
+
+    if reader.dims.keys() != {"Width", "Height", "Length"}:
+        raise ValueError("Invalid schematic: Missing Width, Height, or Length tags.")
+
+    data = SchematicData(reader.dims["Width"], reader.dims["Height"], reader.dims["Length"])
+    data.format = reader.format
+    if include_palette:
+        data.palette = reader.palette
+    return data
+
+
+class _StopReading(Exception):
+    """Raised internally once every requested header tag has been read."""
+
+
+class _NbtHeaderReader:
+    """Minimal big-endian NBT reader that skips everything but header tags."""
+
+    def __init__(self, stream, include_palette: bool):
+        self.stream = stream
+        self.include_palette = include_palette
+        self.dims: Dict[str, int] = {}
+        self.palette: Optional[Dict[int, str]] = None
+        self.format: Optional[str] = None
+
+    def done(self) -> bool:
+        """Whether all requested tags have been read."""
+        if len(self.dims) < 3 or self.format is None:
+            return False
+        return not (self.include_palette and self.format == FORMAT_SPONGE and self.palette is None)
+
+    def read(self, size: int) -> bytes:
+        data = self.stream.read(size)
+        if len(data) != size:
+            raise ValueError("Invalid schematic: Unexpected end of file.")
+        return data
+
+    def read_byte(self) -> int:
+        return self.read(1)[0]
+
+    def read_int(self) -> int:
+        return struct.unpack(">i", self.read(4))[0]
+
+    def read_string(self) -> str:
+        length = struct.unpack(">H", self.read(2))[0]
+        return self.read(length).decode("utf-8", errors="replace")
+
+    def skip(self, size: int) -> None:
+        if size > 0:
+            self.stream.seek(size, 1)
+
+    def skip_payload(self, tag_type: int) -> None:
+        if tag_type in _FIXED_TAG_SIZES:
+            self.skip(_FIXED_TAG_SIZES[tag_type])
+        elif tag_type in _ARRAY_ITEM_SIZES:
+            self.skip(self.read_int() * _ARRAY_ITEM_SIZES[tag_type])
+        elif tag_type == TAG_STRING:
+            self.skip(struct.unpack(">H", self.read(2))[0])
+        elif tag_type == TAG_LIST:
+            item_type = self.read_byte()
+            count = self.read_int()
+            if item_type in _FIXED_TAG_SIZES:
+                self.skip(count * _FIXED_TAG_SIZES[item_type])
+            else:
+                for _ in range(count):
+                    self.skip_payload(item_type)
+        elif tag_type == TAG_COMPOUND:
+            while True:
+                child_type = self.read_byte()
+                if child_type == TAG_END:
+                    return
+                self.skip(struct.unpack(">H", self.read(2))[0])
+                self.skip_payload(child_type)
+        else:
+            raise ValueError(f"Invalid schematic: Unknown tag type {tag_type}.")
+
+    def read_compound(self, root: bool = False) -> None:
+        """Read a schematic compound, collecting header tags and skipping the rest."""
+        try:
+            while True:
+                tag_type = self.read_byte()
+                if tag_type == TAG_END:
+                    return
+                name = self.read_string()
+
+                if root and name == "Schematic" and tag_type == TAG_COMPOUND:
+                    self.read_compound()
+                elif name in ("Width", "Height", "Length") and tag_type in (TAG_SHORT, TAG_INT):
+                    if tag_type == TAG_SHORT:
+                        self.dims[name] = struct.unpack(">H", self.read(2))[0]
+                    else:
+                        self.dims[name] = self.read_int()
+                elif name == "Palette" and tag_type == TAG_COMPOUND:
+                    self.format = FORMAT_SPONGE
+                    if self.include_palette:
+                        self.palette = self.read_palette()
+                    else:
+                        self.skip_payload(tag_type)
+                elif name == "BlockData" and tag_type == TAG_BYTE_ARRAY:
+                    self.format = FORMAT_SPONGE
+                    self.skip_payload(tag_type)
+                elif name == "Blocks" and tag_type == TAG_BYTE_ARRAY:
+                    if self.format is None:
+                        self.format = FORMAT_MCEDIT
+                    self.skip_payload(tag_type)
+                else:
+                    self.skip_payload(tag_type)
+
+                if self.done():
+                    raise _StopReading()
+        except _StopReading:
+            if not root:
+                raise
+
+    def read_palette(self) -> Dict[int, str]:
+        palette = {}
+        while True:
+            tag_type = self.read_byte()
+            if tag_type == TAG_END:
+                return palette
+            name = self.read_string()
+            if tag_type == TAG_INT:
+                palette[self.read_int()] = name
+            else:
+                self.skip_payload(tag_type)
+
+
+def _nbt_name(tag_type: int, name: str) -> bytes:
+    """Encode a named tag header."""
+    encoded = name.encode("utf-8")
+    return struct.pack(">bH", tag_type, len(encoded)) + encoded
+
+
+def write_schematic(
+    file_path: str,
+    width: int,
+    height: int,
+    length: int,
+    palette: Dict[str, int],
+    block_data: bytes
+) -> None:
+    """Write a gzipped Sponge v2 .schem file.
+
+    Tags are written header-first (dimensions and palette before BlockData)
+    so read_schematic_header can stop reading early. The payload is a
+    single byte array, so the file is serialized directly. The file is
+    written to a temporary path and renamed into place.
+
+    Args:
+        file_path: Destination path
+        width: Size along X
+        height: Size along Y
+        length: Size along Z
+        palette: Block name to palette index
+        block_data: Varint-encoded BlockData bytes
+
+    Raises:
+        OSError: If the file could not be written
+    """
+    parts = [_nbt_name(TAG_COMPOUND, ""), _nbt_name(TAG_COMPOUND, "Schematic")]
+    for key, value in (("Width", width), ("Height", height), ("Length", length)):
+        parts.append(_nbt_name(TAG_SHORT, key) + struct.pack(">H", value))
+
+    parts.append(_nbt_name(TAG_COMPOUND, "Palette"))
+    for name, index in palette.items():
+        parts.append(_nbt_name(TAG_INT, name) + struct.pack(">i", index))
+    parts.append(bytes([TAG_END]))
+
+    parts.append(_nbt_name(TAG_BYTE_ARRAY, "BlockData") + struct.pack(">i", len(block_data)))
+    parts.append(bytes(block_data))
+    for key in ("Entities", "TileEntities"):
+        parts.append(_nbt_name(TAG_LIST, key) + struct.pack(">bi", TAG_COMPOUND, 0))
+    parts.append(bytes([TAG_END, TAG_END]))
+
+    # Write next to the destination and swap it in, so readers never see a partial file
+    tmp_path = file_path + ".tmp"
+    try:
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            f.writelines(parts)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_schematic(
+    file_path: str,
+    width: int,
+    height: int,
+    length: int,
+    palette: Dict[str, int],
+    indices: Sequence[int]
+) -> int:
+    """Encode palette indices and write a .schem file in one step.
+
+    This is a module-level function so it can run in a worker.
+
+    Args:
+        file_path: Destination path
+        width: Size along X
+        height: Size along Y
+        length: Size along Z
+        palette: Block name to palette index
+        indices: Palette indices in YZX order
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        OSError: If the file could not be written
+    """
+    write_schematic(file_path, width, height, length, palette, encode_varints(indices))
+    return os.path.getsize(file_path)
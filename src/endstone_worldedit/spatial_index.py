@@ -0,0 +1,324 @@
+"""
+Spatial index for cuboid regions.
+Regions are bucketed by the 16x16 chunk columns they cover, per world, so
+point and box queries only test the few regions registered in the chunks
+they touch instead of every region.
+"""
+
+import math
+from bisect import bisect_right
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+Bounds = Tuple[Tuple[int, int, int], Tuple[int, int, int]]
+
+
+def box_intersection(a: Bounds, b: Bounds) -> Optional[Bounds]:
+    """Intersect two inclusive integer boxes.
+
+    Args:
+        a: First box as (min corner, max corner)
+        b: Second box as (min corner, max corner)
+
+    Returns:
+        The overlapping box, or None if they do not overlap
+    """
+    low = tuple(max(a[0][axis], b[0][axis]) for axis in range(3))
+    high = tuple(min(a[1][axis], b[1][axis]) for axis in range(3))
+    if any(low[axis] > high[axis] for axis in range(3)):
+        return None
+    return low, high
+
+
+def box_subtract(box: Bounds, cutter: Bounds) -> List[Bounds]:
+    """Remove one inclusive integer box from another.
+
+    Args:
+        box: Box to cut, as (min corner, max corner)
+        cutter: Box to remove
+
+    Returns:
+        Up to six disjoint boxes covering what is left of box
+    """
+    overlap = box_intersection(box, cutter)
+    if overlap is None:
+        return [box]
+    pieces = []
+    low, high = list(box[0]), list(box[1])
+    for axis in range(3):
+        # Slabs of the remainder below and above the overlap on this axis
+        if low[axis] < overlap[0][axis]:
+            piece_high = list(high)
+            piece_high[axis] = overlap[0][axis] - 1
+            pieces.append((tuple(low), tuple(piece_high)))
+        if high[axis] > overlap[1][axis]:
+            piece_low = list(low)
+            piece_low[axis] = overlap[1][axis] + 1
+            pieces.append((tuple(piece_low), tuple(high)))
+        # Later axes only split what lies inside the overlap on this one
+        low[axis], high[axis] = overlap[0][axis], overlap[1][axis]
+    return pieces
+
+
+def box_difference(box: Bounds, cutters: Iterable[Bounds]) -> List[Bounds]:
+    """Find the parts of a box not covered by any of several boxes.
+
+    Runs in time proportional to the number of cutters (and pieces left),
+    independent of the box's volume.
+
+    Args:
+        box: Box to test, as (min corner, max corner)
+        cutters: Covering boxes
+
+    Returns:
+        Disjoint boxes covering the uncovered parts (empty if fully covered)
+    """
+    remaining = [box]
+    for cutter in cutters:
+        remaining = [piece for part in remaining for piece in box_subtract(part, cutter)]
+        if not remaining:
+            break
+    return remaining
+
+
+class ClipMask:
+    """Restricts block changes to a union of allowed boxes.
+
+    Changes are tested a run at a time: the allowed intervals of a line of
+    blocks are worked out once from the boxes, so consecutive changes along
+    the line cost a range check each. Lines along z (XYZ-ordered edits) and
+    along x (YZX-ordered schematic and clipboard streams) are both tracked.
+    """
+
+    def __init__(self, boxes: Iterable[Bounds]):
+        """Initialize mask.
+
+        Args:
+            boxes: Allowed inclusive boxes as (min corner, max corner)
+        """
+        self.boxes = [(tuple(low), tuple(high)) for low, high in boxes]
+        self.skipped = 0
+
+    @staticmethod
+    def _merge(intervals: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+        """Merge inclusive intervals into sorted, disjoint (starts, ends) lists."""
+        starts: List[int] = []
+        ends: List[int] = []
+        for low, high in sorted(intervals):
+            if ends and low <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], high)
+            else:
+                starts.append(low)
+                ends.append(high)
+        return starts, ends
+
+    def _intervals(self, x: int, y: int) -> Tuple[List[int], List[int]]:
+        """Get the allowed z intervals of one (x, y) line."""
+        return self._merge([
+            (low[2], high[2]) for low, high in self.boxes
+            if low[0] <= x <= high[0] and low[1] <= y <= high[1]
+        ])
+
+    def _x_intervals(self, y: int, z: int) -> Tuple[List[int], List[int]]:
+        """Get the allowed x intervals of one (y, z) line."""
+        return self._merge([
+            (low[0], high[0]) for low, high in self.boxes
+            if low[1] <= y <= high[1] and low[2] <= z <= high[2]
+        ])
+
+    def clip(self, blocks: Iterable[Tuple]) -> Iterator[Tuple]:
+        """Drop the changes outside the allowed boxes.
+
+        Args:
+            blocks: Block change tuples of (x, y, z, ...)
+
+        Returns:
+            Iterator over the allowed changes, in their original order;
+            skipped counts the rest
+        """
+        z_line = x_line = None
+        z_intervals = x_intervals = ([], [])
+        previous = None
+        for block in blocks:
+            x, y, z = math.floor(block[0]), math.floor(block[1]), math.floor(block[2])
+            if (x, y) == z_line:
+                value, intervals = z, z_intervals
+            elif (y, z) == x_line:
+                value, intervals = x, x_intervals
+            elif previous is not None and previous[1] == y and previous[2] == z:
+                # Stepped along x from the previous change: follow the x line
+                x_line = (y, z)
+                x_intervals = self._x_intervals(y, z)
+                value, intervals = x, x_intervals
+            else:
+                z_line = (x, y)
+                z_intervals = self._intervals(x, y)
+                value, intervals = z, z_intervals
+            previous = (x, y, z)
+
+            starts, ends = intervals
+            i = bisect_right(starts, value) - 1
+            if i >= 0 and value <= ends[i]:
+                yield block
+            else:
+                self.skipped += 1
+
+
+class ChunkGridIndex:
+    """Chunk-grid hash of axis-aligned boxes keyed by an arbitrary id."""
+
+    CHUNK_SHIFT = 4
+    # Regions covering more chunk columns than this are kept in a per-world
+    # list instead, so huge regions do not flood the grid
+    MAX_CELLS = 4096
+
+    def __init__(self):
+        """Initialize index."""
+        self._cells: Dict[Tuple[str, int, int], Set[Hashable]] = {}
+        self._large: Dict[str, Set[Hashable]] = {}
+        self._entries: Dict[Hashable, Tuple[str, Bounds, int]] = {}
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _columns(self, bounds: Bounds):
+        """Get the chunk column ranges covered by a box."""
+        (min_x, _, min_z), (max_x, _, max_z) = bounds
+        shift = self.CHUNK_SHIFT
+        return (range(math.floor(min_x) >> shift, (math.floor(max_x) >> shift) + 1),
+                range(math.floor(min_z) >> shift, (math.floor(max_z) >> shift) + 1))
+
+    def insert(self, key: Hashable, world: str, min_pos: Tuple[int, int, int], max_pos: Tuple[int, int, int]) -> None:
+        """Add a region, replacing any region with the same key.
+
+        Args:
+            key: Region id
+            world: World (dimension) name
+            min_pos: Minimum corner (x, y, z), inclusive
+            max_pos: Maximum corner (x, y, z), inclusive
+        """
+        if key in self._entries:
+            self.remove(key)
+        bounds = (tuple(min_pos), tuple(max_pos))
+        self._entries[key] = (world, bounds, self._sequence)
+        self._sequence += 1
+
+        xs, zs = self._columns(bounds)
+        if len(xs) * len(zs) > self.MAX_CELLS:
+            self._large.setdefault(world, set()).add(key)
+            return
+        for cx in xs:
+            for cz in zs:
+                self._cells.setdefault((world, cx, cz), set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a region if present.
+
+        Args:
+            key: Region id
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        world, bounds, _ = entry
+        large = self._large.get(world)
+        if large is not None and key in large:
+            large.discard(key)
+            return
+        xs, zs = self._columns(bounds)
+        for cx in xs:
+            for cz in zs:
+                cell = self._cells.get((world, cx, cz))
+                if cell is not None:
+                    cell.discard(key)
+                    if not cell:
+                        del self._cells[(world, cx, cz)]
+
+    def clear(self) -> None:
+        """Remove every region."""
+        self._cells.clear()
+        self._large.clear()
+        self._entries.clear()
+
+    def _ordered(self, keys) -> List[Hashable]:
+        """Sort keys by insertion order."""
+        entries = self._entries
+        return sorted(keys, key=lambda key: entries[key][2])
+
+    def query_point(self, world: str, x: float, y: float, z: float) -> List[Hashable]:
+        """Find the regions containing a point.
+
+        Args:
+            world: World (dimension) name
+            x: X coordinate
+            y: Y coordinate
+            z: Z coordinate
+
+        Returns:
+            Region ids in insertion order
+        """
+        shift = self.CHUNK_SHIFT
+        candidates = self._cells.get((world, math.floor(x) >> shift, math.floor(z) >> shift), ())
+        large = self._large.get(world, ())
+        entries = self._entries
+        found = []
+        for group in (candidates, large):
+            for key in group:
+                (min_x, min_y, min_z), (max_x, max_y, max_z) = entries[key][1]
+                if min_x <= x <= max_x and min_y <= y <= max_y and min_z <= z <= max_z:
+                    found.append(key)
+        return self._ordered(found) if len(found) > 1 else found
+
+    def query_column(self, world: str, x: float, z: float) -> List[Hashable]:
+        """Find the regions that may contain points in a point's chunk column.
+
+        Callers can keep this (small) candidate list while a point stays in
+        the same column and test containment themselves.
+
+        Args:
+            world: World (dimension) name
+            x: X coordinate
+            z: Z coordinate
+
+        Returns:
+            Region ids in insertion order
+        """
+        shift = self.CHUNK_SHIFT
+        candidates = set(self._cells.get((world, math.floor(x) >> shift, math.floor(z) >> shift), ()))
+        candidates.update(self._large.get(world, ()))
+        return self._ordered(candidates)
+
+    def query_box(self, world: str, min_pos: Tuple[float, float, float], max_pos: Tuple[float, float, float]) -> List[Hashable]:
+        """Find the regions intersecting a box.
+
+        Args:
+            world: World (dimension) name
+            min_pos: Minimum corner (x, y, z), inclusive
+            max_pos: Maximum corner (x, y, z), inclusive
+
+        Returns:
+            Region ids in insertion order
+        """
+        xs, zs = self._columns((min_pos, max_pos))
+        candidates: Set[Hashable] = set(self._large.get(world, ()))
+        if len(xs) * len(zs) > len(self._cells):
+            # Box spans more columns than are occupied; walk the occupied ones
+            for (cell_world, cx, cz), keys in self._cells.items():
+                if cell_world == world and cx in xs and cz in zs:
+                    candidates.update(keys)
+        else:
+            for cx in xs:
+                for cz in zs:
+                    candidates.update(self._cells.get((world, cx, cz), ()))
+
+        found = []
+        for key in candidates:
+            (min_x, min_y, min_z), (max_x, max_y, max_z) = self._entries[key][1]
+            if (min_x <= max_pos[0] and max_x >= min_pos[0] and
+                    min_y <= max_pos[1] and max_y >= min_pos[1] and
+                    min_z <= max_pos[2] and max_z >= min_pos[2]):
+                found.append(key)
+        return self._ordered(found)
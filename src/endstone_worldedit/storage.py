@@ -39,12 +39,15 @@ class BlockData:
             data.get("nbt")
         )
     
+    def _key(self) -> Tuple[str, int, str]:
+        """Get the identity of this block, including its NBT (block states)."""
+        return (self.block_type, self.data, json.dumps(self.nbt, sort_keys=True) if self.nbt else "")
+
     def __eq__(self, other: object) -> bool:
         """Check equality."""
         if not isinstance(other, BlockData):
             return False
-        return (self.block_type == other.block_type and 
-                self.data == other.data)
+        return self is other or self._key() == other._key()
     
     def __hash__(self) -> int:
         """Get hash."""
@@ -144,6 +147,9 @@ class BlueprintMetadata:
         self.created_at = datetime.now().isoformat()
         self.dimensions: Tuple[int, int, int] = (0, 0, 0)
         self.block_count = 0
+        self.tags: List[str] = []
+        self.file_size = 0
+        self.version = 1
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
@@ -154,6 +160,9 @@ class BlueprintMetadata:
             "createdAt": self.created_at,
             "dimensions": self.dimensions,
             "blockCount": self.block_count,
+            "tags": self.tags,
+            "fileSize": self.file_size,
+            "version": self.version,
         }
     
     @staticmethod
@@ -167,5 +176,8 @@ class BlueprintMetadata:
         meta.created_at = data.get("createdAt", meta.created_at)
         meta.dimensions = tuple(data.get("dimensions", (0, 0, 0)))
         meta.block_count = data.get("blockCount", 0)
+        meta.tags = list(data.get("tags", []))
+        meta.file_size = data.get("fileSize", 0)
+        meta.version = data.get("version", 1)
         return meta
 
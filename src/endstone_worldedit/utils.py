@@ -1,5 +1,8 @@
+import math
 from functools import wraps
 from endstone import Player
+from .block_translation import block_translator
+from .block_categories import block_categories
 
 # A simplified mapping for common blocks. A full implementation would be much larger.
 BEDROCK_TO_LEGACY_ID = {
@@ -93,35 +96,92 @@ BEDROCK_TO_LEGACY_ID = {
 
 LEGACY_ID_TO_BEDROCK_NAME = {v: k for k, v in BEDROCK_TO_LEGACY_ID.items()}
 
-def translate_block_name(plugin, java_name: str) -> tuple[str, int | None]:
+def translate_block_name(plugin, java_name: str) -> tuple[str, object | None]:
     """
-    Translates a Java Edition block name to its Bedrock Edition equivalent,
-    returning a tuple of (bedrock_name, data_value).
+    Translates a Java Edition block name (optionally with [prop=val] states)
+    to its Bedrock Edition equivalent, returning a tuple of (bedrock_name, data_value).
+    Translations are memoized by the shared block_translator.
     """
-    base_name = java_name.split('[')[0].replace("minecraft:", "")
-
-    # 1. Check the direct mapping from config.json
-    if base_name in plugin.block_translation_map:
-        return f"minecraft:{plugin.block_translation_map[base_name]}", None
-    
-    # 2. Handle general patterns first
-    if "potted_" in base_name:
-        return "minecraft:flower_pot", None
-    if "_bed" in base_name:
-        return "minecraft:bed", None # Data value for color is needed for BE
-    if "_banner" in base_name:
-        if "wall" in base_name:
-            return "minecraft:wall_banner", None
-        return "minecraft:standing_banner", None
-    if "sign" in base_name:
-        if "wall" in base_name:
-            return "minecraft:wall_sign", None
-        return "minecraft:standing_sign", None
-
-    # 3. Return original name if no translation is found
-    return f"minecraft:{base_name}", None
-
-def command_executor(command_name, selection_required=False, area_check=True):
+    block_name, states = block_translator.translate(java_name, plugin.block_translation_map)
+    return block_name, resolve_block_data(plugin, block_name, states)
+
+def resolve_block_data(plugin, block_name: str, states: dict | None):
+    """Create Bedrock block data for translated block states, or None if unsupported."""
+    if not states:
+        return None
+    try:
+        return plugin.server.create_block_data(block_name, states)
+    except Exception:
+        return None
+
+def edit_clip_mask(plugin, player_uuid, dimension):
+    """Get the clip mask confining a player's edits to their build areas and zones.
+
+    Args:
+        plugin: Plugin instance
+        player_uuid: Player who owns the edit
+        dimension: Dimension being edited
+
+    Returns:
+        ClipMask, or None if the player's edits are not restricted
+    """
+    build_areas = plugin.plugin_config.get("build_areas", {})
+    if not build_areas.get("enabled", True) or not build_areas.get("restrict_non_operators", True):
+        return None
+    player = plugin.server.get_player(player_uuid)
+    if player is None or player.is_op:
+        return None
+    return plugin.permissions.get_clip_mask(player.name, dimension.name)
+
+
+def queue_placement(plugin, player_uuid, dimension, blocks, block_count: int, complete_message: str) -> bool:
+    """Place blocks through the job engine in dependency order.
+
+    The previous state of each block is recorded into a new undo entry as
+    it is replaced. Changes outside a restricted player's build areas are
+    dropped. Jobs up to async-threshold blocks finish immediately; larger
+    ones continue over the following ticks.
+
+    Args:
+        plugin: Plugin instance
+        player_uuid: Player who owns the edit
+        dimension: Dimension to edit
+        blocks: Block change tuples, or an iterator already in placement order
+        block_count: Number of blocks in the edit
+        complete_message: Message sent on completion; {count} is replaced by blocks placed
+
+    Returns:
+        True if the job continues asynchronously
+    """
+    clip_mask = edit_clip_mask(plugin, player_uuid, dimension)
+    if clip_mask is not None:
+        if isinstance(blocks, (list, tuple)):
+            blocks = list(clip_mask.clip(blocks))
+            block_count = len(blocks)
+        else:
+            # Streamed jobs are clipped lazily as they are consumed
+            blocks = clip_mask.clip(blocks)
+    if isinstance(blocks, (list, tuple)):
+        blocks = block_categories.order_for_placement(blocks)
+
+    undo_entry = []
+    if player_uuid not in plugin.undo_history:
+        plugin.undo_history[player_uuid] = []
+    plugin.undo_history[player_uuid].append(undo_entry)
+    plugin.redo_history[player_uuid] = []
+
+    task_info = {"dimension": dimension, "blocks": blocks, "undo": undo_entry, "complete_message": complete_message}
+    if clip_mask is not None:
+        task_info["clip"] = clip_mask
+    threshold = plugin.plugin_config["async-threshold"]
+    if block_count > threshold:
+        plugin.tasks[player_uuid] = task_info
+        return True
+    plugin.process_task(player_uuid, task_info, block_count + 1)
+    return False
+
+
+def command_executor(command_name, selection_required=False, area_check=True, clip_to_areas=False):
     def decorator(func):
         @wraps(func)
         def wrapper(plugin, sender, args):
@@ -157,21 +217,28 @@ def command_executor(command_name, selection_required=False, area_check=True):
                                 pos2 = plugin.selections[player_uuid].get('pos2')
 
                                 if pos1 and pos2:
-                                    # Check both corners of selection
-                                    can_build_pos1 = plugin.build_area_manager.can_build_at(
-                                        sender.name, world, pos1[0], pos1[1], pos1[2], sender.is_op
-                                    )
-                                    can_build_pos2 = plugin.build_area_manager.can_build_at(
-                                        sender.name, world, pos2[0], pos2[1], pos2[2], sender.is_op
+                                    # The whole selection must be covered by the player's areas and zones
+                                    uncovered = plugin.permissions.get_uncovered_parts(
+                                        sender.name, world, pos1, pos2, sender.is_op
                                     )
 
-                                    if not (can_build_pos1 and can_build_pos2):
-                                        sender.send_message("§cYou can only use this command in your assigned build areas.§r")
-                                        sender.send_message("§7Use §e/myareas§7 to see your build areas.§r")
-                                        return False
+                                    if uncovered:
+                                        outside = sum(
+                                            (high[0] - low[0] + 1) * (high[1] - low[1] + 1) * (high[2] - low[2] + 1)
+                                            for low, high in uncovered
+                                        )
+                                        volume = 1
+                                        for axis in range(3):
+                                            volume *= abs(math.floor(pos2[axis]) - math.floor(pos1[axis])) + 1
+                                        # Edits placed through queue_placement are clipped, so a partial overlap is enough
+                                        if not clip_to_areas or outside >= volume:
+                                            sender.send_message("§cYou can only use this command in your assigned build areas.§r")
+                                            sender.send_message(f"§7{outside:,} blocks of your selection are outside them. Use §e/myareas§7 to see your build areas.§r")
+                                            return False
+                                        sender.send_message(f"§e{outside:,} blocks of your selection are outside your build areas and will be skipped.§r")
                             else:
                                 # For location-based commands, check current location
-                                if not plugin.build_area_manager.can_build_at(
+                                if not plugin.permissions.can_build_at(
                                     sender.name, world, location.x, location.y, location.z, sender.is_op
                                 ):
                                     sender.send_message("§cYou can only use this command in your assigned build areas.§r")
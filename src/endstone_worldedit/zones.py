@@ -1,9 +1,18 @@
-"""Builder zone management for WorldEdit."""
+"""Builder zone management for WorldEdit.
 
+Zones are persisted as a snapshot plus an append-only log of changes, indexed
+by chunk column per dimension, and expired from a min-heap of expiry times.
+"""
+
+import heapq
+import json
+import os
 from datetime import datetime, timedelta
-from typing import Optional, List, Set, Tuple
+from typing import Dict, Optional, List, Set, Tuple
 from dataclasses import dataclass, field
 
+from .spatial_index import ChunkGridIndex
+
 
 @dataclass
 class BuilderZone:
@@ -94,14 +103,166 @@ class BuilderZone:
         z = (self.min_pos[2] + self.max_pos[2]) // 2
         return (x, y, z)
 
+    def to_dict(self) -> dict:
+        """Convert zone to dictionary.
+
+        Returns:
+            Dictionary representation
+        """
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "min_pos": list(self.min_pos),
+            "max_pos": list(self.max_pos),
+            "dimension": self.dimension,
+            "created_at": self.created_at.isoformat(),
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "shared_with": sorted(self.shared_with)
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BuilderZone":
+        """Create zone from dictionary.
+
+        Args:
+            data: Dictionary data
+
+        Returns:
+            BuilderZone instance
+        """
+        expires_at = data.get("expires_at")
+        return cls(
+            name=data["name"],
+            owner=data["owner"],
+            min_pos=tuple(data["min_pos"]),
+            max_pos=tuple(data["max_pos"]),
+            dimension=data["dimension"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            expires_at=datetime.fromisoformat(expires_at) if expires_at else None,
+            shared_with=set(data.get("shared_with", []))
+        )
+
 
 class ZoneManager:
     """Manages builder zones."""
-    
-    def __init__(self):
-        """Initialize zone manager."""
-        self.zones: List[BuilderZone] = []
-    
+
+    SNAPSHOT_FILE = "zones.json"
+    LOG_FILE = "zones.log"
+    # The log is folded into the snapshot once it has this many entries
+    # (or as many as there are zones, if more)
+    COMPACT_MIN_ENTRIES = 256
+
+    def __init__(self, data_folder: Optional[str] = None):
+        """Initialize zone manager.
+
+        Args:
+            data_folder: Directory for the zone snapshot and log (None = in memory only)
+        """
+        self.zones: Dict[str, BuilderZone] = {}  # Lowercase name -> zone
+        self.index = ChunkGridIndex()
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._expiry_sequence = 0
+        # Bumped on every change to zones or their builders so cached decisions can be invalidated
+        self.generation = 0
+        self.data_folder = data_folder
+        self._log_entries = 0
+        if data_folder is not None:
+            os.makedirs(data_folder, exist_ok=True)
+            self._load()
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.data_folder, self.SNAPSHOT_FILE)
+
+    def _log_path(self) -> str:
+        return os.path.join(self.data_folder, self.LOG_FILE)
+
+    def _load(self) -> None:
+        """Load the snapshot, replay the log over it, then compact."""
+        try:
+            if os.path.exists(self._snapshot_path()):
+                with open(self._snapshot_path(), "r") as f:
+                    for zone_data in json.load(f):
+                        self._add(BuilderZone.from_dict(zone_data))
+        except Exception as e:
+            print(f"[WorldEdit] Error loading zones: {e}")
+
+        if os.path.exists(self._log_path()):
+            with open(self._log_path(), "r") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        self._apply(json.loads(line))
+                    except Exception as e:
+                        # A torn last line from a crash mid-append is expected; skip it
+                        print(f"[WorldEdit] Skipping zone log entry {line_number}: {e}")
+
+        self.purge_expired()
+        self.compact()
+
+    def _apply(self, entry: dict) -> None:
+        """Replay one log entry (every operation is idempotent)."""
+        op = entry["op"]
+        if op == "create":
+            self._add(BuilderZone.from_dict(entry["zone"]))
+        elif op == "delete":
+            self._discard(entry["name"])
+        elif op in ("add_builder", "remove_builder"):
+            zone = self.zones.get(entry["name"].lower())
+            if zone is not None:
+                getattr(zone, op)(entry["player"])
+
+    def _append_log(self, entry: dict) -> None:
+        """Append a change to the log, compacting when it grows too long."""
+        if self.data_folder is None:
+            return
+        try:
+            with open(self._log_path(), "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._log_entries += 1
+        except Exception as e:
+            print(f"[WorldEdit] Error writing zone log: {e}")
+            return
+        if self._log_entries >= max(self.COMPACT_MIN_ENTRIES, len(self.zones)):
+            self.compact()
+
+    def compact(self) -> None:
+        """Write a snapshot of all zones and truncate the log."""
+        if self.data_folder is None:
+            return
+        tmp_path = self._snapshot_path() + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump([zone.to_dict() for zone in self.zones.values()], f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._snapshot_path())
+            # Replaying stale entries over the new snapshot is harmless, so a
+            # crash before this truncation loses nothing
+            open(self._log_path(), "w").close()
+            self._log_entries = 0
+        except Exception as e:
+            print(f"[WorldEdit] Error compacting zones: {e}")
+
+    def _add(self, zone: BuilderZone) -> None:
+        """Register a zone, replacing any zone with the same name."""
+        key = zone.name.lower()
+        self._discard(key)
+        self.zones[key] = zone
+        self.generation += 1
+        self.index.insert(key, zone.dimension, zone.min_pos, zone.max_pos)
+        if zone.expires_at is not None:
+            heapq.heappush(self._expiry_heap, (zone.expires_at.timestamp(), self._expiry_sequence, key))
+            self._expiry_sequence += 1
+
+    def _discard(self, name: str) -> Optional[BuilderZone]:
+        """Unregister a zone by name; its heap entry goes stale and is skipped later."""
+        zone = self.zones.pop(name.lower(), None)
+        if zone is not None:
+            self.index.remove(name.lower())
+            self.generation += 1
+        return zone
+
     def create_zone(
         self,
         name: str,
@@ -111,7 +272,7 @@ class ZoneManager:
         dimension: str,
         duration_hours: Optional[float] = None
     ) -> BuilderZone:
-        """Create a new builder zone.
+        """Create a new builder zone, replacing any zone with the same name.
 
         Args:
             name: Zone name
@@ -137,7 +298,8 @@ class ZoneManager:
             expires_at=expires_at
         )
         
-        self.zones.append(zone)
+        self._add(zone)
+        self._append_log({"op": "create", "zone": zone.to_dict()})
         return zone
     
     def create_zone_at_location(
@@ -176,10 +338,7 @@ class ZoneManager:
         Returns:
             Zone or None if not found
         """
-        for zone in self.zones:
-            if zone.name.lower() == name.lower():
-                return zone
-        return None
+        return self.zones.get(name.lower())
     
     def delete_zone(self, name: str) -> bool:
         """Delete zone by name.
@@ -190,11 +349,46 @@ class ZoneManager:
         Returns:
             True if zone was deleted
         """
+        if self._discard(name) is None:
+            return False
+        self._append_log({"op": "delete", "name": name})
+        return True
+
+    def add_builder(self, name: str, player_name: str) -> bool:
+        """Share a zone with a player.
+
+        Args:
+            name: Zone name
+            player_name: Player name to add
+
+        Returns:
+            True if the zone exists
+        """
         zone = self.get_zone(name)
-        if zone:
-            self.zones.remove(zone)
-            return True
-        return False
+        if zone is None:
+            return False
+        zone.add_builder(player_name)
+        self.generation += 1
+        self._append_log({"op": "add_builder", "name": name, "player": player_name})
+        return True
+
+    def remove_builder(self, name: str, player_name: str) -> bool:
+        """Stop sharing a zone with a player.
+
+        Args:
+            name: Zone name
+            player_name: Player name to remove
+
+        Returns:
+            True if the zone exists
+        """
+        zone = self.get_zone(name)
+        if zone is None:
+            return False
+        zone.remove_builder(player_name)
+        self.generation += 1
+        self._append_log({"op": "remove_builder", "name": name, "player": player_name})
+        return True
     
     def get_zones_at_location(self, pos: Tuple[int, int, int], dimension: str) -> List[BuilderZone]:
         """Get all zones containing position.
@@ -206,7 +400,37 @@ class ZoneManager:
         Returns:
             List of zones containing position
         """
-        return [z for z in self.zones if z.contains(pos, dimension) and not z.is_expired()]
+        zones = (self.zones[key] for key in self.index.query_point(dimension, *pos))
+        return [z for z in zones if not z.is_expired()]
+
+    def get_zones_in_column(self, x: float, z: float, dimension: str) -> List[BuilderZone]:
+        """Get all zones overlapping the chunk column of a position.
+
+        Args:
+            x: X coordinate
+            z: Z coordinate
+            dimension: Dimension name
+
+        Returns:
+            List of zones that may contain points in the column
+        """
+        zones = (self.zones[key] for key in self.index.query_column(dimension, x, z))
+        return [z for z in zones if not z.is_expired()]
+
+    def get_zones_in_box(self, min_pos: Tuple[float, float, float], max_pos: Tuple[float, float, float],
+                         dimension: str) -> List[BuilderZone]:
+        """Get all zones intersecting a box.
+
+        Args:
+            min_pos: Minimum corner (x, y, z), inclusive
+            max_pos: Maximum corner (x, y, z), inclusive
+            dimension: Dimension name
+
+        Returns:
+            List of intersecting zones
+        """
+        zones = (self.zones[key] for key in self.index.query_box(dimension, min_pos, max_pos))
+        return [z for z in zones if not z.is_expired()]
 
     def can_build_at(self, player_name: str, pos: Tuple[int, int, int], dimension: str, bypass: bool = False) -> bool:
         """Check if player can build at location.
@@ -231,13 +455,26 @@ class ZoneManager:
     
     def purge_expired(self) -> int:
         """Remove expired zones.
+
+        Only the zones due so far are popped from the expiry heap, so this is
+        cheap enough to run from the scheduler every second. Expiry needs no
+        log entry: expired zones are dropped again when the log is replayed.
         
         Returns:
             Number of zones removed
         """
-        before_count = len(self.zones)
-        self.zones = [z for z in self.zones if not z.is_expired()]
-        return before_count - len(self.zones)
+        now = datetime.now().timestamp()
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] <= now:
+            expires, _, key = heapq.heappop(heap)
+            zone = self.zones.get(key)
+            # Skip entries left behind by deleted or replaced zones
+            if zone is None or zone.expires_at is None or zone.expires_at.timestamp() != expires:
+                continue
+            self._discard(key)
+            removed += 1
+        return removed
     
     def get_player_zones(self, player_name: str) -> List[BuilderZone]:
         """Get all zones player has access to.
@@ -248,5 +485,4 @@ class ZoneManager:
         Returns:
             List of accessible zones
         """
-        return [z for z in self.zones if z.has_access(player_name) and not z.is_expired()]
-
+        return [z for z in self.zones.values() if z.has_access(player_name) and not z.is_expired()]